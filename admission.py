@@ -0,0 +1,189 @@
+"""Admission control for model calls: rate limits and a bounded wait queue.
+
+Gemini quota is shared by every user, so one client flooding /chat can
+exhaust it for everyone. Before a message goes to the model it must get a
+token from its session's bucket and from the global bucket, and then one of
+``max_concurrent`` call slots. When every slot is busy, callers wait in a
+short priority queue (short messages first); when the queue is full, a
+newcomer can push out a lower-priority waiter, otherwise it is turned away.
+
+A refused call is not an error: the chatbot answers it locally at once,
+which keeps tail latency flat during a spike instead of letting requests
+pile up behind the model.
+"""
+import heapq
+import os
+import threading
+import time
+
+# Reasons a call is refused; also the fallback reason recorded in metrics
+SESSION_RATE = 'session_rate'
+GLOBAL_RATE = 'global_rate'
+QUEUE_FULL = 'queue_full'
+QUEUE_TIMEOUT = 'queue_timeout'
+SHED = 'shed'
+
+# Messages up to this long are cheap to answer and go to the front of the queue
+SHORT_MESSAGE_CHARS = 120
+
+
+class TokenBucket:
+    """``rate`` tokens per second, holding at most ``capacity``.
+
+    Not locked: the session bucket is only used under the controller's lock.
+    """
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated_at', 'clock')
+
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.clock = clock
+        self.updated_at = clock()
+
+    def try_acquire(self, tokens=1):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+    def refund(self, tokens=1):
+        self.tokens = min(self.capacity, self.tokens + tokens)
+
+
+class _Waiter:
+    __slots__ = ('priority', 'seq', 'outcome')
+
+    def __init__(self, priority, seq):
+        self.priority = priority
+        self.seq = seq
+        self.outcome = None  # True once given a slot, or the reason it was dropped
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class AdmissionController:
+    """Rate limits plus a bounded, prioritized queue for call slots.
+
+    A rate of 0 turns that limit off. ``admit`` returns None when the call
+    may go ahead (the caller must then ``release()``), or the reason it was
+    refused.
+    """
+
+    def __init__(self, rate=10.0, burst=20, session_rate=0.2, session_burst=5,
+                 max_concurrent=16, max_queue=32, queue_timeout=1.0, clock=time.monotonic):
+        self.session_rate = session_rate
+        self.session_burst = session_burst
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.clock = clock
+        self.bucket = TokenBucket(rate, burst, clock) if rate > 0 else None
+        self._lock = threading.Condition()
+        self._waiters = []
+        self._seq = 0
+        self.active = 0
+        self.admitted = 0
+        self.queued = 0
+        self.refused = {reason: 0 for reason in (SESSION_RATE, GLOBAL_RATE, QUEUE_FULL, QUEUE_TIMEOUT, SHED)}
+
+    @property
+    def waiting(self):
+        return len(self._waiters)
+
+    def session_bucket(self):
+        """A new bucket for one session, or None if sessions are not limited."""
+        if self.session_rate <= 0:
+            return None
+        return TokenBucket(self.session_rate, self.session_burst, self.clock)
+
+    def admit(self, session_bucket=None, priority=0, timeout=None):
+        """Wait for a call slot; lower ``priority`` values are served first."""
+        timeout = self.queue_timeout if timeout is None else min(timeout, self.queue_timeout)
+        with self._lock:
+            if session_bucket is not None and not session_bucket.try_acquire():
+                return self._refuse(SESSION_RATE)
+            if self.bucket is not None and not self.bucket.try_acquire():
+                if session_bucket is not None:
+                    session_bucket.refund()
+                return self._refuse(GLOBAL_RATE)
+            if self.active < self.max_concurrent and not self._waiters:
+                self.active += 1
+                self.admitted += 1
+                return None
+            if len(self._waiters) >= self.max_queue:
+                worst = max(self._waiters) if self._waiters else None
+                if worst is None or worst.priority <= priority:
+                    self._refund(session_bucket)
+                    return self._refuse(QUEUE_FULL)
+                self._remove(worst)
+                worst.outcome = SHED
+                self._lock.notify_all()
+            waiter = _Waiter(priority, self._seq)
+            self._seq += 1
+            heapq.heappush(self._waiters, waiter)
+            self.queued += 1
+            deadline = time.monotonic() + timeout
+            while waiter.outcome is None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._remove(waiter)
+                    waiter.outcome = QUEUE_TIMEOUT
+                    break
+                self._lock.wait(remaining)
+            if waiter.outcome is True:
+                self.admitted += 1
+                return None
+            # Dropped before reaching the model, so its tokens were not used
+            self._refund(session_bucket)
+            return self._refuse(waiter.outcome)
+
+    def release(self):
+        """Free a call slot, handing it straight to the best waiter if any."""
+        with self._lock:
+            if self._waiters:
+                heapq.heappop(self._waiters).outcome = True
+                self._lock.notify_all()
+            else:
+                self.active -= 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "active": self.active,
+                "waiting": len(self._waiters),
+                "admitted": self.admitted,
+                "queued": self.queued,
+                "refused": dict(self.refused),
+            }
+
+    def _refuse(self, reason):
+        self.refused[reason] += 1
+        return reason
+
+    def _refund(self, session_bucket):
+        if session_bucket is not None:
+            session_bucket.refund()
+        if self.bucket is not None:
+            self.bucket.refund()
+
+    def _remove(self, waiter):
+        self._waiters.remove(waiter)
+        heapq.heapify(self._waiters)
+
+
+def admission_from_env():
+    return AdmissionController(
+        rate=float(os.getenv('LLM_RATE_PER_SECOND', '10')),
+        burst=float(os.getenv('LLM_RATE_BURST', '20')),
+        session_rate=float(os.getenv('LLM_SESSION_RATE_PER_SECOND', '0.2')),
+        session_burst=float(os.getenv('LLM_SESSION_BURST', '5')),
+        max_concurrent=int(os.getenv('LLM_MAX_CONCURRENT', '16')),
+        max_queue=int(os.getenv('LLM_MAX_QUEUE', '32')),
+        queue_timeout=float(os.getenv('LLM_QUEUE_TIMEOUT_SECONDS', '1')),
+    )
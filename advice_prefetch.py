@@ -0,0 +1,140 @@
+"""Savings advice looked up before the user asks for it.
+
+Once a session has a savings goal, the arguments to
+``FinancialAnalysis.suggest_savings`` and
+``BankPolicySuggestions.suggest_policies`` are known, and both wait on web
+searches. ``SavingsAdvice`` starts them in the background when the goal is
+set or changes, cancels lookups for a goal that was replaced, and keeps the
+results on the session, so "what should I do with my savings?" is answered
+from memory.
+
+Entering expenses moves the remaining balance but does not start new
+searches; if the balance has moved by the time the user asks, the savings
+lookup is redone then (its goal query is already in the advice cache).
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from bank_policy_suggestions import BankPolicySuggestions
+from financial_analysis import FinancialAnalysis
+from metrics import PREFETCHES
+
+# How long a question waits for lookups still in flight before the model answers it
+PREFETCH_WAIT_SECONDS = float(os.getenv('ADVICE_PREFETCH_WAIT_SECONDS', '3'))
+
+
+class AdvicePrefetcher:
+    """The worker pool and advice sources shared by every session.
+
+    At most ``max_pending`` lookups are queued or running at once; past
+    that, prefetches are skipped and the lookup happens when asked for.
+    """
+
+    def __init__(self, max_workers=4, max_pending=64, analysis=None, policies=None, deadline=None):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='prefetch')
+        self.max_pending = max_pending
+        self.analysis = analysis or FinancialAnalysis()
+        self.policies = policies or BankPolicySuggestions()
+        # Passed on to the suggest_* methods; None keeps their default
+        self.deadline = deadline
+        self._lock = threading.Lock()
+        self.pending = 0
+
+    def submit(self, suggest, *args):
+        """Start ``suggest(*args, deadline)``; None if too many are pending."""
+        with self._lock:
+            if self.pending >= self.max_pending:
+                PREFETCHES.inc('skipped')
+                return None
+            self.pending += 1
+        PREFETCHES.inc('started')
+        future = self.executor.submit(suggest, *args, self.deadline)
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future):
+        with self._lock:
+            self.pending -= 1
+
+
+def _cancel(future):
+    if future is not None and not future.done():
+        # A lookup that already started runs on (filling the advice cache),
+        # but its result is dropped
+        PREFETCHES.inc('cancelled' if future.cancel() else 'superseded')
+
+
+class SavingsAdvice:
+    """One session's prefetched savings and bank-policy advice."""
+
+    __slots__ = ('prefetcher', '_savings_key', '_savings', '_policy_key', '_policy')
+
+    def __init__(self, prefetcher):
+        self.prefetcher = prefetcher
+        self._savings_key = None
+        self._savings = None
+        self._policy_key = None
+        self._policy = None
+
+    def update(self, income, total_expenses, savings_goal, refresh=False):
+        """Start the lookups a new goal needs, dropping those for the old one.
+
+        A savings lookup whose remaining balance is out of date is only
+        redone with ``refresh`` (when the advice is about to be used).
+        """
+        savings_key = None
+        if savings_goal is not None and income is not None:
+            savings_key = (income - total_expenses, savings_goal)
+        if savings_key != self._savings_key:
+            goal_changed = (self._savings_key is None or savings_key is None
+                            or savings_key[1] != self._savings_key[1])
+            if goal_changed or refresh:
+                _cancel(self._savings)
+                self._savings = None
+                if savings_key is not None:
+                    self._savings = self.prefetcher.submit(self.prefetcher.analysis.suggest_savings, *savings_key)
+                self._savings_key = savings_key if self._savings is not None else None
+        if savings_goal != self._policy_key:
+            _cancel(self._policy)
+            self._policy = None
+            if savings_goal is not None:
+                self._policy = self.prefetcher.submit(self.prefetcher.policies.suggest_policies, savings_goal)
+            self._policy_key = savings_goal if self._policy is not None else None
+
+    def wait(self, timeout=None):
+        """Wait for lookups in flight; True once every one has finished."""
+        futures = [future for future in (self._savings, self._policy) if future is not None]
+        return not wait(futures, timeout=timeout).not_done
+
+    def answer(self, timeout=PREFETCH_WAIT_SECONDS):
+        """Return the advice text, waiting up to ``timeout`` for lookups
+        still running; None if there is no goal or they did not finish."""
+        futures = [future for future in (self._savings, self._policy) if future is not None]
+        if not futures:
+            return None
+        if all(future.done() for future in futures):
+            PREFETCHES.inc('ready')
+        else:
+            PREFETCHES.inc('waited')
+            if not self.wait(timeout):
+                PREFETCHES.inc('timeout')
+                return None
+        try:
+            return "\n\n".join(future.result() for future in futures)
+        except Exception as e:
+            print(f"Error in prefetched advice: {str(e)}")
+            return None
+
+
+def prefetcher_from_env():
+    # ADVICE_PREFETCH=0 leaves savings questions to the model, as before
+    if os.getenv('ADVICE_PREFETCH', '1') == '0':
+        return None
+    return AdvicePrefetcher(
+        max_workers=int(os.getenv('ADVICE_PREFETCH_WORKERS', '4')),
+        max_pending=int(os.getenv('ADVICE_PREFETCH_MAX_PENDING', '64')),
+    )
+
+
+advice_prefetcher = prefetcher_from_env()
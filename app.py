@@ -1,35 +1,283 @@
-from flask import Flask, request, jsonify, render_template
+import atexit
+import hmac
+import json
+import os
+import time
+import uuid
+import zlib
+from flask import Flask, Response, g, request, jsonify, render_template, stream_with_context
+from admission import admission_from_env
 from chatbot import SmartBudgetAIChatbot
 from flask_cors import CORS
+from intent_router import router
+from metrics import REQUEST_SECONDS, REQUESTS, registry
+from model_loader import llm_model
+from resilience import gemini_breaker
+from response_cache import ResponseCache
+from session_snapshot import decode_snapshot, encode_snapshot, validate_snapshot
+from session_storage import SQLiteStorage
+from session_store import SessionStore
+from web_search import advice_cache
+
+SESSION_COOKIE = 'session_id'
+SESSION_HEADER = 'X-Session-ID'
+BATCH_MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', '10000'))
+BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', '16'))
+# Snapshot routes move whole sessions, model history included, so only a
+# gateway holding this token may use them; they are off when it is unset
+SNAPSHOT_TOKEN = os.getenv('SESSION_SNAPSHOT_TOKEN')
+SNAPSHOT_TOKEN_HEADER = 'X-Snapshot-Token'
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
-chatbot = SmartBudgetAIChatbot()
+response_cache = ResponseCache(
+    max_entries=int(os.getenv('RESPONSE_CACHE_MAX', '5000')),
+    ttl_seconds=float(os.getenv('RESPONSE_CACHE_TTL_SECONDS', '3600'))
+)
+# Set SESSION_DB_PATH to keep sessions across restarts and worker processes
+session_storage = None
+if os.getenv('SESSION_DB_PATH'):
+    session_storage = SQLiteStorage(
+        os.getenv('SESSION_DB_PATH'),
+        flush_interval=float(os.getenv('SESSION_FLUSH_SECONDS', '0.5'))
+    )
+    atexit.register(session_storage.close)
+# Rate limits and call slots for Gemini, shared by every session (LLM_* settings)
+llm_admission = admission_from_env()
+sessions = SessionStore(
+    lambda: SmartBudgetAIChatbot(response_cache=response_cache, admission=llm_admission),
+    max_sessions=int(os.getenv('SESSION_MAX', '10000')),
+    ttl_seconds=float(os.getenv('SESSION_TTL_SECONDS', '1800')),
+    storage=session_storage,
+    # Needed when several worker processes share SESSION_DB_PATH (see serve.py)
+    revalidate=os.getenv('SESSION_REVALIDATE') == '1'
+)
+
+registry.gauge('smartbudget_sessions', 'Sessions held in memory', lambda: len(sessions))
+registry.gauge('smartbudget_response_cache_entries', 'Entries in the response cache', lambda: len(response_cache))
+registry.gauge('smartbudget_llm_breaker_open', '1 while the Gemini circuit breaker is not closed',
+               lambda: gemini_breaker.state != 'closed')
+registry.gauge('smartbudget_llm_calls_in_flight', 'Gemini calls holding an admission slot',
+               lambda: llm_admission.active)
+registry.gauge('smartbudget_llm_calls_waiting', 'Gemini calls queued for an admission slot',
+               lambda: llm_admission.waiting)
+registry.gauge('smartbudget_llm_model_ready', '1 once the chat model has loaded', lambda: llm_model.model is not None)
+
+@app.before_request
+def start_timer():
+    g.request_started_at = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    # Streaming responses are timed to their first byte
+    started_at = g.pop('request_started_at', None)
+    if started_at is not None:
+        endpoint = request.endpoint or 'unknown'
+        REQUEST_SECONDS.observe(time.perf_counter() - started_at, endpoint)
+        REQUESTS.inc(endpoint, str(response.status_code))
+    return response
+
+def get_session_id():
+    # Prefer an explicit header (API clients), then the browser cookie
+    session_id = request.headers.get(SESSION_HEADER) or request.cookies.get(SESSION_COOKIE)
+    if session_id:
+        return session_id, False
+    return uuid.uuid4().hex, True
+
+def with_session_cookie(response, session_id, is_new):
+    if is_new:
+        response.set_cookie(SESSION_COOKIE, session_id, httponly=True, samesite='Lax')
+    response.headers[SESSION_HEADER] = session_id
+    return response
 
 @app.route('/')
 def home():
     return render_template('index.html')
 
+def read_chat_input():
+    # Returns (user_input, None) or (None, error response)
+    if not request.is_json:
+        return None, (jsonify({'error': 'Content-Type must be application/json'}), 400)
+    
+    data = request.get_json()
+    if not data or 'input' not in data:
+        return None, (jsonify({'error': 'Missing "input" field in request body'}), 400)
+    
+    user_input = data['input']
+    if not isinstance(user_input, str):
+        return None, (jsonify({'error': 'Input must be a string'}), 400)
+    return user_input, None
+
+def sse_event(payload, event=None):
+    message = f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+    if event:
+        message = f"event: {event}\n" + message
+    return message
+
 @app.route('/chat', methods=['POST'])
 def chat():
     try:
-        if not request.is_json:
-            return jsonify({'error': 'Content-Type must be application/json'}), 400
-        
-        data = request.get_json()
-        if not data or 'input' not in data:
-            return jsonify({'error': 'Missing "input" field in request body'}), 400
+        user_input, error = read_chat_input()
+        if error:
+            return error
         
-        user_input = data['input']
-        if not isinstance(user_input, str):
-            return jsonify({'error': 'Input must be a string'}), 400
-        
-        response = chatbot.get_ai_response(user_input)
-        return jsonify({'response': response})
+        session_id, is_new = get_session_id()
+        chatbot = sessions.get(session_id)
+        # Waits for a batch or another request already working on this session
+        with chatbot.turn_lock:
+            response = chatbot.process_input(user_input)
+            sessions.save(session_id, chatbot)
+        return with_session_cookie(jsonify({'response': response}), session_id, is_new)
     
     except Exception as e:
         print(f"Error in chat route: {str(e)}")  # Add error logging
         return jsonify({'error': str(e)}), 500
 
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    user_input, error = read_chat_input()
+    if error:
+        return error
+    
+    session_id, is_new = get_session_id()
+    chatbot = sessions.get(session_id)
+    
+    def generate():
+        try:
+            with chatbot.turn_lock:
+                for text in chatbot.stream_input(user_input):
+                    yield sse_event({'text': text})
+                sessions.save(session_id, chatbot)
+            yield sse_event({}, event='done')
+        except Exception as e:
+            print(f"Error in chat stream route: {str(e)}")
+            yield sse_event({'error': str(e)}, event='error')
+    
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Stop proxies from buffering the stream
+    return with_session_cookie(response, session_id, is_new)
+
+def read_batch_items():
+    # Returns (items, concurrency, None) or (None, None, error response)
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get('items'), list):
+        return None, None, (jsonify({'error': 'Body must be JSON with an "items" list'}), 400)
+    items = data['items']
+    if len(items) > BATCH_MAX_ITEMS:
+        return None, None, (jsonify({'error': f'At most {BATCH_MAX_ITEMS} items per batch'}), 413)
+    for index, item in enumerate(items):
+        if (not isinstance(item, dict) or not isinstance(item.get('session'), str) or not item['session']
+                or not isinstance(item.get('input'), str)):
+            return None, None, (jsonify({'error': f'Item {index} needs a "session" and an "input" string'}), 400)
+    concurrency = data.get('concurrency', BATCH_CONCURRENCY)
+    if not isinstance(concurrency, int) or concurrency < 1:
+        return None, None, (jsonify({'error': '"concurrency" must be a positive integer'}), 400)
+    return items, min(concurrency, BATCH_CONCURRENCY), None
+
+@app.route('/chat/batch', methods=['POST'])
+def chat_batch():
+    # Streams one JSON line per item as it finishes (newline-delimited JSON);
+    # each line carries the item's index so callers can match results up
+    items, concurrency, error = read_batch_items()
+    if error:
+        return error
+
+    def generate():
+        results = SmartBudgetAIChatbot.process_batch(
+            items, get_session=sessions.get, max_workers=concurrency, on_session_done=sessions.save
+        )
+        for result in results:
+            yield json.dumps(result, ensure_ascii=False) + '\n'
+
+    return Response(generate(), mimetype='application/x-ndjson')
+
+def snapshot_access_error():
+    if not SNAPSHOT_TOKEN:
+        return jsonify({'error': 'Not found'}), 404
+    token = request.headers.get(SNAPSHOT_TOKEN_HEADER, '')
+    if not hmac.compare_digest(token.encode('utf-8'), SNAPSHOT_TOKEN.encode('utf-8')):
+        return jsonify({'error': 'Missing or wrong snapshot token'}), 403
+    return None
+
+def existing_session(session_id):
+    # Unlike sessions.get, never creates a session
+    chatbot = sessions.peek(session_id)
+    if chatbot is None and session_storage is not None and session_storage.version(session_id) is not None:
+        chatbot = sessions.get(session_id)
+    return chatbot
+
+@app.route('/session/snapshot', methods=['GET'])
+def export_session():
+    # Lets a gateway move a session to another worker or node
+    error = snapshot_access_error()
+    if error:
+        return error
+    session_id, is_new = get_session_id()
+    chatbot = None if is_new else existing_session(session_id)
+    if chatbot is None:
+        return jsonify({'error': 'No session to export'}), 404
+    with chatbot.turn_lock:
+        snapshot = chatbot.snapshot()
+    return Response(encode_snapshot(snapshot), mimetype='application/octet-stream')
+
+@app.route('/session/snapshot', methods=['PUT'])
+def import_session():
+    error = snapshot_access_error()
+    if error:
+        return error
+    session_id, is_new = get_session_id()
+    try:
+        snapshot = decode_snapshot(request.get_data())
+        validate_snapshot(snapshot)
+        if session_storage is not None:
+            # The snapshot replaces whatever was stored for this session
+            sessions.drop(session_id)
+            session_storage.delete(session_id)
+        chatbot = sessions.get(session_id)
+        with chatbot.turn_lock:
+            chatbot.restore_snapshot(snapshot)
+            sessions.save(session_id, chatbot)
+    except (ValueError, zlib.error) as e:
+        return jsonify({'error': f'Invalid snapshot: {str(e)}'}), 400
+    return with_session_cookie(jsonify({'restored': True}), session_id, is_new)
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/sessions/stats', methods=['GET'])
+def session_stats():
+    stats = sessions.stats()
+    if session_storage is not None:
+        stats['storage'] = session_storage.stats()
+    return jsonify(stats)
+
+@app.route('/router/stats', methods=['GET'])
+def router_stats():
+    return jsonify(router.stats())
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    return jsonify(response_cache.stats())
+
+@app.route('/advice/stats', methods=['GET'])
+def advice_stats():
+    return jsonify(advice_cache.stats())
+
+@app.route('/breaker/stats', methods=['GET'])
+def breaker_stats():
+    return jsonify(gemini_breaker.stats())
+
+@app.route('/admission/stats', methods=['GET'])
+def admission_stats():
+    return jsonify(llm_admission.stats())
+
+@app.route('/model/stats', methods=['GET'])
+def model_stats():
+    return jsonify(llm_model.stats())
+
 if __name__ == '__main__':
+    # Load the SDK while the server starts; early messages are answered locally
+    llm_model.warm_up()
     app.run(debug=True)
@@ -1,21 +1,25 @@
-from web_search import get_financial_advice
+from web_search import get_financial_advice_many
 
 class BankPolicySuggestions:
-    def suggest_policies(self, savings_goal):
+    def suggest_policies(self, savings_goal, deadline=None):
         try:
             # Get real-time banking product recommendations
             search_query = f"best savings accounts and banking products for {savings_goal} monthly savings india"
-            banking_advice = get_financial_advice(search_query)
-            
-            response = "🏦 Banking Recommendations:\n\n"
-            response += banking_advice
+            queries = [search_query]
             
             # Get additional tax saving suggestions if applicable
             if savings_goal >= 10000:
-                tax_query = "best tax saving investment options india"
-                tax_advice = get_financial_advice(tax_query)
+                queries.append("best tax saving investment options india")
+            
+            # Run the lookups concurrently under one deadline
+            advice = get_financial_advice_many(queries, deadline)
+            
+            response = "🏦 Banking Recommendations:\n\n"
+            response += advice[0]
+            
+            if len(advice) > 1:
                 response += "\n\n💰 Tax Saving Options:\n"
-                response += tax_advice
+                response += advice[1]
             
             return response
         except Exception as e:
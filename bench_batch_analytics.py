@@ -0,0 +1,54 @@
+"""Compare FinancialAnalysis.analyze_batch with the per-user method loop.
+
+Usage: python bench_batch_analytics.py [users] [categories]
+"""
+import sys
+import time
+import numpy as np
+from financial_analysis import FinancialAnalysis
+
+def per_user_loop(analysis, incomes, expenses, goals, categories):
+    results = []
+    for income, row, goal in zip(incomes, expenses, goals):
+        user_expenses = dict(zip(categories, row))
+        total = analysis.calculate_total_expenses(user_expenses)
+        remaining = analysis.calculate_remaining_balance(income, total)
+        results.append((
+            analysis.get_expense_breakdown(user_expenses, income),
+            remaining,
+            analysis.get_50_30_20_analysis(income, total, goal),
+            max(goal - remaining, 0)
+        ))
+    return results
+
+def main(users=100000, category_count=8):
+    rng = np.random.default_rng(42)
+    categories = [f"category_{i}" for i in range(category_count)]
+    incomes = rng.uniform(20000, 200000, users)
+    expenses = rng.uniform(0, 1, (users, category_count)) * incomes[:, None] / category_count
+    goals = incomes * rng.uniform(0.05, 0.3, users)
+    analysis = FinancialAnalysis()
+
+    start = time.perf_counter()
+    loop_results = per_user_loop(analysis, incomes.tolist(), expenses.tolist(), goals.tolist(), categories)
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = analysis.analyze_batch(incomes, expenses, goals, categories)
+    batch_time = time.perf_counter() - start
+
+    # Spot-check that both paths agree
+    breakdown, remaining, targets, deficit = loop_results[-1]
+    assert np.isclose(batch["remaining_balance"][-1], remaining)
+    assert np.isclose(batch["goal_deficit"][-1], deficit)
+    assert np.isclose(batch["needs"][-1], targets["needs"])
+    assert np.isclose(batch["breakdown_percentages"][-1, 0], breakdown[categories[0]])
+
+    print(f"Users: {users:,}  Categories: {category_count}")
+    print(f"Per-user loop: {loop_time * 1000:10.1f} ms")
+    print(f"Batch:         {batch_time * 1000:10.1f} ms")
+    print(f"Speed-up:      {loop_time / batch_time:10.1f}x")
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:3]]
+    main(*args)
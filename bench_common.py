@@ -0,0 +1,68 @@
+"""Shared helpers for the bench_*.py scripts: percentiles and the baseline file.
+
+Baselines are machine specific. Record one on the machine that will run the
+comparison (``--save-baseline``), then later runs report any metric that got
+worse by more than the tolerance and exit with status 1.
+"""
+import json
+import os
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_baseline.json')
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def load_baseline(section, path=BASELINE_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as handle:
+        return json.load(handle).get(section, {})
+
+
+def save_baseline(section, results, path=BASELINE_PATH):
+    data = {}
+    if os.path.exists(path):
+        with open(path) as handle:
+            data = json.load(handle)
+    data[section] = results
+    with open(path, 'w') as handle:
+        json.dump(data, handle, indent=2, sort_keys=True)
+        handle.write('\n')
+
+
+def find_regressions(results, baseline, tolerance, higher_is_better=()):
+    """Return [(metric, baseline, current, change)] for metrics that got worse.
+
+    Metrics are lower-is-better (latencies) unless named in ``higher_is_better``.
+    ``change`` is the relative change in the bad direction.
+    """
+    regressions = []
+    for metric, current in results.items():
+        previous = baseline.get(metric)
+        if not previous:
+            continue
+        if metric in higher_is_better:
+            change = (previous - current) / previous
+        else:
+            change = (current - previous) / previous
+        if change > tolerance:
+            regressions.append((metric, previous, current, change))
+    return regressions
+
+
+def report_regressions(regressions, baseline):
+    if not baseline:
+        print("\nNo baseline recorded yet; run with --save-baseline to create one.")
+        return 0
+    if not regressions:
+        print("\nNo regressions against the baseline.")
+        return 0
+    print("\nRegressions against the baseline:")
+    for metric, previous, current, change in regressions:
+        print(f"  {metric}: {previous:.3f} -> {current:.3f} ({change:+.0%})")
+    return 1
@@ -0,0 +1,125 @@
+"""Load-test app.py's /chat route against a local fake Gemini.
+
+Starts the Flask app on a local port with a FakeGenerativeModel of the
+given latency, then drives /chat from ``--concurrency`` client threads,
+each with its own session. Reports latency percentiles and throughput and
+compares them with the stored baseline for the same settings.
+
+Usage: python bench_load.py [--concurrency 8] [--requests 400] [--latency 0.05]
+                            [--error-rate 0] [--model-capacity 0] [--no-cache] [--admission]
+                            [--save-baseline] [--tolerance 0.25]
+"""
+import argparse
+import http.client
+import json
+import logging
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.serving import make_server
+import app
+from bench_common import find_regressions, load_baseline, percentile, report_regressions, save_baseline
+from chatbot import SmartBudgetAIChatbot
+from fake_llm import FakeGenerativeModel
+
+# Half the mix is answered by the intent router, half goes to the model
+MESSAGES = [
+    "hi",
+    "How do mutual funds work?",
+    "I spend 12000 on rent",
+    "Should I pay off my credit card or invest first?",
+    "My monthly income is 75000",
+    "What is a good emergency fund size?",
+    "what can you do?",
+    "How can I cut my grocery bill?",
+]
+
+def start_server(model, response_cache, admission=None):
+    app.sessions.factory = lambda: SmartBudgetAIChatbot(model=model, response_cache=response_cache,
+                                                        admission=admission)
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def run_client(port, client_id, count):
+    latencies, errors = [], 0
+    headers = {'Content-Type': 'application/json', 'X-Session-ID': f'load-{client_id}'}
+    for i in range(count):
+        body = json.dumps({'input': MESSAGES[(client_id + i) % len(MESSAGES)]})
+        start = time.perf_counter()
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        try:
+            connection.request('POST', '/chat', body, headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                errors += 1
+        except OSError:
+            errors += 1
+        finally:
+            connection.close()
+        latencies.append(time.perf_counter() - start)
+    return latencies, errors
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--latency', type=float, default=0.05, help='fake model latency in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--model-capacity', type=int, default=0,
+                        help='calls the fake model serves at once, like a quota-limited backend (0: unlimited)')
+    parser.add_argument('--no-cache', action='store_true', help='send every model-bound message to the model')
+    parser.add_argument('--admission', action='store_true',
+                        help="apply app.py's LLM rate limits and call queue (LLM_* settings)")
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    model = FakeGenerativeModel(latency=args.latency, error_rate=args.error_rate, seed=1,
+                                capacity=args.model_capacity or None)
+    server = start_server(model, None if args.no_cache else app.response_cache,
+                          app.llm_admission if args.admission else None)
+    per_client = max(args.requests // args.concurrency, 1)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        outcomes = list(pool.map(lambda client_id: run_client(server.port, client_id, per_client),
+                                 range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    latencies = sorted(latency for client_latencies, _ in outcomes for latency in client_latencies)
+    errors = sum(client_errors for _, client_errors in outcomes)
+    results = {
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'throughput_rps': len(latencies) / elapsed,
+    }
+    print(f"Requests: {len(latencies)}  Concurrency: {args.concurrency}  "
+          f"Model latency: {args.latency * 1000:.0f} ms  Errors: {errors}")
+    print(f"p50 {results['p50_ms']:8.1f} ms   p95 {results['p95_ms']:8.1f} ms   "
+          f"p99 {results['p99_ms']:8.1f} ms   {results['throughput_rps']:8.1f} req/s")
+    print(f"Answered locally: {app.router.stats()['local_rate']:.0%}  "
+          f"Cache hit rate: {app.response_cache.stats()['hit_rate']:.0%}  Model calls: {model.calls}")
+    if args.admission:
+        print(f"Admission: {app.llm_admission.stats()}")
+
+    # Baselines are kept per workload shape
+    key = (f"c{args.concurrency}-n{per_client * args.concurrency}-l{args.latency}-e{args.error_rate}"
+           f"{f'-m{args.model_capacity}' if args.model_capacity else ''}"
+           f"{'-nocache' if args.no_cache else ''}{'-admission' if args.admission else ''}")
+    baseline = load_baseline('load').get(key, {})
+    if args.save_baseline:
+        stored = load_baseline('load')
+        stored[key] = results
+        save_baseline('load', stored)
+        print("\nBaseline saved.")
+        return 0
+    regressions = find_regressions(results, baseline, args.tolerance, higher_is_better=('throughput_rps',))
+    return report_regressions(regressions, baseline)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+"""Measure memory held per chatbot session.
+
+Creates N sessions sharing one fake model (as the app shares one Gemini
+model), optionally feeding each a short onboarding conversation, and
+reports the traced bytes per session.
+
+Usage: python bench_memory.py [sessions] [--messages]
+"""
+import gc
+import sys
+import time
+import tracemalloc
+from chatbot import SmartBudgetAIChatbot
+from fake_llm import FakeGenerativeModel
+
+MESSAGES = ["My name is Asha", "My income is 60000", "I spend 15000 on rent", "I spend 4000 on groceries"]
+
+def measure(count, with_messages):
+    model = FakeGenerativeModel()
+    sessions = []
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    for _ in range(count):
+        bot = SmartBudgetAIChatbot(model=model)
+        if with_messages:
+            for message in MESSAGES:
+                bot.process_input(message)
+        sessions.append(bot)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used, elapsed
+
+def main(count=100_000, with_messages=False):
+    used, elapsed = measure(count, with_messages)
+    kind = f"after {len(MESSAGES)} messages" if with_messages else "new"
+    print(f"Sessions: {count:,} ({kind})")
+    print(f"Total:       {used / 1024 / 1024:10.1f} MiB")
+    print(f"Per session: {used / count:10,.0f} bytes")
+    print(f"Build time:  {elapsed:10.2f} s")
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    main(int(args[0]) if args else 100_000, '--messages' in sys.argv)
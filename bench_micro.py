@@ -0,0 +1,86 @@
+"""Micro-benchmarks for the chatbot's hot helpers and FinancialAnalysis.
+
+Each benchmark reports the best per-call time over several repeats, in
+microseconds, and is compared with the stored baseline.
+
+Usage: python bench_micro.py [--save-baseline] [--tolerance 0.25] [--filter NAME]
+"""
+import argparse
+import sys
+import timeit
+import web_search
+from bench_common import find_regressions, load_baseline, report_regressions, save_baseline
+from chatbot import SmartBudgetAIChatbot
+from fake_llm import FakeGenerativeModel
+from financial_analysis import FinancialAnalysis
+
+MESSAGES = [
+    "I spend 12000 on rent",
+    "My monthly income is 75000",
+    "I want to save 20000",
+    "Hi, I'm Meera",
+    "How can I reduce my food spending?",
+]
+
+def build_benchmarks():
+    web_search.set_search_backend(web_search.StubSearchBackend())
+    bot = SmartBudgetAIChatbot(model=FakeGenerativeModel())
+    bot.user_data.update({"income": 75000, "savings_goal": 20000})
+    bot.expenses.update({"rent": 20000, "food": 8000, "transport": 3000, "utilities": 2500, "shopping": 4000})
+    analysis = FinancialAnalysis()
+    expenses = dict(bot.expenses)
+    total = analysis.calculate_total_expenses(expenses)
+    analysis.suggest_savings(30000, 20000)  # warm the advice cache
+
+    def extract_all():
+        for message in MESSAGES:
+            bot.extract_financial_info(message)
+
+    def contextual_all():
+        for message in MESSAGES:
+            bot.generate_contextual_response(message)
+
+    # Per-message benchmarks run the whole list; divide by its length
+    return {
+        "extract_financial_info": (extract_all, len(MESSAGES)),
+        "generate_contextual_response": (contextual_all, len(MESSAGES)),
+        "format_financial_context": (bot.format_financial_context, 1),
+        "calculate_total_expenses": (lambda: analysis.calculate_total_expenses(expenses), 1),
+        "calculate_remaining_balance": (lambda: analysis.calculate_remaining_balance(75000, total), 1),
+        "get_expense_breakdown": (lambda: analysis.get_expense_breakdown(expenses, 75000), 1),
+        "get_50_30_20_analysis": (lambda: analysis.get_50_30_20_analysis(75000, total, 20000), 1),
+        "suggest_savings_cached": (lambda: analysis.suggest_savings(30000, 20000), 1),
+    }
+
+def measure(func, per_call_divisor, repeat=5):
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=number))
+    return best / number / per_call_divisor * 1e6
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--filter', default='')
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, (func, divisor) in build_benchmarks().items():
+        if args.filter in name:
+            results[name] = measure(func, divisor)
+
+    baseline = load_baseline('micro')
+    print(f"{'benchmark':32} {'µs/call':>10} {'baseline':>10}")
+    for name, value in results.items():
+        previous = baseline.get(name)
+        print(f"{name:32} {value:10.2f} {previous if previous is not None else float('nan'):10.2f}")
+
+    if args.save_baseline:
+        save_baseline('micro', {**baseline, **results})
+        print("\nBaseline saved.")
+        return 0
+    return report_regressions(find_regressions(results, baseline, args.tolerance), baseline)
+
+if __name__ == "__main__":
+    sys.exit(main())
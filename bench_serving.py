@@ -0,0 +1,111 @@
+"""Compare /chat throughput of the dev server with the production server.
+
+Each server runs in its own process, serving app.py with a fake Gemini model
+that sleeps ``--latency`` seconds per reply, and is driven by the same client
+threads as bench_load.py.
+
+    python bench_serving.py [--concurrency 64] [--requests 1280] [--latency 0.2]
+
+Server setups compared:
+  dev         app.run(debug=True) as app.py does (Werkzeug, debugger on)
+  serve-1x64  python serve.py --workers 1 --threads 64
+  serve-2x64  python serve.py --workers 2 --threads 64 with a shared SESSION_DB_PATH
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from bench_common import percentile
+from bench_load import run_client
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def create_fake_app():
+    """app.app with every session on a fake model (used as the server's WSGI app)."""
+    import app
+    from chatbot import SmartBudgetAIChatbot
+    from fake_llm import FakeGenerativeModel
+    model = FakeGenerativeModel(latency=float(os.getenv('FAKE_LLM_LATENCY', '0.2')))
+    # Caching is off so every model-bound message pays the model latency
+    app.sessions.factory = lambda: SmartBudgetAIChatbot(model=model)
+    return app.app
+
+
+DEV_SERVER = ("import bench_serving; "
+              "bench_serving.create_fake_app().run(port={port}, debug=True, use_reloader=False)")
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+
+def start(setup, port, latency):
+    env = dict(os.environ, FAKE_LLM_LATENCY=str(latency))
+    env.pop('GOOGLE_API_KEY', None)
+    if setup == 'dev':
+        command = [sys.executable, '-c', DEV_SERVER.format(port=port)]
+    else:
+        workers, threads = setup.split('-')[1].split('x')
+        command = [sys.executable, 'serve.py', '--app', 'bench_serving:create_fake_app()',
+                   '--bind', f'127.0.0.1:{port}', '--workers', workers, '--threads', threads]
+        if int(workers) > 1:
+            env['SESSION_DB_PATH'] = os.path.join(tempfile.mkdtemp(), 'sessions.db')
+    process = subprocess.Popen(command, cwd=HERE, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    wait_for_port(port)
+    return process
+
+
+def drive(port, concurrency, total):
+    per_client = max(total // concurrency, 1)
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(lambda client_id: run_client(port, client_id, per_client), range(concurrency)))
+    elapsed = time.perf_counter() - start_time
+    latencies = sorted(latency for client_latencies, _ in outcomes for latency in client_latencies)
+    errors = sum(client_errors for _, client_errors in outcomes)
+    return latencies, errors, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=1280)
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--setups', default='dev,serve-1x64,serve-2x64')
+    args = parser.parse_args(argv)
+
+    print(f"Concurrency: {args.concurrency}  Requests: {args.requests}  Model latency: {args.latency * 1000:.0f} ms")
+    print(f"{'setup':12} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for setup in args.setups.split(','):
+        port = free_port()
+        process = start(setup, port, args.latency)
+        try:
+            drive(port, args.concurrency, args.concurrency)  # warm up
+            latencies, errors, elapsed = drive(port, args.concurrency, args.requests)
+        finally:
+            process.terminate()
+            process.wait()
+        print(f"{setup:12} {len(latencies) / elapsed:8.1f} {percentile(latencies, 0.5) * 1000:8.1f} "
+              f"{percentile(latencies, 0.95) * 1000:8.1f} {percentile(latencies, 0.99) * 1000:8.1f} {errors:7d}")
+
+
+if __name__ == '__main__':
+    main()
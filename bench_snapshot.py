@@ -0,0 +1,61 @@
+"""Measure session snapshot size and encode / restore latency.
+
+Builds a session with a fake model, then times snapshot + encode and
+decode + restore into a fresh chatbot, as a worker picking the session up
+would do.
+
+Usage: python bench_snapshot.py [ledger_rows] [runs]
+"""
+import json
+import sys
+import time
+from chatbot import SmartBudgetAIChatbot
+from fake_llm import FakeGenerativeModel
+from session_snapshot import decode_snapshot, encode_snapshot
+
+def build_session(ledger_rows):
+    bot = SmartBudgetAIChatbot(model=FakeGenerativeModel())
+    bot.process_input("hi")
+    bot.process_input("My name is Asha")
+    bot.process_input("My monthly income is 90000")
+    bot.process_input("I want to save 15000")
+    for i in range(10):
+        bot.process_input(f"What should I do about my spending, part {i}?")
+    categories = ["rent", "food", "transport", "shopping", "utilities"]
+    bot.ledger.extend(
+        [100.0 + i for i in range(ledger_rows)],
+        [categories[i % len(categories)] for i in range(ledger_rows)],
+        [1_700_000_000 + i * 3600 for i in range(ledger_rows)]
+    )
+    return bot
+
+def median_ms(timings):
+    timings = sorted(timings)
+    return timings[len(timings) // 2] * 1000
+
+def main(ledger_rows=1000, runs=200):
+    bot = build_session(ledger_rows)
+    snapshot = bot.snapshot()
+    raw = json.dumps(snapshot, separators=(',', ':')).encode('utf-8')
+    data = encode_snapshot(snapshot)
+
+    encode_times, restore_times = [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        encode_snapshot(bot.snapshot())
+        encode_times.append(time.perf_counter() - start)
+
+        target = SmartBudgetAIChatbot(model=FakeGenerativeModel())
+        start = time.perf_counter()
+        target.restore_snapshot(decode_snapshot(data))
+        restore_times.append(time.perf_counter() - start)
+
+    print(f"Ledger rows: {ledger_rows:,}  Gemini history messages: {len(snapshot['history'])}  Runs: {runs}")
+    print(f"Snapshot JSON:       {len(raw):8,} bytes")
+    print(f"Snapshot compressed: {len(data):8,} bytes")
+    print(f"Snapshot + encode:   {median_ms(encode_times):8.3f} ms (median)")
+    print(f"Decode + restore:    {median_ms(restore_times):8.3f} ms (median)")
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:3]]
+    main(*args)
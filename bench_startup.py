@@ -0,0 +1,62 @@
+"""Measure cold-start cost: importing the app, first local reply, model warm-up.
+
+Each measurement runs in a fresh interpreter so module caches do not hide
+import time. GOOGLE_API_KEY defaults to a dummy value; building the model
+handle does not contact the API.
+
+Usage: python bench_startup.py [runs]
+"""
+import json
+import os
+import subprocess
+import sys
+
+PROBE = r'''
+import json, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+client = app.app.test_client()
+reply = client.post('/chat', json={'input': 'hi'})
+assert reply.status_code == 200
+first_reply = time.perf_counter()
+model = app.llm_model.get(timeout=60)
+warmed = time.perf_counter()
+print(json.dumps({
+    'import_app': imported - start,
+    'first_local_reply': first_reply - start,
+    'model_ready': warmed - start,
+    'model_loaded': model is not None,
+}))
+'''
+
+EAGER_PROBE = r'''
+import json, time
+start = time.perf_counter()
+import google.generativeai
+import app
+print(json.dumps({'import_app': time.perf_counter() - start}))
+'''
+
+def run(probe):
+    env = dict(os.environ)
+    env.setdefault('GOOGLE_API_KEY', 'benchmark-dummy-key')
+    output = subprocess.run([sys.executable, '-c', probe], capture_output=True, text=True, env=env, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+def main(runs=5):
+    lazy = [run(PROBE) for _ in range(runs)]
+    eager = [run(EAGER_PROBE) for _ in range(runs)]
+    print(f"Runs: {runs} (median, fresh interpreter each)")
+    print(f"import app (SDK imported eagerly): {median(r['import_app'] for r in eager) * 1000:8.1f} ms")
+    print(f"import app (lazy SDK):             {median(r['import_app'] for r in lazy) * 1000:8.1f} ms")
+    print(f"first local reply:                 {median(r['first_local_reply'] for r in lazy) * 1000:8.1f} ms")
+    print(f"model ready (background warm-up):  {median(r['model_ready'] for r in lazy) * 1000:8.1f} ms")
+    print(f"model loaded: {all(r['model_loaded'] for r in lazy)}")
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
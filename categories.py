@@ -0,0 +1,149 @@
+"""Map free-text expense categories onto one canonical category set.
+
+Users say "groceries", "grocery" and "food items" for the same thing; stored
+as-is they become separate expense keys and ledger codes. The text is
+tokenized once and the whole phrase (one word or a pair, raw or stemmed) is
+looked up in an index of aliases built at import, so canonicalizing is a few
+dict lookups rather than a scan of the text per keyword.
+
+Chat expenses keep one amount per category, so only true synonyms fold
+together: "lunch" and "dinner", or "pet food" and "food", are different
+expenses and keep the user's own words (minus filler such as "on", "my" and
+amounts). The merchant keywords used for bank statements are not aliases.
+
+Canonical categories have fixed integer codes (their position in
+``CATEGORY_NAMES``).
+"""
+import re
+
+# Keyword -> category for bank-statement descriptions; the first keyword
+# found in the description wins (see expense_import.categorize)
+CATEGORY_KEYWORDS = {
+    'rent': ['rent', 'landlord', 'house owner'],
+    'groceries': ['grocery', 'groceries', 'bigbasket', 'blinkit', 'dmart', 'supermarket', 'kirana', 'zepto'],
+    'food': ['swiggy', 'zomato', 'restaurant', 'cafe', 'dominos', 'pizza', 'dining'],
+    'transport': ['uber', 'ola', 'rapido', 'metro', 'petrol', 'fuel', 'irctc', 'fastag', 'parking'],
+    'utilities': ['electricity', 'bescom', 'water bill', 'gas bill', 'broadband', 'airtel', 'jio', 'vodafone', 'recharge'],
+    'shopping': ['amazon', 'flipkart', 'myntra', 'ajio', 'nykaa'],
+    'entertainment': ['netflix', 'hotstar', 'spotify', 'prime video', 'bookmyshow', 'movie'],
+    'health': ['pharmacy', 'apollo', 'hospital', 'clinic', 'medical', '1mg', 'pharmeasy'],
+    'insurance': ['insurance', 'lic', 'premium'],
+    'education': ['school', 'college', 'tuition', 'course', 'udemy'],
+    'loan emi': ['emi', 'loan'],
+}
+DEFAULT_CATEGORY = 'other'
+
+# Other names for a whole category in chat. Sub-items ("lunch", "bus",
+# "phone bill") are not listed: folding them would overwrite each other
+CATEGORY_ALIASES = {
+    'rent': ['rental', 'house rent', 'housing rent'],
+    'groceries': ['grocery', 'food items', 'provisions', 'ration'],
+    'food': ['food', 'eating out', 'dining', 'dining out', 'takeaway', 'meals'],
+    'transport': ['transport', 'transportation', 'commute', 'commuting'],
+    'utilities': ['utility', 'utilities', 'utility bills'],
+    'shopping': ['shopping'],
+    'entertainment': ['entertainment'],
+    'health': ['health', 'healthcare', 'medical', 'medical expenses'],
+    'insurance': ['insurance', 'insurance premium'],
+    'education': ['education', 'education fees'],
+    'loan emi': ['emi', 'emis', 'loan emi', 'loan emis', 'loan', 'loans', 'loan repayment'],
+}
+
+CATEGORY_NAMES = list(CATEGORY_KEYWORDS) + [DEFAULT_CATEGORY]
+CATEGORY_CODES = {name: code for code, name in enumerate(CATEGORY_NAMES)}
+
+# Dropped wherever they appear as whole words
+FILLER_WORDS = frozenset([
+    'spend', 'spent', 'spending', 'pay', 'paid', 'paying', 'cost', 'costs', 'costing',
+    'rupees', 'rs', 'inr', 'on', 'for', 'in', 'my', 'i', 'around', 'about', 'the', 'a', 'an',
+    'monthly', 'month', 'every', 'each', 'per',
+])
+# The category phrase ends at the first of these ("rent and my income is...")
+BREAK_WORDS = frozenset(['and', 'but', 'so', 'or', 'while', 'because', 'which', 'that', 'with', 'plus'])
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+MAX_CUSTOM_WORDS = 3
+
+
+def stem(token):
+    """Crude plural folding, enough to map "groceries" and "grocery" together."""
+    if len(token) > 4 and token.endswith('ies'):
+        return token[:-3] + 'y'
+    if len(token) > 4 and token.endswith(('ches', 'shes', 'sses', 'xes')):
+        return token[:-2]
+    if len(token) > 3 and token.endswith('s') and not token.endswith(('ss', 'us', 'is')):
+        return token[:-1]
+    return token
+
+
+class CategoryIndex:
+    """Alias index: one-word or two-word phrase (raw and stemmed) -> category code."""
+
+    def __init__(self, names=CATEGORY_NAMES, alias_lists=(CATEGORY_ALIASES,), cache_size=4096):
+        self.names = list(names)
+        # The same few phrases come up again and again, so memoize them
+        self.cache = {}
+        self.cache_size = cache_size
+        self.codes = {name: code for code, name in enumerate(self.names)}
+        self.words = {}
+        self.pairs = {}
+        for name, code in self.codes.items():
+            self._add(name, code)
+        for aliases in alias_lists:
+            for name, words in aliases.items():
+                for alias in words:
+                    self._add(alias, self.codes[name])
+
+    def _add(self, alias, code):
+        tokens = TOKEN_PATTERN.findall(alias.lower())
+        if len(tokens) == 1:
+            self.words.setdefault(tokens[0], code)
+            self.words.setdefault(stem(tokens[0]), code)
+        elif len(tokens) == 2:
+            self.pairs.setdefault((tokens[0], tokens[1]), code)
+            self.pairs.setdefault((stem(tokens[0]), stem(tokens[1])), code)
+
+    def tokens(self, text):
+        """The words of the category phrase: filler dropped, cut at a break word."""
+        tokens = []
+        for token in TOKEN_PATTERN.findall(text.lower()):
+            if token in BREAK_WORDS:
+                break
+            if token not in FILLER_WORDS and not token.isdigit():
+                tokens.append(token)
+        return tokens
+
+    def code(self, text):
+        """Return the canonical category code for ``text``, or None."""
+        return self._lookup(self.tokens(text))
+
+    def canonicalize(self, text):
+        """Return the canonical category name, the user's own words, or None."""
+        if text in self.cache:
+            return self.cache[text]
+        tokens = self.tokens(text)
+        code = self._lookup(tokens)
+        if code is not None:
+            category = self.names[code]
+        else:
+            words = [token for token in tokens if len(token) > 1][:MAX_CUSTOM_WORDS]
+            category = ' '.join(words) if words else None
+        if len(self.cache) >= self.cache_size:
+            self.cache.clear()
+        self.cache[text] = category
+        return category
+
+    def _lookup(self, tokens):
+        # Only the whole phrase counts: "pet food" is not "food"
+        if len(tokens) == 1:
+            token = tokens[0]
+            code = self.words.get(token)
+            return code if code is not None else self.words.get(stem(token))
+        if len(tokens) == 2:
+            first, second = tokens
+            code = self.pairs.get((first, second))
+            return code if code is not None else self.pairs.get((stem(first), stem(second)))
+        return None
+
+
+category_index = CategoryIndex()
+canonicalize = category_index.canonicalize
@@ -3,146 +3,362 @@ import re
 import random
 from datetime import datetime
 import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-import google.generativeai as genai
 
-# Load environment variables
+# Before the imports below: several of them read their settings (and .env
+# may set any of them) at import time
 load_dotenv()
 
+from admission import SHORT_MESSAGE_CHARS
+from advice_prefetch import SavingsAdvice, advice_prefetcher
+from categories import DEFAULT_CATEGORY, category_index
+from extraction import extract_number, extractor
+from financial_state import FinancialState
+from intent_router import ANALYSIS_KEYWORDS, router
+from ledger import ExpenseLedger
+from metrics import ERRORS, FALLBACKS, LLM_SECONDS, STAGE_SECONDS
+from model_loader import llm_model
+from prompt_builder import PromptBuilder, message_role, message_text
+from resilience import default_latency_budget, gemini_breaker
+from session_snapshot import SNAPSHOT_VERSION, validate_snapshot
+
+# Turns kept in memory per session; older ones live only in session storage
+HISTORY_LIMIT = 20
+# Ledgers start empty (sharing empty arrays) and grow on the first expense
+SESSION_LEDGER_CAPACITY = 0
+# Shared by every batch so concurrent batch requests cannot spawn unbounded threads
+batch_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('BATCH_WORKERS', '16')),
+    thread_name_prefix='batch'
+)
+
+# Templates shared by every session (sessions only hold their own data)
+CAPABILITIES = (
+    "Create and manage monthly budgets 💰",
+    "Track expenses by categories 📊",
+    "Set and monitor savings goals 🎯",
+    "Analyze spending patterns 📈",
+    "Provide investment advice 💡",
+    "Calculate expense ratios and financial metrics 📊",
+    "Suggest tax-saving strategies 💰",
+    "Help with debt management 📉"
+)
+CAPABILITIES_REPLY = (
+    "I'm your personal finance assistant! Here's what I can do for you:\n\n"
+    + "".join(f"• {capability}\n" for capability in CAPABILITIES)
+    + "\nReady to get started? Just tell me your name! 😊"
+)
+GREETING_WORDS = ('hi', 'hello', 'hey', 'hola', 'greetings')
+CAPABILITY_TRIGGERS = ('what can you do', 'your capabilities', 'help me', 'what do you do', 'how can you help')
+GREETING_REPLIES = (
+    "👋 Hi there! I'm your AI financial buddy. Want to know what I can do? Just ask 'what can you do?' Or we can start budgeting - what's your name?",
+    "Hello! I'm here to help with your finances. Ask me 'what can you do?' to learn more, or we can get started - what's your name?",
+    "Hey! 😊 I'm your personal finance assistant. Want to see my capabilities? Ask 'what can you do?' Or let's begin - what's your name?",
+    "Hi! Ready to manage your finances better? Ask me 'what can you do?' to learn more, or we can start right away - what's your name?"
+)
+WELCOME_GREETINGS = (
+    "Hey there! 👋 I'm your personal finance buddy. What's your name?",
+    "Hi! I'm excited to help you manage your finances better. What should I call you?",
+    "Welcome! I'm your AI financial assistant. Before we start, could you tell me your name?",
+    "Hello! Let's work on your budget together. First, what's your name?"
+)
+INCOME_QUESTIONS = (
+    "Thanks {name}! Let's start with your monthly income - how much do you earn?",
+    "Great to meet you, {name}! To help you better, could you tell me your monthly income?",
+    "Alright {name}! What's your monthly income? This will help me understand your financial situation.",
+    "Perfect, {name}! How much money do you make each month?"
+)
+EXPENSE_PROMPTS = (
+    "Now {name}, tell me about your expenses. You can add any category you want! For example, say something like 'I spend 5000 on groceries' or '3000 for gaming'.",
+    "Let's talk about where your money goes, {name}. Just tell me naturally about any expense category - could be anything from 'coffee' to 'pet care'!",
+    "What kind of things do you spend money on, {name}? You can tell me about any category - like '2000 on movies' or '6000 for hobbies'.",
+    "Time to track your spending, {name}! Share your expenses in any categories you like - maybe start with your biggest expense?"
+)
+EXPENSE_ACKNOWLEDGMENTS = (
+    "Got it! ₹{amount:,.2f} for {category}. What other expenses would you like to add?",
+    "Added ₹{amount:,.2f} for {category}. Tell me about another expense, or say 'done' when you're finished!",
+    "Noted ₹{amount:,.2f} for {category}. What else do you spend money on?",
+    "I've recorded ₹{amount:,.2f} for {category}. Keep going! Or say 'done' if that's all."
+)
+SAVINGS_QUESTIONS = (
+    "Great job listing your expenses, {name}! How much would you like to save each month?",
+    "Now let's set a savings target, {name}. How much would you like to set aside monthly?",
+    "Time to think about savings, {name}! What's your monthly savings goal?",
+    "Let's plan your savings, {name}. How much do you want to save each month?"
+)
+
+# Financial advice and reply templates for fallback mode
+ADVICE_TEMPLATES = (
+    "Based on your expenses, you might want to consider reducing your {category} spending by {percent}% to save more money.",
+    "I notice that you're spending {amount} on {category}. That's about {percent}% of your income. The recommended percentage is around {recommended}%.",
+    "Looking at your financial data, I suggest focusing on saving more in the {category} category. Try to aim for {goal} per month.",
+    "Your {category} expenses seem {status}. Most financial experts recommend keeping it under {recommended}% of your income.",
+    "To reach your savings goal of {savings_goal}, consider cutting back on {category} by about {amount} per month.",
+    "Great job on managing your {category}! You're spending less than the recommended amount.",
+    "To improve your financial health, try the 50/30/20 rule: 50% for needs, 30% for wants, and 20% for savings.",
+    "Looking at your spending, I recommend creating an emergency fund of at least 3-6 months of expenses.",
+    "Consider automating your savings by setting up automatic transfers to your savings account each month."
+)
+RESPONSE_TEMPLATES = {
+    "greeting": (
+        "👋 Hello {name}! How can I help with your finances today?",
+        "Hi there, {name}! Ready to talk about your budget and savings?",
+        "Hello {name}! I'm here to help you manage your money better. What can I do for you today?",
+        "Hey {name}! Your financial assistant is ready to help. What would you like to do today?"
+    ),
+    "income_added": (
+        "✅ Great! I've recorded your monthly income as ₹{income}.",
+        "Thanks! I've noted your income as ₹{income} per month."
+    ),
+    "expense_added": (
+        "📝 Got it! I've added ₹{amount} for {category} to your expenses.",
+        "Added: ₹{amount} for {category}. Your total expenses are now ₹{total_expenses}."
+    ),
+    "savings_goal_added": (
+        "🎯 Excellent! Your savings goal is set to ₹{goal} per month.",
+        "I've set your monthly savings goal to ₹{goal}. Let's work towards achieving it!"
+    ),
+    "budget_analysis": (
+        "📊 Based on your information:\n• Income: ₹{income}\n• Total Expenses: ₹{total_expenses}\n• Remaining: ₹{remaining}\n\n{advice}",
+        "💰 Here's your financial snapshot:\n• Monthly Income: ₹{income}\n• Total Expenses: ₹{total_expenses}\n• Available for Savings: ₹{remaining}\n\n{advice}"
+    ),
+    "general": (
+        "I'm here to help with your budget! You can tell me about your income, expenses, or savings goals.",
+        "Need help with something specific? You can ask me about budget analysis, expense tracking, or savings advice.",
+        "Feel free to share more details about your financial situation so I can provide better advice.",
+        "Is there anything specific about your finances you'd like to discuss today?"
+    )
+}
+
+
 class SmartBudgetAIChatbot:
-    def __init__(self):
-        # Configure Gemini API
-        api_key = os.getenv('GOOGLE_API_KEY')
-        if not api_key:
-            raise ValueError("Google API key not found in environment variables")
-            
-        print("Initializing SmartBudget AI with Gemini...")
-        genai.configure(api_key=api_key)
-        
-        # Initialize Gemini model
-        try:
-            self.model = genai.GenerativeModel('gemini-1.5-pro')
+    # One object per user, so no per-instance __dict__; the templates are
+    # class-level references to the shared tables above
+    __slots__ = (
+        'model', 'chat', 'model_source', 'breaker', 'latency_budget', 'prompt_builder',
+        'response_cache', 'cache_opt_out', 'finances', 'ledger', 'conversation_history',
+        'user_name', 'version', 'last_greeting_time', 'admission', 'rate_bucket', 'prefetcher', 'savings_advice',
+        'turn_lock', '_pending_history', '_saved_ledger_rows', '_unsaved_turns',
+    )
+    capabilities = CAPABILITIES
+    advice_templates = ADVICE_TEMPLATES
+    response_templates = RESPONSE_TEMPLATES
+
+    def __init__(self, model=None, response_cache=None, breaker=None, latency_budget=None, model_source=None,
+                 admission=None, prefetcher=None):
+        # Gemini history restored from a snapshot before the chat exists
+        self._pending_history = []
+        if model is not None:
+            # A ready-made model (shared across sessions, or a local stand-in)
+            self.model = model
             self.chat = self.model.start_chat(history=[])
-            print("Gemini model initialized successfully")
-        except Exception as e:
-            print(f"Error initializing Gemini API: {str(e)}")
-            print("Falling back to local implementation")
+            self.model_source = None
+        else:
+            # Gemini is built lazily and shared; local intents never wait for it
             self.model = None
             self.chat = None
+            self.model_source = model_source or llm_model
+            self.model_source.warm_up()
+        # Shared breaker: once Gemini keeps failing every session falls back
+        self.breaker = breaker or gemini_breaker
+        self.latency_budget = latency_budget or default_latency_budget
+        # Shared rate limits and call slots; this session's bucket is made on first use
+        self.admission = admission
+        self.rate_bucket = None
+        # Shared pool for savings advice; this session's lookups start once it has a goal
+        self.prefetcher = prefetcher or advice_prefetcher
+        self.savings_advice = None
         
-        self.user_data = {}
-        self.expenses = {}
+        self.prompt_builder = PromptBuilder()
+        # Shared across sessions; set cache_opt_out to keep a user's replies private
+        self.response_cache = response_cache
+        self.cache_opt_out = False
+        # user_data / expenses, with running totals and a cached context text
+        self.finances = FinancialState()
+        # Every expense entry, kept as history; expenses holds the latest per category
+        self.ledger = ExpenseLedger(capacity=SESSION_LEDGER_CAPACITY)
         self.conversation_history = []
         self.user_name = None
-        self.capabilities = [
-            "Create and manage monthly budgets 💰",
-            "Track expenses by categories 📊",
-            "Set and monitor savings goals 🎯",
-            "Analyze spending patterns 📈",
-            "Provide investment advice 💡",
-            "Calculate expense ratios and financial metrics 📊",
-            "Suggest tax-saving strategies 💰",
-            "Help with debt management 📉"
-        ]
+        # What has not been handed to session storage yet (see checkpoint)
+        self.version = 0
+        self._saved_ledger_rows = 0
+        self._unsaved_turns = []
         self.last_greeting_time = None
-        
-        # Financial advice templates - kept for fallback mode
-        self.advice_templates = [
-            "Based on your expenses, you might want to consider reducing your {category} spending by {percent}% to save more money.",
-            "I notice that you're spending {amount} on {category}. That's about {percent}% of your income. The recommended percentage is around {recommended}%.",
-            "Looking at your financial data, I suggest focusing on saving more in the {category} category. Try to aim for {goal} per month.",
-            "Your {category} expenses seem {status}. Most financial experts recommend keeping it under {recommended}% of your income.",
-            "To reach your savings goal of {savings_goal}, consider cutting back on {category} by about {amount} per month.",
-            "Great job on managing your {category}! You're spending less than the recommended amount.",
-            "To improve your financial health, try the 50/30/20 rule: 50% for needs, 30% for wants, and 20% for savings.",
-            "Looking at your spending, I recommend creating an emergency fund of at least 3-6 months of expenses.",
-            "Consider automating your savings by setting up automatic transfers to your savings account each month."
-        ]
-        
-        # Response templates - kept for fallback mode
-        self.response_templates = {
-            "greeting": [
-                "👋 Hello {name}! How can I help with your finances today?",
-                "Hi there, {name}! Ready to talk about your budget and savings?",
-                "Hello {name}! I'm here to help you manage your money better. What can I do for you today?",
-                "Hey {name}! Your financial assistant is ready to help. What would you like to do today?"
-            ],
-            "income_added": [
-                "✅ Great! I've recorded your monthly income as ₹{income}.",
-                "Thanks! I've noted your income as ₹{income} per month."
-            ],
-            "expense_added": [
-                "📝 Got it! I've added ₹{amount} for {category} to your expenses.",
-                "Added: ₹{amount} for {category}. Your total expenses are now ₹{total_expenses}."
-            ],
-            "savings_goal_added": [
-                "🎯 Excellent! Your savings goal is set to ₹{goal} per month.",
-                "I've set your monthly savings goal to ₹{goal}. Let's work towards achieving it!"
-            ],
-            "budget_analysis": [
-                "📊 Based on your information:\n• Income: ₹{income}\n• Total Expenses: ₹{total_expenses}\n• Remaining: ₹{remaining}\n\n{advice}",
-                "💰 Here's your financial snapshot:\n• Monthly Income: ₹{income}\n• Total Expenses: ₹{total_expenses}\n• Available for Savings: ₹{remaining}\n\n{advice}"
-            ],
-            "general": [
-                "I'm here to help with your budget! You can tell me about your income, expenses, or savings goals.",
-                "Need help with something specific? You can ask me about budget analysis, expense tracking, or savings advice.",
-                "Feel free to share more details about your financial situation so I can provide better advice.",
-                "Is there anything specific about your finances you'd like to discuss today?"
-            ]
-        }
+        # Held by whichever request is working on this session, so concurrent
+        # requests for the same session take turns
+        self.turn_lock = threading.Lock()
+
+    def ensure_chat(self):
+        # Attach to the shared model once it has loaded, waiting at most one
+        # call timeout for a warm-up that is still in progress
+        if self.chat is None and self.model_source is not None:
+            model = self.model_source.get(timeout=self.latency_budget.timeout)
+            if model is not None:
+                self.model = model
+                self.chat = model.start_chat(history=self._pending_history)
+                self._pending_history = []
+        return self.chat
+
+    def build_prompt(self, user_input):
+        # The persona is the model's system instruction and recent turns live in
+        # the chat session, so the message only adds context and the summary
+        return self.prompt_builder.build(user_input, self.format_financial_context(), self.chat)
+
+    def cache_key(self, user_input):
+        if self.response_cache is None or self.cache_opt_out:
+            return None
+        return self.response_cache.make_key(user_input, self.user_data, self.expenses)
+
+    def get_cached_response(self, key, user_input):
+        if key is None:
+            return None
+        cached = self.response_cache.get(key)
+        if cached is not None:
+            # Keep the turn in the session so follow-up questions have context
+            self.prompt_builder.append_turn(self.chat, user_input, cached)
+        return cached
+
+    def cache_response(self, key, reply):
+        # Replies that address the user by name stay out of the shared cache
+        if key is None or (self.user_name and self.user_name.lower() in reply.lower()):
+            return
+        self.response_cache.put(key, reply)
 
     def get_ai_response(self, user_input):
-        if self.model and self.chat:
+        if self.ensure_chat():
+            key = self.cache_key(user_input)
+            cached = self.get_cached_response(key, user_input)
+            if cached is not None:
+                return cached
+            started_at = time.monotonic()
+            refused = self.admit_model_call(user_input, started_at)
+            if refused is not None:
+                return self.fallback_response(user_input, refused)
             try:
-                # Add financial context to the prompt
-                context = self.format_conversation_history()
-                financial_context = self.format_financial_context()
-                
-                prompt = f"""
-                You are a friendly and casual financial chatbot named Fin. Act like a helpful friend who's good with money, not a formal advisor. Keep these points in mind:
-
-                Your Personality:
-                - Super friendly and casual - use "hey", "cool", etc.
-                - Chat like a friend texting
-                - Keep responses short and sweet (2-3 sentences max per point)
-                - Use everyday language, avoid financial jargon
-                - Be encouraging and positive
-                - Use emojis naturally (1-2 per message)
-                - Share quick, practical money tips
-                
-                When giving financial advice:
-                - Break it down simply
-                - Use real-life examples
-                - Give one main tip at a time
-                - Keep numbers simple (round figures)
-                - Use ₹ for money values
-                - Be encouraging, not judgmental
-
-                Financial Context:
-                {financial_context}
-
-                Previous Conversation:
-                {context}
-
-                User's message: {user_input}
-
-                Remember:
-                - Chat casually like a friend
-                - Keep it short and simple
-                - Be positive and encouraging
-                - Use natural, conversational language
-                - If topic isn't about money, gently bring it back to finances in a friendly way
-                - Never sound like a formal advisor or AI
-                """
-                
-                response = self.chat.send_message(prompt)
-                return response.text
-            except Exception as e:
-                print(f"Error getting Gemini response: {str(e)}")
-                return self.generate_contextual_response(user_input)
+                if not self.breaker.allow_request():
+                    return self.fallback_response(user_input, "breaker_open")
+                llm_started_at = None
+                try:
+                    with STAGE_SECONDS.time("prompt"):
+                        prompt = self.build_prompt(user_input)
+                    llm_started_at = time.monotonic()
+                    response = self.chat.send_message(prompt, request_options=self.latency_budget.request_options(started_at))
+                    LLM_SECONDS.observe(time.monotonic() - llm_started_at, "unary", "ok")
+                    self.prompt_builder.record_turn(self.chat, user_input, response)
+                    self.cache_response(key, response.text)
+                    self.record_model_outcome(started_at)
+                    return response.text
+                except Exception as e:
+                    print(f"Error getting Gemini response: {str(e)}")
+                    if llm_started_at is not None:
+                        LLM_SECONDS.observe(time.monotonic() - llm_started_at, "unary", "error")
+                    ERRORS.inc("llm")
+                    self.breaker.record_failure()
+                    return self.fallback_response(user_input, "llm_error")
+            finally:
+                self.release_model_call()
         else:
+            return self.fallback_response(user_input, "no_model")
+
+    def stream_ai_response(self, user_input):
+        # Yields the reply in pieces as Gemini generates them. If the model is
+        # unavailable or fails before sending anything, the local fallback is
+        # sent as a single final chunk instead.
+        sent_any = False
+        reason = "no_model"
+        if self.ensure_chat():
+            key = self.cache_key(user_input)
+            cached = self.get_cached_response(key, user_input)
+            if cached is not None:
+                yield cached
+                return
+            started_at = time.monotonic()
+            refused = self.admit_model_call(user_input, started_at)
+            if refused is not None:
+                yield self.fallback_response(user_input, refused)
+                return
+            try:
+                if self.breaker.allow_request():
+                    sent_any, failure = yield from self.stream_model_reply(user_input, key, started_at)
+                    reason = failure or reason
+                else:
+                    reason = "breaker_open"
+            finally:
+                # Also runs when the client disconnects mid-stream
+                self.release_model_call()
+        if not sent_any:
+            yield self.fallback_response(user_input, reason)
+
+    def stream_model_reply(self, user_input, key, started_at):
+        # Yields the model's chunks; returns (sent_any, failure reason or None)
+        sent_any = False
+        llm_started_at = None
+        recorded = False
+        try:
+            with STAGE_SECONDS.time("prompt"):
+                prompt = self.build_prompt(user_input)
+            parts = []
+            options = self.latency_budget.request_options(started_at)
+            llm_started_at = time.monotonic()
+            for chunk in self.chat.send_message(prompt, stream=True, request_options=options):
+                text = chunk.text
+                if text:
+                    sent_any = True
+                    parts.append(text)
+                    yield text
+            LLM_SECONDS.observe(time.monotonic() - llm_started_at, "stream", "ok")
+            self.prompt_builder.record_turn(self.chat, user_input)
+            self.cache_response(key, "".join(parts))
+            recorded = True
+            self.record_model_outcome(started_at)
+            return sent_any, None
+        except Exception as e:
+            print(f"Error streaming Gemini response: {str(e)}")
+            if llm_started_at is not None:
+                LLM_SECONDS.observe(time.monotonic() - llm_started_at, "stream", "error")
+            ERRORS.inc("llm")
+            recorded = True
+            self.breaker.record_failure()
+            return sent_any, "llm_error"
+        finally:
+            if not recorded:
+                # The client closed the stream: no verdict on the model, but a
+                # half-open probe must not stay in flight forever
+                self.breaker.release_probe()
+
+    def admit_model_call(self, user_input, started_at):
+        """Return None if this call may use the model, else why it may not.
+
+        Short messages queue ahead of long ones. Time spent queueing comes
+        out of the turn's latency budget.
+        """
+        if self.admission is None:
+            return None
+        if self.rate_bucket is None:
+            self.rate_bucket = self.admission.session_bucket()
+        priority = 0 if len(user_input) <= SHORT_MESSAGE_CHARS else 1
+        return self.admission.admit(self.rate_bucket, priority, timeout=self.latency_budget.remaining(started_at))
+
+    def release_model_call(self):
+        if self.admission is not None:
+            self.admission.release()
+
+    def fallback_response(self, user_input, reason):
+        FALLBACKS.inc(reason)
+        with STAGE_SECONDS.time("fallback"):
             return self.generate_contextual_response(user_input)
 
+    def record_model_outcome(self, started_at):
+        # A reply that blew the latency budget still counts against Gemini
+        if self.latency_budget.exceeded(started_at):
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
     def format_conversation_history(self):
         if not self.conversation_history:
             return "This is the start of the conversation."
@@ -152,49 +368,39 @@ class SmartBudgetAIChatbot:
             formatted_history.append(f"{entry['role']}: {entry['content']}")
         return "\n".join(formatted_history)
 
+    @property
+    def user_data(self):
+        return self.finances.user_data
+
+    @user_data.setter
+    def user_data(self, data):
+        self.finances.replace_profile(data)
+
+    @property
+    def expenses(self):
+        return self.finances.expenses
+
+    @expenses.setter
+    def expenses(self, data):
+        self.finances.replace_expenses(data)
+
     def format_financial_context(self):
-        if not self.user_data and not self.expenses:
-            return "No financial data available yet."
-        
-        context = []
-        if self.user_data:
-            context.append("User Financial Profile:")
-            for key, value in self.user_data.items():
-                if key == 'income':
-                    context.append(f"- Monthly Income: ₹{value:,.2f}")
-                elif key == 'savings_goal':
-                    context.append(f"- Savings Goal: ₹{value:,.2f}")
-                else:
-                    context.append(f"- {key.title()}: {value}")
-        
-        if self.expenses:
-            context.append("\nExpense Categories:")
-            for category, amount in self.expenses.items():
-                context.append(f"- {category}: ₹{amount:,.2f}")
-        
-        return "\n".join(context)
+        return self.finances.context()
 
     def generate_contextual_response(self, user_input):
         # This is the fallback local implementation
         # Check if we need to respond about specific financial topics
         
-        # If user mentioned savings goal in this message
-        savings_patterns = [
-            r'(?i)(?:save|saving|savings|goal)\s+(?:rs\.?|₹)?\s*(\d+(?:,\d+)*(?:\.\d+)?)',
-            r'(?i)(?:want to|wanna|going to|plan to)\s+save\s+(?:rs\.?|₹)?\s*(\d+(?:,\d+)*(?:\.\d+)?)'
-        ]
+        found = extractor.extract(user_input)
         
-        for pattern in savings_patterns:
-            savings_match = re.search(pattern, user_input)
-            if savings_match:
-                try:
-                    goal = float(savings_match.group(1).replace(",", ""))
-                    self.user_data["savings_goal"] = goal
-                    
-                    template = random.choice(self.response_templates["savings_goal_added"])
-                    return template.format(goal=f"{goal:,.0f}")
-                except (ValueError, IndexError):
-                    pass
+        # If user mentioned savings goal in this message
+        if found.savings_goal is not None:
+            goal = found.savings_goal
+            self.user_data["savings_goal"] = goal
+            self.prefetch_advice()
+            
+            template = random.choice(self.response_templates["savings_goal_added"])
+            return template.format(goal=f"{goal:,.0f}")
         
         # If user added income recently
         if "income" in self.user_data and len(self.conversation_history) < 3:
@@ -202,51 +408,17 @@ class SmartBudgetAIChatbot:
             return template.format(income=f"{self.user_data['income']:,.0f}")
         
         # If user added expense
-        expense_pattern = r'(?i)(?:spend|spent|spending|pay|paying|paid|expense|expenses|cost|costs)\s+(?:rs\.?|₹)?\s*(\d+(?:,\d+)*(?:\.\d+)?)\s+(?:on|for|in)\s+([a-zA-Z\s]+)'
-        expense_match = re.search(expense_pattern, user_input)
-        if expense_match:
-            amount = float(expense_match.group(1).replace(",", ""))
-            category = expense_match.group(2).strip().lower()
-            total_expenses = sum(self.expenses.values()) if self.expenses else 0
+        if found.expenses:
+            category, amount = found.expenses[0]
+            category = self.canonical_category(category)
+            total_expenses = self.finances.total_expenses
             
             template = random.choice(self.response_templates["expense_added"])
             return template.format(amount=f"{amount:,.0f}", category=category, total_expenses=f"{total_expenses:,.0f}")
         
         # If user asks for budget analysis
-        analysis_keywords = ["analyze", "analysis", "how am i doing", "budget", "review", "overview", "summary", "status"]
-        if any(keyword in user_input.lower() for keyword in analysis_keywords) and "income" in self.user_data:
-            income = self.user_data["income"]
-            total_expenses = sum(self.expenses.values()) if self.expenses else 0
-            remaining = income - total_expenses
-            
-            # Generate advice
-            if self.expenses:
-                try:
-                    highest_category = max(self.expenses.items(), key=lambda x: x[1])
-                    highest_percent = (highest_category[1] / income) * 100
-                    
-                    advice_template = random.choice(self.advice_templates)
-                    advice = advice_template.format(
-                        category=highest_category[0],
-                        amount=f"{highest_category[1]:,.0f}",
-                        percent=f"{highest_percent:.1f}",
-                        recommended="15-20",
-                        status="high" if highest_percent > 30 else "reasonable",
-                        goal=f"{income * 0.2:,.0f}",
-                        savings_goal=f"{self.user_data.get('savings_goal', income * 0.2):,.0f}"
-                    )
-                except (ValueError, TypeError) as e:
-                    advice = "Consider tracking your expenses by category to get more specific advice."
-            else:
-                advice = "Consider tracking your expenses by category to get more specific advice."
-            
-            template = random.choice(self.response_templates["budget_analysis"])
-            return template.format(
-                income=f"{income:,.0f}",
-                total_expenses=f"{total_expenses:,.0f}",
-                remaining=f"{remaining:,.0f}",
-                advice=advice
-            )
+        if any(keyword in user_input.lower() for keyword in ANALYSIS_KEYWORDS) and "income" in self.user_data:
+            return self.get_budget_analysis()
         
         # Default to general advice
         if self.user_name:
@@ -256,160 +428,352 @@ class SmartBudgetAIChatbot:
         else:
             return random.choice(self.response_templates["general"])
             
-    def extract_financial_info(self, text):
-        # Extract income
-        income_pattern = r'(?i)(?:income|earn|salary|make|making)(?:\s+is|\s+of)?\s+(?:rs\.?|₹)?\s*(\d+(?:,\d+)*(?:\.\d+)?)'
-        income_match = re.search(income_pattern, text)
-        if income_match:
-            try:
-                income_value = income_match.group(1).replace(",", "")
-                self.user_data["income"] = float(income_value)
-            except ValueError:
-                pass
-
-        # Extract expenses
-        expense_pattern = r'(?i)(?:spend|spent|spending|pay|paying|paid|expense|expenses|cost|costs)\s+(?:rs\.?|₹)?\s*(\d+(?:,\d+)*(?:\.\d+)?)\s+(?:on|for|in)\s+([a-zA-Z\s]+)'
-        expense_matches = re.finditer(expense_pattern, text)
-        for match in expense_matches:
-            try:
-                amount = float(match.group(1).replace(",", ""))
-                category = match.group(2).strip().lower()
-                self.expenses[category] = amount
-            except ValueError:
-                pass
-
-        # Extract savings goal
-        savings_patterns = [
-            r'(?i)(?:save|saving|savings|goal)\s+(?:rs\.?|₹)?\s*(\d+(?:,\d+)*(?:\.\d+)?)',
-            r'(?i)(?:want to|wanna|going to|plan to)\s+save\s+(?:rs\.?|₹)?\s*(\d+(?:,\d+)*(?:\.\d+)?)'
-        ]
+    def get_budget_analysis(self):
+        income = self.user_data["income"]
+        total_expenses = self.finances.total_expenses
+        remaining = income - total_expenses
         
-        for pattern in savings_patterns:
-            savings_match = re.search(pattern, text)
-            if savings_match:
-                try:
-                    savings_value = savings_match.group(1).replace(",", "")
-                    self.user_data["savings_goal"] = float(savings_value)
-                    break  # Stop after first match
-                except ValueError:
-                    pass
+        # Generate advice; the share-of-income advice needs an income to divide by
+        if self.expenses and income > 0:
+            try:
+                highest_category = self.finances.largest_expense()
+                highest_percent = (highest_category[1] / income) * 100
                 
+                advice_template = random.choice(self.advice_templates)
+                advice = advice_template.format(
+                    category=highest_category[0],
+                    amount=f"{highest_category[1]:,.0f}",
+                    percent=f"{highest_percent:.1f}",
+                    recommended="15-20",
+                    status="high" if highest_percent > 30 else "reasonable",
+                    goal=f"{income * 0.2:,.0f}",
+                    savings_goal=f"{self.user_data.get('savings_goal', income * 0.2):,.0f}"
+                )
+            except (ValueError, TypeError) as e:
+                advice = "Consider tracking your expenses by category to get more specific advice."
+        else:
+            advice = "Consider tracking your expenses by category to get more specific advice."
+        
+        template = random.choice(self.response_templates["budget_analysis"])
+        return template.format(
+            income=f"{income:,.0f}",
+            total_expenses=f"{total_expenses:,.0f}",
+            remaining=f"{remaining:,.0f}",
+            advice=advice
+        )
+
+    def extract_financial_info(self, text):
+        # Income, expenses, savings goal and name come out of one pass
+        found = extractor.extract(text)
+        if found.income is not None:
+            self.user_data["income"] = found.income
+        for category, amount in found.expenses:
+            category = self.canonical_category(category)
+            self.expenses[category] = amount
+            self.ledger.append(amount, category)
+        if found.savings_goal is not None:
+            self.user_data["savings_goal"] = found.savings_goal
+        if found.income is not None or found.savings_goal is not None:
+            # Expenses alone never start lookups (see prefetch_advice)
+            self.prefetch_advice()
+        
         # Extract user name if not already set
-        if not self.user_name:
-            name_patterns = [
-                r'(?i)(?:my name is|I am|I\'m) ([A-Za-z]+)',
-                r'(?i)(?:call me) ([A-Za-z]+)',
-                r'(?i)^(?:I\'m|I am) ([A-Za-z]+)'
-            ]
-            
-            for pattern in name_patterns:
-                name_match = re.search(pattern, text)
-                if name_match:
-                    self.user_name = name_match.group(1).capitalize()
-                    break
+        if not self.user_name and found.name:
+            self.user_name = found.name
+
+    def prefetch_advice(self, refresh=False):
+        # Start the savings advice lookups when the goal is set or changes;
+        # refresh also redoes one whose remaining balance has since moved
+        if self.prefetcher is None:
+            return
+        goal = self.user_data.get("savings_goal")
+        if self.savings_advice is None:
+            if goal is None:
+                return
+            self.savings_advice = SavingsAdvice(self.prefetcher)
+        self.savings_advice.update(self.user_data.get("income"), self.finances.total_expenses, goal, refresh)
+
+    def get_savings_advice(self):
+        # From the prefetched lookups; None sends the question to the model
+        self.prefetch_advice(refresh=True)
+        if self.savings_advice is None:
+            return None
+        return self.savings_advice.answer()
 
     def handle_greeting(self, user_input):
-        greetings = ['hi', 'hello', 'hey', 'hola', 'greetings']
         current_time = datetime.now()
-        if any(greeting in user_input.lower() for greeting in greetings):
+        lowered = user_input.lower()
+        if any(greeting in lowered for greeting in GREETING_WORDS):
             if self.last_greeting_time is None or (current_time - self.last_greeting_time).seconds > 300:
                 self.last_greeting_time = current_time
-                responses = [
-                    "👋 Hi there! I'm your AI financial buddy. Want to know what I can do? Just ask 'what can you do?' Or we can start budgeting - what's your name?",
-                    "Hello! I'm here to help with your finances. Ask me 'what can you do?' to learn more, or we can get started - what's your name?",
-                    "Hey! 😊 I'm your personal finance assistant. Want to see my capabilities? Ask 'what can you do?' Or let's begin - what's your name?",
-                    "Hi! Ready to manage your finances better? Ask me 'what can you do?' to learn more, or we can start right away - what's your name?"
-                ]
-                return random.choice(responses)
+                return random.choice(GREETING_REPLIES)
             return "I'm here to help! Just let me know what you need."
         return None
 
     def handle_capabilities(self, user_input):
-        capability_triggers = ['what can you do', 'your capabilities', 'help me', 'what do you do', 'how can you help']
-        if any(trigger in user_input.lower() for trigger in capability_triggers):
-            response = "I'm your personal finance assistant! Here's what I can do for you:\n\n"
-            for capability in self.capabilities:
-                response += f"• {capability}\n"
-            response += "\nReady to get started? Just tell me your name! 😊"
-            return response
+        lowered = user_input.lower()
+        if any(trigger in lowered for trigger in CAPABILITY_TRIGGERS):
+            return CAPABILITIES_REPLY
         return None
 
     def get_greeting(self):
-        greetings = [
-            "Hey there! 👋 I'm your personal finance buddy. What's your name?",
-            "Hi! I'm excited to help you manage your finances better. What should I call you?",
-            "Welcome! I'm your AI financial assistant. Before we start, could you tell me your name?",
-            "Hello! Let's work on your budget together. First, what's your name?"
-        ]
-        return random.choice(greetings)
+        return random.choice(WELCOME_GREETINGS)
 
     def get_income_question(self):
-        questions = [
-            f"Thanks {self.user_name}! Let's start with your monthly income - how much do you earn?",
-            f"Great to meet you, {self.user_name}! To help you better, could you tell me your monthly income?",
-            f"Alright {self.user_name}! What's your monthly income? This will help me understand your financial situation.",
-            f"Perfect, {self.user_name}! How much money do you make each month?"
-        ]
-        return random.choice(questions)
+        return random.choice(INCOME_QUESTIONS).format(name=self.user_name)
 
     def get_expense_prompt(self):
-        prompts = [
-            f"Now {self.user_name}, tell me about your expenses. You can add any category you want! For example, say something like 'I spend 5000 on groceries' or '3000 for gaming'.",
-            f"Let's talk about where your money goes, {self.user_name}. Just tell me naturally about any expense category - could be anything from 'coffee' to 'pet care'!",
-            f"What kind of things do you spend money on, {self.user_name}? You can tell me about any category - like '2000 on movies' or '6000 for hobbies'.",
-            f"Time to track your spending, {self.user_name}! Share your expenses in any categories you like - maybe start with your biggest expense?"
-        ]
-        return random.choice(prompts)
+        return random.choice(EXPENSE_PROMPTS).format(name=self.user_name)
 
     def get_expense_acknowledgment(self, category, amount):
-        acks = [
-            f"Got it! ₹{amount:,.2f} for {category}. What other expenses would you like to add?",
-            f"Added ₹{amount:,.2f} for {category}. Tell me about another expense, or say 'done' when you're finished!",
-            f"Noted ₹{amount:,.2f} for {category}. What else do you spend money on?",
-            f"I've recorded ₹{amount:,.2f} for {category}. Keep going! Or say 'done' if that's all."
-        ]
-        return random.choice(acks)
+        return random.choice(EXPENSE_ACKNOWLEDGMENTS).format(amount=amount, category=category)
 
     def get_savings_question(self):
-        questions = [
-            f"Great job listing your expenses, {self.user_name}! How much would you like to save each month?",
-            f"Now let's set a savings target, {self.user_name}. How much would you like to set aside monthly?",
-            f"Time to think about savings, {self.user_name}! What's your monthly savings goal?",
-            f"Let's plan your savings, {self.user_name}. How much do you want to save each month?"
-        ]
-        return random.choice(questions)
+        return random.choice(SAVINGS_QUESTIONS).format(name=self.user_name)
 
     def extract_number(self, text):
-        numbers = re.findall(r'\d+(?:,\d+)*(?:\.\d+)?', text)
-        if numbers:
-            return float(numbers[0].replace(',', ''))
-        return None
+        return extract_number(text)
 
     def extract_category(self, text):
-        # Remove common expense-related words and amounts
-        text = re.sub(r'\d+(?:,\d+)*(?:\.\d+)?', '', text)
-        text = text.lower()
-        words_to_remove = ['spend', 'spent', 'spending', 'pay', 'paid', 'paying', 'cost', 'costs', 'costing',
-                          'rupees', 'rs', 'inr', '₹', 'on', 'for', 'in', 'my', 'i', 'around', 'about']
-        
-        for word in words_to_remove:
-            text = text.replace(word, '')
+        return category_index.canonicalize(text)
+
+    def canonical_category(self, text):
+        # "groceries", "grocery" and "food items" all land on one expense key
+        return category_index.canonicalize(text) or DEFAULT_CATEGORY
+
+    def answer_locally(self, user_input):
+        # Deterministic intents are answered here without a model round trip;
+        # returns None when the message should go to the LLM
+        with STAGE_SECONDS.time("route"):
+            route = router.match(user_input)
+        response = None
+        if route is not None:
+            if route.intent in ('expense', 'savings', 'income'):
+                self.extract_financial_info(user_input)
+                # A question alongside the numbers still deserves a real answer
+                if '?' not in user_input:
+                    response = self.acknowledge_entry(route)
+            elif route.intent == 'capabilities':
+                response = self.handle_capabilities(user_input)
+            elif route.intent == 'savings_advice':
+                response = self.get_savings_advice()
+            elif route.intent == 'analysis' and "income" in self.user_data:
+                response = self.get_budget_analysis()
+            elif route.intent == 'greeting':
+                response = self.handle_greeting(user_input)
         
-        # Clean up the remaining text
-        category = text.strip()
-        if category:
-            # Take the last meaningful word/phrase as the category
-            category_parts = [part for part in category.split() if len(part) > 1]
-            if category_parts:
-                return ' '.join(category_parts)
-        return None
+        router.record(route.intent if response is not None else None)
+        if response is not None:
+            # Keep the model's view of the conversation complete, including
+            # turns answered while a lazily loaded model is still warming up
+            if self.chat is not None:
+                self.prompt_builder.append_turn(self.chat, user_input, response)
+            else:
+                self._pending_history = self.prompt_builder.with_turn(self._pending_history, user_input, response)
+        return response
 
-    def process_input(self, user_input):
-        # Extract name if not set
+    def acknowledge_entry(self, route):
+        if route.intent == 'expense':
+            amount = float(route.group('expense_amount').replace(",", ""))
+            category = self.canonical_category(route.group('expense_category'))
+            total_expenses = self.finances.total_expenses
+            template = random.choice(self.response_templates["expense_added"])
+            return template.format(amount=f"{amount:,.0f}", category=category, total_expenses=f"{total_expenses:,.0f}")
+        if route.intent == 'savings':
+            template = random.choice(self.response_templates["savings_goal_added"])
+            return template.format(goal=f"{self.user_data['savings_goal']:,.0f}")
+        template = random.choice(self.response_templates["income_added"])
+        return template.format(income=f"{self.user_data['income']:,.0f}")
+
+    def extract_name(self, user_input):
         if not self.user_name:
             name_match = re.search(r'my name is (\w+)', user_input.lower())
             if name_match:
                 self.user_name = name_match.group(1).title()
 
-        # Get AI response
-        return self.get_ai_response(user_input)
+    def process_input(self, user_input):
+        # Extract name if not set
+        self.extract_name(user_input)
+
+        response = self.answer_locally(user_input)
+        if response is None:
+            # Get AI response
+            response = self.get_ai_response(user_input)
+        self.remember_turn(user_input, response)
+        return response
+
+    def stream_input(self, user_input):
+        # Streaming counterpart of process_input
+        self.extract_name(user_input)
+
+        local_response = self.answer_locally(user_input)
+        if local_response is not None:
+            self.remember_turn(user_input, local_response)
+            yield local_response
+            return
+        parts = []
+        for chunk in self.stream_ai_response(user_input):
+            parts.append(chunk)
+            yield chunk
+        self.remember_turn(user_input, "".join(parts))
+
+    def process_messages(self, messages):
+        """Answer several messages for this session, in order."""
+        return [self.process_input(message) for message in messages]
+
+    @classmethod
+    def process_batch(cls, items, get_session=None, max_workers=8, on_session_done=None):
+        """Process ``{'session': id, 'input': text}`` items and yield results as they finish.
+
+        Items for different sessions run concurrently on up to
+        ``max_workers`` threads of the shared batch pool (``BATCH_WORKERS``
+        threads for the whole process). Each session's items run in their
+        original order on one thread while holding its ``turn_lock``. A
+        consumer that stops early only stops the sessions that have not
+        started; those already running finish their items. Every result is
+        a dict with the item's ``index``, ``session`` and either
+        ``response`` or ``error``.
+        ``get_session(id)`` returns the chatbot for a session (new chatbots by
+        default), and ``on_session_done(id, chatbot)`` runs after a session's
+        last item, e.g. to save it.
+        """
+        if get_session is None:
+            chatbots = {}
+            lock = threading.Lock()
+
+            def get_session(session_id):
+                with lock:
+                    if session_id not in chatbots:
+                        chatbots[session_id] = cls()
+                    return chatbots[session_id]
+
+        groups = {}
+        for index, item in enumerate(items):
+            groups.setdefault(item["session"], []).append((index, item["input"]))
+        results = queue.Queue()
+
+        def run_session(session_id, session_items):
+            try:
+                chatbot = get_session(session_id)
+            except Exception as e:
+                for index, _ in session_items:
+                    results.put({"index": index, "session": session_id, "error": str(e)})
+                return
+            with chatbot.turn_lock:
+                for index, user_input in session_items:
+                    try:
+                        result = {"index": index, "session": session_id,
+                                  "response": chatbot.process_input(user_input)}
+                    except Exception as e:
+                        print(f"Error in batch item {index}: {str(e)}")
+                        result = {"index": index, "session": session_id, "error": str(e)}
+                    results.put(result)
+                if on_session_done is not None:
+                    try:
+                        on_session_done(session_id, chatbot)
+                    except Exception as e:
+                        print(f"Error finishing batch session {session_id}: {str(e)}")
+
+        def run_sessions():
+            # Each worker takes sessions until none are left or the consumer has gone
+            while not stopped.is_set():
+                try:
+                    session_id, session_items = waiting.get_nowait()
+                except queue.Empty:
+                    return
+                run_session(session_id, session_items)
+
+        waiting = queue.SimpleQueue()
+        for session_id, session_items in groups.items():
+            waiting.put((session_id, session_items))
+        stopped = threading.Event()
+        for _ in range(min(max_workers, len(groups))):
+            batch_executor.submit(run_sessions)
+        try:
+            for _ in range(sum(len(session_items) for session_items in groups.values())):
+                yield results.get()
+        finally:
+            # A consumer that stops early (e.g. a dropped connection) leaves
+            # the sessions no worker has taken yet
+            stopped.set()
+
+    def remember_turn(self, user_input, response):
+        for role, content in (("user", user_input), ("assistant", response)):
+            self.conversation_history.append({"role": role, "content": content})
+            self._unsaved_turns.append((role, content))
+        del self.conversation_history[:-HISTORY_LIMIT]
+        if self.version == 0:
+            # Never checkpointed, so there may be no storage to hand turns to;
+            # keep no more of them than conversation_history does
+            del self._unsaved_turns[:-HISTORY_LIMIT]
+
+    def snapshot(self, full=True):
+        """Return the session as plain data that can be restored in any process.
+
+        ``full`` adds the ledger and recent turns; session storage keeps those
+        in their own tables and leaves them out.
+        """
+        history = self.chat.history if self.chat is not None else self._pending_history
+        snapshot = {
+            "v": SNAPSHOT_VERSION,
+            "profile": {"user_name": self.user_name, "user_data": self.user_data, "expenses": self.expenses},
+            "greeted_at": self.last_greeting_time.timestamp() if self.last_greeting_time else None,
+            "history": [[message_role(message), message_text(message)] for message in history],
+            "prompt": self.prompt_builder.snapshot(),
+        }
+        if full:
+            snapshot["turns"] = [[entry["role"], entry["content"]] for entry in self.conversation_history]
+            snapshot["ledger"] = self.ledger.snapshot()
+        return snapshot
+
+    def restore_snapshot(self, snapshot):
+        validate_snapshot(snapshot)
+        # Decoded before anything changes, so a bad ledger leaves the session as it was
+        ledger = ExpenseLedger.from_snapshot(snapshot["ledger"]) if "ledger" in snapshot else None
+        profile = snapshot["profile"]
+        self.user_name = profile.get("user_name")
+        self.user_data = profile.get("user_data", {})
+        self.expenses = profile.get("expenses", {})
+        greeted_at = snapshot.get("greeted_at")
+        self.last_greeting_time = datetime.fromtimestamp(greeted_at) if greeted_at else None
+        history = [{"role": role, "parts": [text]} for role, text in snapshot.get("history", [])]
+        if self.chat is not None:
+            self.chat.history = history
+        else:
+            self._pending_history = history
+        self.prompt_builder.restore(snapshot.get("prompt", {}))
+        # A full snapshot comes from elsewhere: its rows are new to our storage
+        if "turns" in snapshot:
+            self.conversation_history = [
+                {"role": role, "content": content} for role, content in snapshot["turns"][-HISTORY_LIMIT:]
+            ]
+            self._unsaved_turns = [tuple(turn) for turn in snapshot["turns"]]
+        if ledger is not None:
+            self.ledger = ledger
+            self._saved_ledger_rows = 0
+
+    def checkpoint(self):
+        """Return what changed since the last checkpoint, for session storage."""
+        self.version += 1
+        changes = {
+            "state": self.snapshot(full=False),
+            "version": self.version,
+            "ledger": self.ledger.rows(self._saved_ledger_rows),
+            "turns": self._unsaved_turns,
+        }
+        self._saved_ledger_rows = len(self.ledger)
+        self._unsaved_turns = []
+        return changes
+
+    def restore(self, record):
+        """Rehydrate from a record returned by a session storage's load()."""
+        self.restore_snapshot(record["state"])
+        self.version = record.get("version", 0)
+        ledger = record.get("ledger") or []
+        if ledger:
+            amounts, categories, timestamps = zip(*ledger)
+            self.ledger.extend(amounts, categories, timestamps)
+        self._saved_ledger_rows = len(self.ledger)
+        self.conversation_history = [
+            {"role": role, "content": content} for role, content in record.get("turns", [])[-HISTORY_LIMIT:]
+        ]
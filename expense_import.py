@@ -0,0 +1,249 @@
+"""Stream CSV / bank-statement exports into the expense ledger.
+
+Rows are read one at a time and pushed through a chain of generators
+(read -> parse -> categorize -> aggregate), so only the running per-category
+totals are kept in memory no matter how long the statement is.
+"""
+import csv
+import io
+import re
+from datetime import datetime
+
+from categories import CATEGORY_KEYWORDS, DEFAULT_CATEGORY
+
+DATE_COLUMNS = ['date', 'txn date', 'transaction date', 'value date', 'posting date']
+DESCRIPTION_COLUMNS = ['description', 'narration', 'particulars', 'details', 'remarks', 'transaction details']
+AMOUNT_COLUMNS = ['amount', 'transaction amount', 'amount (inr)', 'amt']
+DEBIT_COLUMNS = ['debit', 'withdrawal', 'withdrawal amt.', 'withdrawal amount', 'debit amount', 'dr']
+CREDIT_COLUMNS = ['credit', 'deposit', 'deposit amt.', 'deposit amount', 'credit amount', 'cr']
+TYPE_COLUMNS = ['type', 'dr/cr', 'cr/dr', 'transaction type', 'debit/credit']
+
+DATE_FORMATS = ['%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d/%m/%y', '%d-%m-%y', '%d %b %Y', '%d-%b-%Y', '%d-%b-%y', '%m/%d/%Y']
+
+AMOUNT_CLEANUP = re.compile(r'[₹,\s]|rs\.?|inr', re.IGNORECASE)
+# Keywords must be whole words so 'rent' does not match 'current' and 'emi'
+# does not match 'emirates'; a plural 's' or trailing digits ('SWIGGY8231')
+# may follow
+CATEGORY_PATTERN = re.compile(
+    r"\b(?:" + "|".join(f"(?P<c{i}>{'|'.join(re.escape(k) for k in keywords)})"
+             for i, keywords in enumerate(CATEGORY_KEYWORDS.values())) + ")s?(?![a-z])",
+    re.IGNORECASE
+)
+CATEGORY_NAMES = list(CATEGORY_KEYWORDS)
+
+
+def parse_amount(text):
+    """Parse '₹1,200.50', '(450)', '300 Dr' or '-20' into a signed float.
+
+    Debits ('Dr', parentheses or a leading minus) come back negative.
+    Returns None for blank cells.
+    """
+    if text is None:
+        return None
+    text = text.strip()
+    if not text:
+        return None
+    sign = 1.0
+    lowered = text.lower()
+    if lowered.endswith('dr'):
+        sign, text = -1.0, text[:-2]
+    elif lowered.endswith('cr'):
+        text = text[:-2]
+    if text.startswith('(') and text.endswith(')'):
+        sign, text = -1.0, text[1:-1]
+    text = AMOUNT_CLEANUP.sub('', text)
+    if not text:
+        return None
+    return sign * float(text)
+
+
+class DateParser:
+    # Statements use one date format throughout, so remember the one that
+    # worked, and the same few thousand dates repeat, so memoize them
+    def __init__(self, formats=DATE_FORMATS, cache_size=8192):
+        self.formats = list(formats)
+        self.cache = {}
+        self.cache_size = cache_size
+
+    def __call__(self, text):
+        text = text.strip()
+        parsed = self.cache.get(text)
+        if parsed is not None:
+            return parsed
+        for i, fmt in enumerate(self.formats):
+            try:
+                parsed = datetime.strptime(text, fmt)
+            except ValueError:
+                continue
+            if i:
+                self.formats.insert(0, self.formats.pop(i))
+            if len(self.cache) >= self.cache_size:
+                self.cache.clear()
+            self.cache[text] = parsed
+            return parsed
+        return None
+
+
+def categorize(description):
+    match = CATEGORY_PATTERN.search(description)
+    if match:
+        return CATEGORY_NAMES[int(match.lastgroup[1:])]
+    return DEFAULT_CATEGORY
+
+
+def _find_column(header, names):
+    for i, column in enumerate(header):
+        if column in names:
+            return i
+    return None
+
+
+def read_rows(source, delimiter=','):
+    """Yield raw CSV rows from a path, file object or iterable of lines."""
+    if isinstance(source, str):
+        with open(source, newline='', encoding='utf-8-sig') as handle:
+            yield from csv.reader(handle, delimiter=delimiter)
+    else:
+        yield from csv.reader(source, delimiter=delimiter)
+
+
+def parse_transactions(rows, stats=None, positive_is_expense=False):
+    """Turn raw rows into (date, description, amount) with debits negative.
+
+    The header row is located automatically (bank exports often start with
+    account details). A single amount column is read as signed (negative
+    means money out) unless a Dr/Cr type column says otherwise; pass
+    ``positive_is_expense`` for plain expense lists. Rows that cannot be
+    parsed are counted in ``stats['skipped']`` and dropped.
+    """
+    stats = stats if stats is not None else {}
+    stats.setdefault('rows', 0)
+    stats.setdefault('skipped', 0)
+    columns = None
+    parse_date = DateParser()
+    for row in rows:
+        if columns is None:
+            header = [cell.strip().lower() for cell in row]
+            date_col = _find_column(header, DATE_COLUMNS)
+            desc_col = _find_column(header, DESCRIPTION_COLUMNS)
+            if date_col is None or desc_col is None:
+                continue
+            columns = (date_col, desc_col, _find_column(header, AMOUNT_COLUMNS),
+                       _find_column(header, DEBIT_COLUMNS), _find_column(header, CREDIT_COLUMNS),
+                       _find_column(header, TYPE_COLUMNS))
+            continue
+
+        stats['rows'] += 1
+        date_col, desc_col, amount_col, debit_col, credit_col, type_col = columns
+        try:
+            date = parse_date(row[date_col])
+            if date is None:
+                raise ValueError(f"Unrecognised date {row[date_col]!r}")
+            if amount_col is not None:
+                amount = parse_amount(row[amount_col])
+                if amount is not None and type_col is not None:
+                    is_debit = row[type_col].strip().lower().startswith('d')
+                    amount = -abs(amount) if is_debit else abs(amount)
+                elif amount is not None and positive_is_expense:
+                    amount = -amount
+            else:
+                debit = parse_amount(row[debit_col]) if debit_col is not None else None
+                credit = parse_amount(row[credit_col]) if credit_col is not None else None
+                amount = -abs(debit) if debit else (abs(credit) if credit else None)
+            if amount is None:
+                raise ValueError("Missing amount")
+        except (IndexError, ValueError):
+            stats['skipped'] += 1
+            continue
+        yield date, row[desc_col].strip(), amount
+
+
+def categorize_transactions(transactions):
+    for date, description, amount in transactions:
+        yield date, categorize(description), amount
+
+
+class ImportSummary:
+    def __init__(self):
+        self.totals = {}  # category -> total spent over the whole statement
+        self.credits = 0.0
+        self.transactions = 0
+        self.skipped = 0
+        self.first_date = None
+        self.last_date = None
+        self.months = set()
+
+    def add(self, date, category, amount):
+        self.transactions += 1
+        self.months.add((date.year, date.month))
+        if self.first_date is None or date < self.first_date:
+            self.first_date = date
+        if self.last_date is None or date > self.last_date:
+            self.last_date = date
+        if amount < 0:
+            self.totals[category] = self.totals.get(category, 0.0) - amount
+        else:
+            self.credits += amount
+
+    @property
+    def month_count(self):
+        return max(len(self.months), 1)
+
+    def monthly_expenses(self):
+        # The chatbot tracks monthly amounts per category
+        return {category: round(total / self.month_count, 2) for category, total in self.totals.items()}
+
+    def monthly_income(self):
+        return round(self.credits / self.month_count, 2)
+
+    def apply_to(self, chatbot, include_income=False):
+        """Merge the monthly averages into a chatbot's expense state."""
+        chatbot.expenses.update(self.monthly_expenses())
+        if include_income and self.credits:
+            chatbot.user_data["income"] = self.monthly_income()
+
+    def analyze(self, analysis, income):
+        """Run FinancialAnalysis over the imported monthly averages."""
+        expenses = self.monthly_expenses()
+        total = analysis.calculate_total_expenses(expenses)
+        return {
+            "total_expenses": total,
+            "remaining_balance": analysis.calculate_remaining_balance(income, total),
+            "breakdown": analysis.get_expense_breakdown(expenses, income) if income else {},
+        }
+
+    def as_dict(self):
+        return {
+            "transactions": self.transactions,
+            "skipped": self.skipped,
+            "months": len(self.months),
+            "first_date": self.first_date.date().isoformat() if self.first_date else None,
+            "last_date": self.last_date.date().isoformat() if self.last_date else None,
+            "totals": dict(self.totals),
+            "monthly_expenses": self.monthly_expenses(),
+            "credits": self.credits,
+        }
+
+
+def import_statement(source, chatbot=None, delimiter=',', include_income=False, positive_is_expense=False,
+                     ledger=None):
+    """Stream a CSV statement into an ImportSummary (and optionally a chatbot).
+
+    ``source`` is a path, an open file or any iterable of CSV lines. When a
+    ``ledger`` is given (the chatbot's own by default) every debit is also
+    appended to it as a dated row.
+    """
+    if isinstance(source, bytes):
+        source = io.StringIO(source.decode('utf-8-sig'))
+    if ledger is None and chatbot is not None:
+        ledger = getattr(chatbot, 'ledger', None)
+    stats = {}
+    summary = ImportSummary()
+    for date, category, amount in categorize_transactions(parse_transactions(read_rows(source, delimiter), stats, positive_is_expense)):
+        summary.add(date, category, amount)
+        if ledger is not None and amount < 0:
+            ledger.append(-amount, category, date)
+    summary.skipped = stats.get('skipped', 0)
+    if chatbot is not None:
+        summary.apply_to(chatbot, include_income=include_income)
+    return summary
@@ -0,0 +1,115 @@
+"""Single-pass extraction of income, expenses, savings goal and name.
+
+All patterns are compiled once into one regex. Each alternative sits inside
+a lookahead, so matches can overlap just like the separate ``re.search``
+calls this replaces ("spend 500 on rent and my income is 9000" yields both
+the expense and the income) while the text is still scanned only once.
+"""
+import re
+from multiprocessing import Pool
+
+
+def _amount(name):
+    return r"(?:rs\.?|₹)?\s*(?P<" + name + r">\d+(?:,\d+)*(?:\.\d+)?)"
+
+
+EXTRACTION_PATTERN = re.compile(
+    # Every alternative starts with one of these letters; checking that first
+    # lets the engine skip most positions without trying each alternative
+    r"(?=[iemspcg])(?:"
+    r"(?=(?P<income>(?:income|earn|salary|make|making)(?:\s+is|\s+of)?\s+" + _amount("income_amount") + r"))"
+    r"|(?=(?P<expense>(?:spend|spent|spending|pay|paying|paid|expense|expenses|cost|costs)\s+"
+    + _amount("expense_amount") + r"\s+(?:on|for|in)\s+(?P<expense_category>[a-zA-Z\s]+)))"
+    r"|(?=(?P<savings>(?:save|saving|savings|goal)\s+" + _amount("savings_amount") + r"))"
+    r"|(?=(?P<name>(?:my name is|I am|I'm) (?P<name_value>[A-Za-z]+)))"
+    r"|(?=(?P<call_name>call me (?P<call_name_value>[A-Za-z]+)))"
+    r")",
+    re.IGNORECASE
+)
+NUMBER_PATTERN = re.compile(r'\d+(?:,\d+)*(?:\.\d+)?')
+
+
+def parse_amount(text):
+    return float(text.replace(",", ""))
+
+
+class Extraction:
+    __slots__ = ("income", "expenses", "savings_goal", "name")
+
+    def __init__(self):
+        self.income = None
+        self.expenses = []  # (category, amount) in the order they appear
+        self.savings_goal = None
+        self.name = None
+
+    def as_dict(self):
+        return {
+            "income": self.income,
+            "expenses": self.expenses,
+            "savings_goal": self.savings_goal,
+            "name": self.name,
+        }
+
+    def __bool__(self):
+        return bool(self.income is not None or self.expenses or self.savings_goal is not None or self.name)
+
+    def __repr__(self):
+        return f"Extraction({self.as_dict()!r})"
+
+
+class FinancialExtractor:
+    def __init__(self, pattern=EXTRACTION_PATTERN):
+        self.pattern = pattern
+
+    def extract(self, text):
+        result = Extraction()
+        call_name = None
+        for match in self.pattern.finditer(text):
+            # The outer group of each alternative closes last, so lastgroup
+            # names the field that matched
+            field = match.lastgroup
+            if field == "expense":
+                result.expenses.append((
+                    match.group("expense_category").strip().lower(),
+                    parse_amount(match.group("expense_amount"))
+                ))
+            elif field == "income":
+                if result.income is None:
+                    result.income = parse_amount(match.group("income_amount"))
+            elif field == "savings":
+                if result.savings_goal is None:
+                    result.savings_goal = parse_amount(match.group("savings_amount"))
+            elif field == "name":
+                if result.name is None:
+                    result.name = match.group("name_value").capitalize()
+            elif field == "call_name":
+                if call_name is None:
+                    call_name = match.group("call_name_value").capitalize()
+        if result.name is None:
+            result.name = call_name
+        return result
+
+    def extract_many(self, messages, processes=None, chunksize=1000):
+        """Yield an Extraction for each message, in order.
+
+        ``messages`` can be any iterable (e.g. a file of archived chat lines);
+        it is consumed lazily. With ``processes`` > 1 the work is spread over
+        a process pool.
+        """
+        if processes and processes > 1:
+            with Pool(processes) as pool:
+                yield from pool.imap(self.extract, messages, chunksize=chunksize)
+        else:
+            extract = self.extract
+            for message in messages:
+                yield extract(message)
+
+
+def extract_number(text):
+    match = NUMBER_PATTERN.search(text)
+    if match:
+        return parse_amount(match.group(0))
+    return None
+
+
+extractor = FinancialExtractor()
@@ -0,0 +1,13 @@
+"""Manually advanced clock for tests of TTLs, rate limits and timeouts.
+
+Pass an instance wherever a component takes ``clock=`` (it is called like
+``time.monotonic``) and move time on by setting ``now``.
+"""
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
@@ -0,0 +1,85 @@
+"""Local stand-in for the Gemini model, used to run the bot offline.
+
+FakeGenerativeModel mirrors the parts of ``google.generativeai`` that the
+chatbot uses: ``start_chat(history=...)`` returns a session whose
+``send_message(prompt, stream=..., request_options=...)`` returns objects
+with a ``.text``. Latency and errors can be injected to exercise timeouts
+and the circuit breaker.
+"""
+import random
+import threading
+import time
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeChatSession:
+    def __init__(self, model, history=None):
+        self.model = model
+        self.history = list(history or [])
+
+    def send_message(self, content, stream=False, request_options=None):
+        reply = self.model.reply(content, (request_options or {}).get("timeout"))
+        self.history.append({"role": "user", "parts": [content]})
+        self.history.append({"role": "model", "parts": [reply]})
+        if stream:
+            return (FakeResponse(chunk) for chunk in self.model.chunk(reply))
+        return FakeResponse(reply)
+
+
+class FakeGenerativeModel:
+    def __init__(self, responder=None, chunk_words=3, latency=0.0, error_rate=0.0, seed=None, capacity=None):
+        # responder(prompt) -> reply text; defaults to a fixed friendly answer
+        self.responder = responder or (lambda prompt: "Hey! 😊 Here's a quick money tip: track every rupee this week.")
+        self.chunk_words = chunk_words
+        # Seconds per call (or a callable returning them) and failure probability
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        # Calls served at once, like a quota-limited backend; others wait their turn
+        self.slots = threading.BoundedSemaphore(capacity) if capacity else None
+        self.calls = 0
+
+    def start_chat(self, history=None):
+        return FakeChatSession(self, history)
+
+    def generate_content(self, content, stream=False, request_options=None):
+        reply = self.reply(content, (request_options or {}).get("timeout"))
+        if stream:
+            return (FakeResponse(chunk) for chunk in self.chunk(reply))
+        return FakeResponse(reply)
+
+    def reply(self, content, timeout=None):
+        if self.slots is None:
+            return self._reply(content, timeout)
+        started_at = time.monotonic()
+        if not self.slots.acquire(timeout=timeout):
+            raise TimeoutError(f"Deadline of {timeout:.2f}s exceeded waiting for capacity")
+        try:
+            if timeout is not None:
+                timeout = max(timeout - (time.monotonic() - started_at), 0.0)
+            return self._reply(content, timeout)
+        finally:
+            self.slots.release()
+
+    def _reply(self, content, timeout=None):
+        self.calls += 1
+        latency = self.latency() if callable(self.latency) else self.latency
+        if timeout is not None and latency > timeout:
+            # Behave like the SDK: give up at the deadline
+            time.sleep(timeout)
+            raise TimeoutError(f"Deadline of {timeout:.2f}s exceeded")
+        if latency:
+            time.sleep(latency)
+        if self.error_rate and self.random.random() < self.error_rate:
+            raise RuntimeError("Injected model error")
+        return self.responder(content)
+
+    def chunk(self, text):
+        words = text.split(" ")
+        for i in range(0, len(words), self.chunk_words):
+            piece = " ".join(words[i:i + self.chunk_words])
+            yield piece if i + self.chunk_words >= len(words) else piece + " "
@@ -1,14 +1,30 @@
 import json
-from web_search import get_financial_advice
+import numpy as np
+from financial_state import ExpenseTotals
+from ledger import ExpenseLedger
+from web_search import get_financial_advice_many
 
 class FinancialAnalysis:
+    # Expense arguments may be a {category: monthly amount} dict or an
+    # ExpenseLedger, in which case its monthly averages are used
     def calculate_total_expenses(self, expenses):
+        if type(expenses) is dict:
+            return sum(expenses.values())
+        if isinstance(expenses, ExpenseLedger):
+            return float(expenses.monthly_category_totals().sum())
+        if isinstance(expenses, ExpenseTotals):
+            return expenses.total
         return sum(expenses.values())
 
     def calculate_remaining_balance(self, income, total_expenses):
         return income - total_expenses
 
     def get_expense_breakdown(self, expenses, income):
+        if isinstance(expenses, ExpenseLedger):
+            totals = expenses.monthly_category_totals()
+            percentages = totals / income * 100
+            return {expenses.categories[code]: float(percentages[code]) for code in np.flatnonzero(totals)}
+        
         # Calculate percentage of income for each expense
         expense_percentages = {}
         for category, amount in expenses.items():
@@ -28,16 +44,51 @@ class FinancialAnalysis:
             "savings": savings
         }
 
-    def suggest_savings(self, remaining_balance, savings_goal):
+    def analyze_batch(self, incomes, expenses, savings_goals, categories=None):
+        """Budget health for N users in one vectorized pass.
+
+        ``incomes`` and ``savings_goals`` have length N and ``expenses`` is an
+        (N x categories) matrix. A data frame with one column per category
+        also works, and its column names are used for ``categories``. Returns
+        a dict of arrays that matches what the per-user methods return.
+        """
+        if hasattr(expenses, "to_numpy"):
+            if categories is None and hasattr(expenses, "columns"):
+                categories = list(expenses.columns)
+            expenses = expenses.to_numpy()
+        incomes = np.asarray(incomes, dtype=np.float64)
+        expenses = np.asarray(expenses, dtype=np.float64).reshape(len(incomes), -1)
+        savings_goals = np.asarray(savings_goals, dtype=np.float64)
+        
+        total_expenses = expenses.sum(axis=1)
+        remaining = incomes - total_expenses
+        # Users without income get 0% instead of a division error
+        breakdown = np.divide(expenses * 100, incomes[:, None],
+                              out=np.zeros_like(expenses), where=incomes[:, None] != 0)
+        return {
+            "categories": categories,
+            "total_expenses": total_expenses,
+            "remaining_balance": remaining,
+            "breakdown_percentages": breakdown,
+            "needs": incomes * 0.5,
+            "wants": incomes * 0.3,
+            "savings": incomes * 0.2,
+            "goal_deficit": np.maximum(savings_goals - remaining, 0),
+            "goal_surplus": np.maximum(remaining - savings_goals, 0),
+        }
+
+    def suggest_savings(self, remaining_balance, savings_goal, deadline=None):
         try:
-            # Get personalized financial advice from the web
+            # Get personalized financial advice from the web; both lookups run
+            # at once so the slower one, not their sum, bounds the wait
             search_query = f"best savings strategies for monthly savings goal of {savings_goal} rupees india"
-            financial_advice = get_financial_advice(search_query)
             
             if remaining_balance < savings_goal:
                 deficit = savings_goal - remaining_balance
-                search_query = f"how to reduce monthly expenses to save {deficit} rupees india"
-                expense_reduction_tips = get_financial_advice(search_query)
+                follow_up_query = f"how to reduce monthly expenses to save {deficit} rupees india"
+                financial_advice, expense_reduction_tips = get_financial_advice_many(
+                    [search_query, follow_up_query], deadline
+                )
                 
                 response = "📊 Savings Analysis:\n\n"
                 response += f"You're currently ₹{deficit:,.2f} short of your savings goal.\n\n"
@@ -47,8 +98,10 @@ class FinancialAnalysis:
                 response += expense_reduction_tips
             else:
                 surplus = remaining_balance - savings_goal
-                search_query = f"best investment options for {surplus} rupees monthly surplus india"
-                investment_advice = get_financial_advice(search_query)
+                follow_up_query = f"best investment options for {surplus} rupees monthly surplus india"
+                financial_advice, investment_advice = get_financial_advice_many(
+                    [search_query, follow_up_query], deadline
+                )
                 
                 response = "📈 Investment Opportunities:\n\n"
                 response += f"Great! You have a surplus of ₹{surplus:,.2f} after meeting your savings goal.\n\n"
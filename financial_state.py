@@ -0,0 +1,184 @@
+"""A session's financial profile with running totals and a cached context.
+
+``FinancialState`` owns the chatbot's ``user_data`` and ``expenses`` dicts.
+They stay ordinary dicts to their callers, but every change is reported
+back, so the expense total, the largest category and the rendered
+"Financial Context" text are kept up to date as values change instead of
+being recomputed from scratch on every turn.
+"""
+import heapq
+
+NO_DATA_CONTEXT = "No financial data available yet."
+
+
+class TrackedDict(dict):
+    """dict that calls ``on_change(key, old, new)`` after every change.
+
+    ``old`` / ``new`` are None when the key was added / removed.
+    """
+
+    __slots__ = ('on_change',)
+
+    def __init__(self, on_change, data=()):
+        super().__init__()
+        self.on_change = on_change
+        self.update(data)
+
+    def __setitem__(self, key, value):
+        old = self.get(key)
+        super().__setitem__(key, value)
+        # Re-stating a value is common and changes nothing downstream
+        if old is None or type(old) is not type(value) or old != value:
+            self._changed(key, old, value)
+
+    def __delitem__(self, key):
+        old = self[key]
+        super().__delitem__(key)
+        self._changed(key, old, None)
+
+    def _changed(self, key, old, new):
+        self.on_change(key, old, new)
+
+    def pop(self, key, *default):
+        if key not in self:
+            return super().pop(key, *default)
+        value = self[key]
+        del self[key]
+        return value
+
+    def popitem(self):
+        key = next(reversed(self))
+        return key, self.pop(key)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, data=(), **kwargs):
+        items = data.items() if hasattr(data, 'items') else data
+        for key, value in items:
+            self[key] = value
+        for key, value in kwargs.items():
+            self[key] = value
+
+    def __ior__(self, data):
+        self.update(data)
+        return self
+
+    def clear(self):
+        for key in list(self):
+            del self[key]
+
+
+class ExpenseTotals(TrackedDict):
+    """Category -> monthly amount, with a running total and largest category.
+
+    ``total`` is O(1). ``largest()`` is O(1) amortized: a heap ordered by
+    amount (then first-seen order, matching ``max()`` over the dict) whose
+    stale entries are dropped lazily.
+    """
+
+    __slots__ = ('total', '_heap', '_order', '_next_order')
+
+    def __init__(self, on_change, data=()):
+        self.total = 0
+        self._heap = []
+        self._order = {}  # category -> insertion position, for ties
+        self._next_order = 0
+        super().__init__(on_change, data)
+
+    def largest(self):
+        """Return (category, amount) of the largest expense, or None."""
+        heap = self._heap
+        while heap:
+            negative_amount, order, category = heap[0]
+            if self.get(category) == -negative_amount and self._order.get(category) == order:
+                return category, -negative_amount
+            heapq.heappop(heap)
+        return None
+
+    def _changed(self, category, old, new):
+        if old is not None:
+            self.total -= old
+        if category in self:
+            self.total += new
+            if old is None:
+                self._order[category] = self._next_order
+                self._next_order += 1
+            heapq.heappush(self._heap, (-new, self._order[category], category))
+            if len(self._heap) > 2 * len(self) + 16:
+                self._compact()
+        else:
+            self._order.pop(category, None)
+        if not self:
+            # Start from an exact zero rather than accumulated float error
+            self.total = 0
+        super()._changed(category, old, new)
+
+    def _compact(self):
+        self._heap = [(-amount, self._order[category], category) for category, amount in self.items()]
+        heapq.heapify(self._heap)
+
+
+class FinancialState:
+    __slots__ = ('user_data', 'expenses', '_profile_lines', '_expense_lines', '_context')
+
+    def __init__(self):
+        self.user_data = TrackedDict(self._profile_changed)
+        self.expenses = ExpenseTotals(self._expense_changed)
+        # Rendered context lines, updated one entry at a time
+        self._profile_lines = {}
+        self._expense_lines = {}
+        self._context = NO_DATA_CONTEXT
+
+    @property
+    def total_expenses(self):
+        return self.expenses.total
+
+    def largest_expense(self):
+        return self.expenses.largest()
+
+    def replace_profile(self, data):
+        data = dict(data)  # data may be self.user_data itself
+        self.user_data.clear()
+        self.user_data.update(data)
+
+    def replace_expenses(self, data):
+        data = dict(data)
+        self.expenses.clear()
+        self.expenses.update(data)
+
+    def context(self):
+        """The "Financial Context" text sent to the model."""
+        if self._context is None:
+            if not self._profile_lines and not self._expense_lines:
+                self._context = NO_DATA_CONTEXT
+            else:
+                lines = []
+                if self._profile_lines:
+                    lines.append("User Financial Profile:")
+                    lines.extend(self._profile_lines.values())
+                if self._expense_lines:
+                    lines.append("\nExpense Categories:")
+                    lines.extend(self._expense_lines.values())
+                self._context = "\n".join(lines)
+        return self._context
+
+    def _profile_changed(self, key, old, new):
+        if key not in self.user_data:
+            self._profile_lines.pop(key, None)
+        elif key == 'income':
+            self._profile_lines[key] = f"- Monthly Income: ₹{new:,.2f}"
+        elif key == 'savings_goal':
+            self._profile_lines[key] = f"- Savings Goal: ₹{new:,.2f}"
+        else:
+            self._profile_lines[key] = f"- {key.title()}: {new}"
+        self._context = None
+
+    def _expense_changed(self, category, old, new):
+        if category not in self.expenses:
+            self._expense_lines.pop(category, None)
+        else:
+            self._expense_lines[category] = f"- {category}: ₹{new:,.2f}"
+        self._context = None
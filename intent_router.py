@@ -0,0 +1,120 @@
+import re
+import threading
+
+GREETING_WORDS = ['hi', 'hello', 'hey', 'hola', 'greetings']
+CAPABILITY_TRIGGERS = ['what can you do', 'your capabilities', 'help me', 'what do you do', 'how can you help']
+# Whole-message phrasings only (see CONVERSATIONAL_INTENTS): "how should I save
+# for my daughter's wedding?" is a specific question for the model
+SAVINGS_ADVICE_TRIGGERS = [
+    'what should i do with my savings', 'what do i do with my savings', 'savings advice', 'advice on saving',
+    'how should i save', 'where should i save', 'how can i save more', 'how do i reach my savings goal',
+    'how can i reach my savings goal', 'where should i invest my savings',
+]
+ANALYSIS_KEYWORDS = ["analyze", "analysis", "how am i doing", "budget", "review", "overview", "summary", "status"]
+
+# Conversational intents are only answered locally when the whole message is
+# the trigger, give or take a few filler words; anything more specific (a
+# question that merely mentions "budget" or "help me") goes to the model
+CONVERSATIONAL_INTENTS = ('capabilities', 'savings_advice', 'analysis', 'greeting')
+CONVERSATIONAL_FILLERS = frozenset([
+    'a', 'an', 'the', 'my', 'me', 'i', 'you', 'can', 'could', 'would', 'please', 'show', 'give', 'get', 'tell',
+    'do', 'some', 'quick', 'so', 'far', 'there', 'fin', 'now', 'ok', 'okay', 'just', 'again', 'hi', 'hey', 'hello',
+])
+MAX_CONVERSATIONAL_WORDS = 8
+WORD_PATTERN = re.compile(r"[\w']+")
+
+# Intents in priority order: when a message matches several, the first wins
+INTENTS = ['capabilities', 'expense', 'savings', 'income', 'savings_advice', 'analysis', 'greeting']
+
+
+def _amount(name):
+    return r"(?:rs\.?|₹)?\s*(?P<" + name + r">\d+(?:,\d+)*(?:\.\d+)?)"
+
+
+def _alternation(words):
+    return "|".join(re.escape(word) for word in sorted(words, key=len, reverse=True))
+
+
+# One combined pattern so every trigger list is matched in a single scan
+ROUTER_PATTERN = re.compile(
+    r"\b(?P<capabilities>" + _alternation(CAPABILITY_TRIGGERS) + r")\b"
+    r"|(?P<expense>(?:spend|spent|spending|pay|paying|paid|expense|expenses|cost|costs)\s+"
+    + _amount("expense_amount") + r"\s+(?:on|for|in)\s+(?P<expense_category>[a-zA-Z\s]+))"
+    r"|(?P<savings>(?:save|saving|savings|goal)\s+"
+    + _amount("savings_amount") + r")"
+    r"|(?P<income>(?:income|earn|salary|make|making)(?:\s+is|\s+of)?\s+"
+    + _amount("income_amount") + r")"
+    r"|\b(?P<savings_advice>" + _alternation(SAVINGS_ADVICE_TRIGGERS) + r")\b"
+    r"|\b(?P<analysis>" + _alternation(ANALYSIS_KEYWORDS) + r")\b"
+    r"|\b(?P<greeting>" + _alternation(GREETING_WORDS) + r")\b",
+    re.IGNORECASE
+)
+
+
+class RouteMatch:
+    def __init__(self, intent, match):
+        self.intent = intent
+        self.match = match
+
+    def group(self, name):
+        return self.match.group(name)
+
+
+class IntentRouter:
+    """Decides in one regex pass whether a message can be answered locally."""
+
+    def __init__(self, pattern=ROUTER_PATTERN):
+        self.pattern = pattern
+        self._lock = threading.Lock()
+        self.counts = {intent: 0 for intent in INTENTS}
+        self.counts['llm'] = 0
+
+    def match(self, text):
+        """Return the highest-priority RouteMatch in ``text``, or None."""
+        found = {}
+        spans = {}
+        for match in self.pattern.finditer(text):
+            # Inner amount/category groups close first, so lastgroup is the intent
+            intent = match.lastgroup
+            if intent not in found:
+                found[intent] = match
+            spans.setdefault(intent, []).append(match.span())
+        for intent in INTENTS:
+            if intent not in found:
+                continue
+            if intent in CONVERSATIONAL_INTENTS and not self._is_whole_message(text, spans[intent]):
+                continue
+            return RouteMatch(intent, found[intent])
+        return None
+
+    def _is_whole_message(self, text, spans):
+        if len(WORD_PATTERN.findall(text)) > MAX_CONVERSATIONAL_WORDS:
+            return False
+        rest = []
+        position = 0
+        for start, end in spans:
+            rest.append(text[position:start])
+            position = end
+        rest.append(text[position:])
+        return all(word in CONVERSATIONAL_FILLERS for word in WORD_PATTERN.findall(" ".join(rest).lower()))
+
+    def record(self, intent):
+        # intent is None when the message went to the model
+        with self._lock:
+            self.counts[intent or 'llm'] += 1
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self.counts)
+        llm = counts.pop('llm')
+        local = sum(counts.values())
+        total = local + llm
+        return {
+            "local": local,
+            "llm": llm,
+            "local_rate": local / total if total else 0.0,
+            "by_intent": counts,
+        }
+
+
+router = IntentRouter()
@@ -0,0 +1,233 @@
+"""Columnar expense ledger backed by NumPy arrays.
+
+Every expense is kept as one row across four parallel arrays (amount,
+category code, timestamp, user id), so totals, per-category breakdowns and
+per-period group-bys are single vectorized operations instead of Python
+loops over a dict.
+"""
+import base64
+import time
+from datetime import datetime
+
+import numpy as np
+
+PERIOD_UNITS = {'day': 'D', 'week': 'W', 'month': 'M', 'year': 'Y'}
+# Fixed little-endian layout so snapshots move between any machines
+SNAPSHOT_DTYPES = {'amounts': '<f8', 'codes': '<i4', 'timestamps': '<i8', 'user_ids': '<i8'}
+MIN_GROWTH = 8
+
+
+def _shared_empty(dtype):
+    # Read-only, since every empty ledger holds the same array
+    column = np.empty(0, dtype=dtype)
+    column.flags.writeable = False
+    return column
+
+
+EMPTY_COLUMNS = tuple(_shared_empty(dtype) for dtype in (np.float64, np.int32, np.int64, np.int64))
+
+
+def to_timestamp(value):
+    if value is None:
+        return int(time.time())
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    return int(value)
+
+
+class ExpenseLedger:
+    __slots__ = ('size', '_amounts', '_codes', '_timestamps', '_user_ids', 'categories', 'category_codes')
+
+    def __init__(self, capacity=64):
+        self.size = 0
+        if capacity == 0:
+            # Shared until the first append; _reserve always allocates new arrays
+            self._amounts, self._codes, self._timestamps, self._user_ids = EMPTY_COLUMNS
+        else:
+            self._amounts = np.empty(capacity, dtype=np.float64)
+            self._codes = np.empty(capacity, dtype=np.int32)
+            self._timestamps = np.empty(capacity, dtype=np.int64)
+            self._user_ids = np.empty(capacity, dtype=np.int64)
+        self.categories = []  # code -> category name
+        self.category_codes = {}  # category name -> code
+
+    # Columns, trimmed to the rows actually in use
+    @property
+    def amounts(self):
+        return self._amounts[:self.size]
+
+    @property
+    def codes(self):
+        return self._codes[:self.size]
+
+    @property
+    def timestamps(self):
+        return self._timestamps[:self.size]
+
+    @property
+    def user_ids(self):
+        return self._user_ids[:self.size]
+
+    def __len__(self):
+        return self.size
+
+    def category_code(self, category):
+        code = self.category_codes.get(category)
+        if code is None:
+            code = len(self.categories)
+            self.categories.append(category)
+            self.category_codes[category] = code
+        return code
+
+    def append(self, amount, category, timestamp=None, user_id=0):
+        self._reserve(self.size + 1)
+        i = self.size
+        self._amounts[i] = amount
+        self._codes[i] = self.category_code(category)
+        self._timestamps[i] = to_timestamp(timestamp)
+        self._user_ids[i] = user_id
+        self.size += 1
+
+    def extend(self, amounts, categories, timestamps=None, user_ids=0):
+        """Append many rows at once; ``user_ids`` may be a scalar or a sequence."""
+        amounts = np.asarray(amounts, dtype=np.float64)
+        count = len(amounts)
+        if count == 0:
+            return
+        codes = np.fromiter((self.category_code(c) for c in categories), dtype=np.int32, count=count)
+        if timestamps is None:
+            timestamps = np.full(count, int(time.time()), dtype=np.int64)
+        else:
+            timestamps = np.fromiter((to_timestamp(t) for t in timestamps), dtype=np.int64, count=count)
+        self._reserve(self.size + count)
+        end = self.size + count
+        self._amounts[self.size:end] = amounts
+        self._codes[self.size:end] = codes
+        self._timestamps[self.size:end] = timestamps
+        self._user_ids[self.size:end] = user_ids
+        self.size = end
+
+    def rows(self, start=0):
+        """Return rows from index ``start`` on as (amount, category, timestamp)."""
+        categories = self.categories
+        amounts = self._amounts[start:self.size].tolist()
+        codes = self._codes[start:self.size].tolist()
+        timestamps = self._timestamps[start:self.size].tolist()
+        return [(amount, categories[code], timestamp) for amount, code, timestamp in zip(amounts, codes, timestamps)]
+
+    def snapshot(self):
+        """Encode the rows compactly: each column as base64 of its raw array."""
+        snapshot = {'categories': list(self.categories)}
+        for name, dtype in SNAPSHOT_DTYPES.items():
+            column = getattr(self, name).astype(dtype, copy=False)
+            snapshot[name] = base64.b64encode(column.tobytes()).decode('ascii')
+        return snapshot
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        columns = {name: np.frombuffer(base64.b64decode(snapshot[name]), dtype=dtype)
+                   for name, dtype in SNAPSHOT_DTYPES.items()}
+        size = len(columns['amounts'])
+        if any(len(column) != size for column in columns.values()):
+            raise ValueError("Ledger snapshot columns differ in length")
+        if size and not 0 <= columns['codes'].min() <= columns['codes'].max() < len(snapshot['categories']):
+            raise ValueError("Ledger snapshot has an unknown category code")
+        ledger = cls(capacity=max(size, 64))
+        for category in snapshot['categories']:
+            ledger.category_code(category)
+        for name, column in columns.items():
+            getattr(ledger, '_' + name)[:size] = column
+        ledger.size = size
+        return ledger
+
+    def total(self, user_id=None, start=None, end=None):
+        mask = self._mask(user_id, start, end)
+        amounts = self.amounts if mask is None else self.amounts[mask]
+        return float(amounts.sum())
+
+    def category_totals(self, user_id=None, start=None, end=None):
+        """Return an array of totals indexed by category code."""
+        mask = self._mask(user_id, start, end)
+        codes = self.codes if mask is None else self.codes[mask]
+        amounts = self.amounts if mask is None else self.amounts[mask]
+        return np.bincount(codes, weights=amounts, minlength=len(self.categories))
+
+    def breakdown(self, user_id=None, start=None, end=None):
+        """Return {category: total}, skipping categories with no spending."""
+        totals = self.category_totals(user_id, start, end)
+        return {self.categories[code]: float(totals[code]) for code in np.flatnonzero(totals)}
+
+    def month_count(self, user_id=None):
+        mask = self._mask(user_id, None, None)
+        timestamps = self.timestamps if mask is None else self.timestamps[mask]
+        if len(timestamps) == 0:
+            return 0
+        return len(np.unique(timestamps.astype('datetime64[s]').astype('datetime64[M]')))
+
+    def monthly_category_totals(self, user_id=None):
+        """Average spend per month for each category code.
+
+        Income and goals are monthly figures, so analysis compares them with
+        the ledger's monthly averages rather than its all-time totals.
+        """
+        totals = self.category_totals(user_id)
+        months = self.month_count(user_id)
+        return totals / months if months else totals
+
+    def latest_by_category(self, user_id=None):
+        """Return {category: most recent amount}, like the chatbot's expenses dict."""
+        mask = self._mask(user_id, None, None)
+        codes = self.codes if mask is None else self.codes[mask]
+        amounts = self.amounts if mask is None else self.amounts[mask]
+        latest = {}
+        # Walking the reversed unique codes keeps the last row per category
+        reversed_codes = codes[::-1]
+        unique_codes, first_index = np.unique(reversed_codes, return_index=True)
+        for code, index in zip(unique_codes, first_index):
+            latest[self.categories[code]] = float(amounts[len(codes) - 1 - index])
+        return latest
+
+    def by_period(self, period='month', user_id=None, by_category=False):
+        """Group spending by calendar period.
+
+        Returns (periods, totals) where ``periods`` is an array of
+        numpy.datetime64 values. With ``by_category`` the totals are a
+        (periods x categories) matrix.
+        """
+        unit = PERIOD_UNITS[period]
+        mask = self._mask(user_id, None, None)
+        timestamps = self.timestamps if mask is None else self.timestamps[mask]
+        amounts = self.amounts if mask is None else self.amounts[mask]
+        buckets = timestamps.astype('datetime64[s]').astype(f'datetime64[{unit}]')
+        periods, inverse = np.unique(buckets, return_inverse=True)
+        if not by_category:
+            return periods, np.bincount(inverse, weights=amounts, minlength=len(periods))
+        codes = self.codes if mask is None else self.codes[mask]
+        width = len(self.categories)
+        flat = np.bincount(inverse * width + codes, weights=amounts, minlength=len(periods) * width)
+        return periods, flat.reshape(len(periods), width)
+
+    def _mask(self, user_id, start, end):
+        mask = None
+        if user_id is not None:
+            mask = self.user_ids == user_id
+        if start is not None:
+            after = self.timestamps >= to_timestamp(start)
+            mask = after if mask is None else mask & after
+        if end is not None:
+            before = self.timestamps < to_timestamp(end)
+            mask = before if mask is None else mask & before
+        return mask
+
+    def _reserve(self, needed):
+        capacity = len(self._amounts)
+        if needed <= capacity:
+            return
+        capacity = max(capacity, MIN_GROWTH)
+        while capacity < needed:
+            capacity *= 2
+        for name in ('_amounts', '_codes', '_timestamps', '_user_ids'):
+            old = getattr(self, name)
+            grown = np.empty(capacity, dtype=old.dtype)
+            grown[:self.size] = old[:self.size]
+            setattr(self, name, grown)
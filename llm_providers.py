@@ -0,0 +1,216 @@
+"""Chat model providers other than the Gemini SDK, and hedging between two.
+
+Every provider looks like ``google.generativeai.GenerativeModel`` to the
+chatbot: ``start_chat(history=...)`` returns a session with a settable
+``history`` (``{'role', 'parts'}`` messages) and ``send_message(prompt,
+stream=..., request_options=...)`` returning objects with ``.text``. So
+Gemini, an OpenAI-compatible HTTP API (OpenRouter, vLLM, Ollama...) and the
+offline FakeGenerativeModel stub are interchangeable; model_loader picks one
+from the LLM_PROVIDER setting.
+"""
+import json
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from prompt_builder import SYSTEM_INSTRUCTION, message_role, message_text
+
+OPENROUTER_URL = 'https://openrouter.ai/api/v1'
+
+
+class TokenUsage:
+    # Named like Gemini's usage_metadata so PromptBuilder can record it
+    def __init__(self, prompt_token_count, candidates_token_count):
+        self.prompt_token_count = prompt_token_count
+        self.candidates_token_count = candidates_token_count
+
+
+class ModelReply:
+    def __init__(self, text, usage_metadata=None):
+        self.text = text
+        self.usage_metadata = usage_metadata
+
+
+class OpenAICompatibleModel:
+    """Chat completions over HTTP, reusing keep-alive connections.
+
+    One ``requests.Session`` is shared by every chat, with a connection pool
+    of ``pool_size``, so a turn does not pay for a new TCP and TLS handshake.
+    """
+
+    def __init__(self, model, base_url=OPENROUTER_URL, api_key=None, headers=None,
+                 system_instruction=SYSTEM_INSTRUCTION, pool_size=16, session=None):
+        self.model = model
+        self.url = base_url.rstrip('/') + '/chat/completions'
+        self.system_instruction = system_instruction
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({'Content-Type': 'application/json'})
+        if api_key:
+            self.session.headers['Authorization'] = f'Bearer {api_key}'
+        self.session.headers.update(headers or {})
+
+    def start_chat(self, history=None):
+        return OpenAIChatSession(self, history)
+
+    def messages(self, history, content):
+        messages = [{'role': 'system', 'content': self.system_instruction}] if self.system_instruction else []
+        for message in history:
+            role = 'assistant' if message_role(message) == 'model' else 'user'
+            messages.append({'role': role, 'content': message_text(message)})
+        messages.append({'role': 'user', 'content': content})
+        return messages
+
+    def complete(self, messages, timeout=None):
+        response = self.session.post(self.url, json={'model': self.model, 'messages': messages}, timeout=timeout)
+        response.raise_for_status()
+        result = response.json()
+        text = result['choices'][0]['message']['content'] or ''
+        usage = result.get('usage')
+        if usage:
+            return ModelReply(text, TokenUsage(usage.get('prompt_tokens'), usage.get('completion_tokens')))
+        return ModelReply(text)
+
+    def stream(self, messages, timeout=None):
+        """Yield the reply's text pieces from a server-sent event stream."""
+        response = self.session.post(self.url, json={'model': self.model, 'messages': messages, 'stream': True},
+                                     timeout=timeout, stream=True)
+        try:
+            response.raise_for_status()
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith('data:'):
+                    continue
+                data = line[5:].strip()
+                if data == '[DONE]':
+                    break
+                choices = json.loads(data).get('choices') or [{}]
+                text = (choices[0].get('delta') or {}).get('content')
+                if text:
+                    yield text
+        finally:
+            # Hands the connection back to the pool
+            response.close()
+
+
+class OpenAIChatSession:
+    def __init__(self, model, history=None):
+        self.model = model
+        self.history = list(history or [])
+
+    def send_message(self, content, stream=False, request_options=None):
+        timeout = (request_options or {}).get('timeout')
+        messages = self.model.messages(self.history, content)
+        if stream:
+            return self._stream(content, messages, timeout)
+        reply = self.model.complete(messages, timeout)
+        self._append(content, reply.text)
+        return reply
+
+    def _stream(self, content, messages, timeout):
+        # Like the Gemini SDK, the turn joins the history once fully read
+        parts = []
+        for text in self.model.stream(messages, timeout):
+            parts.append(text)
+            yield ModelReply(text)
+        self._append(content, ''.join(parts))
+
+    def _append(self, content, reply):
+        self.history.append({'role': 'user', 'parts': [content]})
+        self.history.append({'role': 'model', 'parts': [reply]})
+
+
+class HedgedModel:
+    """Sends a turn to ``primary`` and, if it has not answered (or has
+    failed) within ``hedge_after`` seconds, to ``secondary`` as well; the
+    first good answer wins. For streams, "answered" means the first chunk.
+
+    Each turn runs on fresh chats started from this session's history, so a
+    slow loser finishing later cannot change it.
+    """
+
+    def __init__(self, primary, secondary, hedge_after=2.0, max_workers=32):
+        self.primary = primary
+        self.secondary = secondary
+        self.hedge_after = hedge_after
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='hedge')
+        self._lock = threading.Lock()
+        self.turns = 0
+        self.hedged = 0
+        self.secondary_wins = 0
+
+    def start_chat(self, history=None):
+        return HedgedChatSession(self, history)
+
+    def stats(self):
+        with self._lock:
+            return {"turns": self.turns, "hedged": self.hedged, "secondary_wins": self.secondary_wins}
+
+    def _record(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+
+def _call(model, history, content, stream, request_options):
+    chat = model.start_chat(history=history)
+    if not stream:
+        return chat, chat.send_message(content, request_options=request_options), None
+    chunks = iter(chat.send_message(content, stream=True, request_options=request_options))
+    return chat, next(chunks, None), chunks
+
+
+def _discard(future):
+    # A losing stream is closed so its connection is released
+    if not future.cancelled() and future.exception() is None:
+        chunks = future.result()[2]
+        if chunks is not None and hasattr(chunks, 'close'):
+            chunks.close()
+
+
+class HedgedChatSession:
+    def __init__(self, model, history=None):
+        self.model = model
+        self.history = list(history or [])
+
+    def send_message(self, content, stream=False, request_options=None):
+        hedged = self.model
+        hedged._record('turns')
+        primary = hedged.executor.submit(_call, hedged.primary, list(self.history), content, stream, request_options)
+        futures = {primary: hedged.primary}
+        done, _ = wait([primary], timeout=hedged.hedge_after)
+        if not done or primary.exception() is not None:
+            secondary = hedged.executor.submit(_call, hedged.secondary, list(self.history), content, stream,
+                                               request_options)
+            futures[secondary] = hedged.secondary
+            hedged._record('hedged')
+        error = None
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = future.exception()
+                    continue
+                for loser in pending:
+                    loser.add_done_callback(_discard)
+                if futures[future] is hedged.secondary:
+                    hedged._record('secondary_wins')
+                return self._finish(future.result(), stream)
+        raise error
+
+    def _finish(self, result, stream):
+        chat, reply, chunks = result
+        if not stream:
+            self.history = list(chat.history)
+            return reply
+        return self._rest_of_stream(chat, reply, chunks)
+
+    def _rest_of_stream(self, chat, first, chunks):
+        if first is not None:
+            yield first
+            for chunk in chunks:
+                yield chunk
+        self.history = list(chat.history)
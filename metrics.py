@@ -0,0 +1,176 @@
+"""In-process counters and histograms rendered in Prometheus text format.
+
+Kept dependency-free and cheap enough to leave on: recording a value is a
+dict lookup, a bisect and a few additions under a lock. Each worker process
+has its own registry, so scrape every worker (or sum across them).
+"""
+import bisect
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        with self._lock:
+            return self._values.get(labels, 0)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            lines.append(f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}')
+        return lines
+
+
+class _Timer:
+    __slots__ = ('histogram', 'labels', 'start')
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+        return False
+
+
+class Histogram:
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def time(self, *labels):
+        """Context manager that observes the duration of its block."""
+        return _Timer(self, labels)
+
+    def count(self, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            return series[-1] if series else 0
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series_items = sorted((labels, list(series)) for labels, series in self._series.items())
+        for labels, series in series_items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), series):
+                cumulative += bucket_count
+                label_text = _format_labels(self.labelnames, labels, [('le', _format_value(float(bound)))])
+                lines.append(f'{self.name}_bucket{label_text} {cumulative}')
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f'{self.name}_sum{label_text} {_format_value(series[-2])}')
+            lines.append(f'{self.name}_count{label_text} {series[-1]}')
+        return lines
+
+
+class Gauge:
+    """A value read from ``read()`` at scrape time."""
+
+    def __init__(self, name, help, read):
+        self.name = name
+        self.help = help
+        self.read = read
+
+    def render(self):
+        return [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} gauge',
+                f'{self.name} {_format_value(float(self.read()))}']
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def gauge(self, name, help, read):
+        # Re-registering replaces the reader (e.g. when the app is reloaded)
+        with self._lock:
+            self._metrics[name] = Gauge(name, help, read)
+            return self._metrics[name]
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                print(f"Error rendering metric {metric.name}: {str(e)}")
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+# Time spent per stage of handling a message (extract, route, prompt, fallback, advice)
+STAGE_SECONDS = registry.histogram('smartbudget_stage_seconds', 'Time spent in each request stage', ['stage'])
+LLM_SECONDS = registry.histogram('smartbudget_llm_seconds', 'Gemini call latency', ['mode', 'outcome'])
+SEARCH_SECONDS = registry.histogram('smartbudget_search_seconds', 'Web search latency', ['outcome'])
+REQUEST_SECONDS = registry.histogram('smartbudget_http_request_seconds', 'HTTP request latency', ['endpoint'])
+REQUESTS = registry.counter('smartbudget_http_requests_total', 'HTTP requests', ['endpoint', 'status'])
+FALLBACKS = registry.counter('smartbudget_fallbacks_total', 'Replies served by a local fallback', ['reason'])
+ERRORS = registry.counter('smartbudget_errors_total', 'Errors by component', ['component'])
+PREFETCHES = registry.counter('smartbudget_advice_prefetch_total', 'Background savings advice lookups by outcome', ['outcome'])
@@ -0,0 +1,148 @@
+"""Deferred construction of the shared chat model.
+
+Importing ``google.generativeai`` takes most of a second, so nothing imports
+it at module load. The model is built on first use, or ahead of time by
+``warm_up()`` in a background thread while the app is already answering
+messages that the intent router handles locally.
+
+``LLM_PROVIDER`` picks the model: ``gemini`` (default), ``openai`` (any
+OpenAI-compatible chat completions API, OpenRouter by default) or ``stub``
+(the offline FakeGenerativeModel). ``LLM_HEDGE_PROVIDER`` names a second
+provider to also ask when the first has not answered within
+``LLM_HEDGE_AFTER_SECONDS``.
+"""
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+
+from prompt_builder import SYSTEM_INSTRUCTION
+
+MODEL_NAME = 'gemini-1.5-pro'
+
+
+def load_gemini_model():
+    api_key = os.getenv('GOOGLE_API_KEY')
+    if not api_key:
+        raise ValueError("Google API key not found in environment variables")
+
+    # Imported here rather than at the top on purpose
+    import google.generativeai as genai
+    print("Initializing SmartBudget AI with Gemini...")
+    genai.configure(api_key=api_key)
+    model = genai.GenerativeModel(MODEL_NAME, system_instruction=SYSTEM_INSTRUCTION)
+    print("Gemini model initialized successfully")
+    return model
+
+
+def load_openai_model():
+    from llm_providers import OPENROUTER_URL, OpenAICompatibleModel
+    print("Initializing SmartBudget AI with an OpenAI-compatible API...")
+    return OpenAICompatibleModel(
+        os.getenv('LLM_MODEL', 'openai/gpt-3.5-turbo'),
+        base_url=os.getenv('LLM_API_URL', OPENROUTER_URL),
+        api_key=os.getenv('LLM_API_KEY') or os.getenv('OPENROUTER_API_KEY'),
+        pool_size=int(os.getenv('LLM_POOL_SIZE', '16')),
+    )
+
+
+def load_stub_model():
+    from fake_llm import FakeGenerativeModel
+    print("Using the offline stub model")
+    return FakeGenerativeModel(seed=0)
+
+
+PROVIDERS = {
+    'gemini': load_gemini_model,
+    'openai': load_openai_model,
+    'stub': load_stub_model,
+}
+
+
+def load_provider(name):
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown LLM provider {name!r}; expected one of {', '.join(PROVIDERS)}")
+    return PROVIDERS[name]()
+
+
+def load_model():
+    """Build the model configured by LLM_PROVIDER (and LLM_HEDGE_PROVIDER)."""
+    # The provider settings may come from .env like the API keys
+    load_dotenv()
+    model = load_provider(os.getenv('LLM_PROVIDER', 'gemini').lower())
+    hedge_provider = os.getenv('LLM_HEDGE_PROVIDER', '').lower()
+    if hedge_provider:
+        from llm_providers import HedgedModel
+        model = HedgedModel(model, load_provider(hedge_provider),
+                            hedge_after=float(os.getenv('LLM_HEDGE_AFTER_SECONDS', '2')))
+    return model
+
+
+class LazyModel:
+    """Builds a model once, on first ``get()`` or in a ``warm_up()`` thread.
+
+    A failed load is remembered so every request does not retry it; callers
+    get None and fall back to the local implementation.
+    """
+
+    def __init__(self, loader):
+        self.loader = loader
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._thread = None
+        self.model = None
+        self.error = None
+        self.load_seconds = None
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    def warm_up(self):
+        """Start loading in the background; safe to call any number of times."""
+        with self._lock:
+            if self._ready.is_set() or self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._load, name='model-warmup', daemon=True)
+            self._thread.start()
+
+    def get(self, timeout=None):
+        """Return the model, waiting up to ``timeout`` seconds for a warm-up.
+
+        Loads in the calling thread if no warm-up was started. Returns None
+        if loading failed or is still running when the timeout expires.
+        """
+        if not self._ready.is_set():
+            with self._lock:
+                start_here = self._thread is None and not self._ready.is_set()
+                if start_here:
+                    self._thread = threading.current_thread()
+            if start_here:
+                self._load()
+            else:
+                self._ready.wait(timeout)
+        return self.model
+
+    def stats(self):
+        return {
+            "ready": self.ready,
+            "loaded": self.model is not None,
+            "load_seconds": self.load_seconds,
+            "error": str(self.error) if self.error else None,
+        }
+
+    def _load(self):
+        start = time.perf_counter()
+        try:
+            self.model = self.loader()
+        except Exception as e:
+            print(f"Error initializing the chat model: {str(e)}")
+            print("Falling back to local implementation")
+            self.error = e
+        finally:
+            self.load_seconds = time.perf_counter() - start
+            self._ready.set()
+
+
+llm_model = LazyModel(load_model)
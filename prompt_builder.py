@@ -0,0 +1,179 @@
+"""Token-budgeted prompt assembly for the Gemini chat session.
+
+The persona lives in a fixed system instruction instead of being resent in
+every message. The chat session keeps only the raw text of the last few
+turns; older turns are folded into a short rolling summary. Each turn's
+message carries the current financial context, the summary and the user's
+text, and the builder records how many tokens that cost. Only the user's
+text is kept in history, so the context is never sent twice in one request.
+"""
+
+SYSTEM_INSTRUCTION = """You are a friendly and casual financial chatbot named Fin. Act like a helpful friend who's good with money, not a formal advisor. Keep these points in mind:
+
+Your Personality:
+- Super friendly and casual - use "hey", "cool", etc.
+- Chat like a friend texting
+- Keep responses short and sweet (2-3 sentences max per point)
+- Use everyday language, avoid financial jargon
+- Be encouraging and positive
+- Use emojis naturally (1-2 per message)
+- Share quick, practical money tips
+
+When giving financial advice:
+- Break it down simply
+- Use real-life examples
+- Give one main tip at a time
+- Keep numbers simple (round figures)
+- Use ₹ for money values
+- Be encouraging, not judgmental
+
+Remember:
+- Chat casually like a friend
+- Keep it short and simple
+- Be positive and encouraging
+- Use natural, conversational language
+- If topic isn't about money, gently bring it back to finances in a friendly way
+- Never sound like a formal advisor or AI"""
+
+
+def estimate_tokens(text):
+    # Gemini averages roughly four characters per token for English text
+    if not text:
+        return 0
+    return len(text) // 4 + 1
+
+
+def message_text(message):
+    # History entries are Content protos from the SDK or plain dicts
+    parts = message["parts"] if isinstance(message, dict) else message.parts
+    texts = []
+    for part in parts:
+        texts.append(part if isinstance(part, str) else getattr(part, "text", ""))
+    return " ".join(texts)
+
+
+def message_role(message):
+    return message["role"] if isinstance(message, dict) else message.role
+
+
+def shorten(text, limit):
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+class PromptBuilder:
+    __slots__ = ('max_tokens', 'window_turns', 'summary_tokens', 'system_tokens', 'summary_lines',
+                 'last_usage', 'total_prompt_tokens', 'turns')
+
+    def __init__(self, max_tokens=2000, window_turns=4, summary_tokens=200):
+        self.max_tokens = max_tokens
+        self.window_turns = window_turns
+        self.summary_tokens = summary_tokens
+        self.system_tokens = estimate_tokens(SYSTEM_INSTRUCTION)
+        self.summary_lines = []
+        self.last_usage = {}
+        self.total_prompt_tokens = 0
+        self.turns = 0
+
+    @property
+    def summary(self):
+        return "\n".join(self.summary_lines)
+
+    def build(self, user_input, financial_context, chat=None):
+        """Return the message to send for this turn and record its token usage."""
+        history = list(chat.history) if chat is not None else []
+        history = self._fold_old_turns(history, self.window_turns)
+
+        # Sent every turn: history keeps only the raw user text, so a turn
+        # without it would leave the model with no figures at all
+        message = self._compose(user_input, financial_context)
+
+        # Drop further turns into the summary until the request fits the budget
+        history_tokens = sum(estimate_tokens(message_text(m)) for m in history)
+        while history and self.system_tokens + history_tokens + estimate_tokens(message) > self.max_tokens:
+            history = self._fold_old_turns(history, max(len(history) // 2 - 1, 0))
+            history_tokens = sum(estimate_tokens(message_text(m)) for m in history)
+            message = self._compose(user_input, financial_context)
+
+        if chat is not None and len(history) != len(chat.history):
+            chat.history = history
+
+        message_tokens = estimate_tokens(message)
+        self.last_usage = {
+            "system": self.system_tokens,
+            "history": history_tokens,
+            "summary": estimate_tokens(self.summary),
+            "context": estimate_tokens(financial_context),
+            "message": message_tokens,
+            "prompt_tokens": self.system_tokens + history_tokens + message_tokens,
+            "history_turns": len(history) // 2,
+        }
+        self.turns += 1
+        self.total_prompt_tokens += self.last_usage["prompt_tokens"]
+        return message
+
+    def record_turn(self, chat, user_input, response=None):
+        """Store only the raw user text in the chat history after a reply.
+
+        The context and summary sent with a message are needed for that turn
+        only, so keeping them in the session would resend them every turn.
+        """
+        if chat is not None:
+            history = list(chat.history)
+            for i in range(len(history) - 1, -1, -1):
+                if message_role(history[i]) == "user":
+                    history[i] = {"role": "user", "parts": [user_input]}
+                    break
+            chat.history = self._fold_old_turns(history, self.window_turns)
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None and self.last_usage:
+            self.last_usage["reported_prompt_tokens"] = getattr(usage, "prompt_token_count", None)
+            self.last_usage["reported_output_tokens"] = getattr(usage, "candidates_token_count", None)
+
+    def append_turn(self, chat, user_input, reply):
+        """Add a turn that was answered without calling the model."""
+        chat.history = self.with_turn(chat.history, user_input, reply)
+
+    def with_turn(self, history, user_input, reply):
+        """Return ``history`` plus one turn, folded down to the window."""
+        history = list(history)
+        history.append({"role": "user", "parts": [user_input]})
+        history.append({"role": "model", "parts": [reply]})
+        return self._fold_old_turns(history, self.window_turns)
+
+    def stats(self):
+        return {
+            "turns": self.turns,
+            "total_prompt_tokens": self.total_prompt_tokens,
+            "average_prompt_tokens": self.total_prompt_tokens / self.turns if self.turns else 0,
+            "last_turn": dict(self.last_usage),
+        }
+
+    def snapshot(self):
+        return {"summary": list(self.summary_lines), "turns": self.turns, "prompt_tokens": self.total_prompt_tokens}
+
+    def restore(self, snapshot):
+        self.summary_lines = list(snapshot.get("summary", []))
+        self.turns = snapshot.get("turns", 0)
+        self.total_prompt_tokens = snapshot.get("prompt_tokens", 0)
+
+    def _compose(self, user_input, financial_context):
+        sections = []
+        if financial_context is not None:
+            sections.append(f"Financial Context:\n{financial_context}")
+        if self.summary_lines:
+            sections.append(f"Earlier in this conversation:\n{self.summary}")
+        sections.append(f"User's message: {user_input}")
+        return "\n\n".join(sections)
+
+    def _fold_old_turns(self, history, keep_turns):
+        # History alternates user/model messages; fold whole turns from the front
+        while len(history) > keep_turns * 2 and len(history) >= 2:
+            user_message, model_message = history[0], history[1]
+            history = history[2:]
+            self.summary_lines.append(
+                f"- User: {shorten(message_text(user_message), 80)} | Fin: {shorten(message_text(model_message), 80)}"
+            )
+        while self.summary_lines and estimate_tokens(self.summary) > self.summary_tokens:
+            self.summary_lines.pop(0)
+        return history
@@ -0,0 +1,128 @@
+import os
+import threading
+import time
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """Stops calling a failing dependency until a probe call succeeds again.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    ``allow_request`` returns False, so callers serve their fallback at once.
+    Once ``reset_timeout`` seconds have passed a single probe is let through
+    (half-open); its success closes the breaker, its failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened_at = None
+        self._probe_in_flight = False
+        self.consecutive_failures = 0
+        self.successes = 0
+        self.failures = 0
+        self.rejected = 0
+        self.times_opened = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def allow_request(self):
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.successes += 1
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+            self._state = CLOSED
+            self._opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            was_probe = self._probe_in_flight
+            self._probe_in_flight = False
+            tripped = self._state == CLOSED and self.consecutive_failures >= self.failure_threshold
+            if was_probe or tripped:
+                self._state = OPEN
+                self._opened_at = self.clock()
+                self.times_opened += 1
+
+    def release_probe(self):
+        """Let another probe through when this one ended without an outcome
+        (e.g. the client went away mid-stream); the state is unchanged."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def reset(self):
+        with self._lock:
+            self._state = CLOSED
+            self._opened_at = None
+            self._probe_in_flight = False
+            self.consecutive_failures = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "state": self._current_state(),
+                "consecutive_failures": self.consecutive_failures,
+                "successes": self.successes,
+                "failures": self.failures,
+                "rejected": self.rejected,
+                "times_opened": self.times_opened,
+            }
+
+    def _current_state(self):
+        if self._state == OPEN and self.clock() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+        return self._state
+
+
+class LatencyBudget:
+    """Per-request time allowance for the model call.
+
+    ``timeout`` caps a single model call; ``budget`` caps the whole turn, so
+    time already spent (prompt building, cache lookups) shortens the call's
+    timeout. Calls slower than the budget count as failures for the breaker.
+    """
+
+    def __init__(self, timeout=None, budget=None):
+        self.timeout = timeout if timeout is not None else float(os.getenv('LLM_TIMEOUT_SECONDS', '10'))
+        self.budget = budget if budget is not None else float(os.getenv('LLM_LATENCY_BUDGET_SECONDS', '12'))
+
+    def remaining(self, started_at):
+        return max(min(self.timeout, self.budget - (time.monotonic() - started_at)), 0.05)
+
+    def request_options(self, started_at):
+        return {'timeout': self.remaining(started_at)}
+
+    def exceeded(self, started_at):
+        return time.monotonic() - started_at > self.budget
+
+
+# Sessions that do not pass their own budget share this one
+default_latency_budget = LatencyBudget()
+
+# One breaker per process: the model is shared by every session
+gemini_breaker = CircuitBreaker(
+    failure_threshold=int(os.getenv('LLM_BREAKER_FAILURES', '5')),
+    reset_timeout=float(os.getenv('LLM_BREAKER_RESET_SECONDS', '30'))
+)
@@ -0,0 +1,121 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# Messages carrying amounts, contact details or names are about one person and
+# are never shared through the cache
+PERSONAL_DATA_PATTERN = re.compile(
+    r"\d|@|(?:my name is|\bi am\b|\bi'm\b|call me)",
+    re.IGNORECASE
+)
+NON_WORD_PATTERN = re.compile(r"[^\w\s₹]+")
+# Follow-ups like "why?", "tell me more" or "yes" only make sense after the
+# previous turn, which the key does not cover, so they are never shared either
+FOLLOW_UP_PATTERN = re.compile(
+    r"\b(?:it|its|that|this|these|those|them|they|more|why|yes|no|ok|okay|sure|"
+    r"again|else|same|above|previous|instead|then)\b"
+)
+MIN_CACHED_WORDS = 3
+
+
+def normalize_message(text):
+    text = NON_WORD_PATTERN.sub(" ", text.lower())
+    return " ".join(text.split())
+
+
+def is_follow_up(normalized):
+    return len(normalized.split()) < MIN_CACHED_WORDS or FOLLOW_UP_PATTERN.search(normalized) is not None
+
+
+def financial_fingerprint(user_data, expenses):
+    # Hash the same data format_financial_context renders, in a stable order
+    payload = json.dumps(
+        [sorted(user_data.items()), sorted(expenses.items())],
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Size-bounded LRU cache of model replies with per-entry TTLs."""
+
+    def __init__(self, max_entries=5000, ttl_seconds=3600, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        # key -> (reply, expires_at); ordered oldest access first
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.skipped = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def make_key(self, user_input, user_data, expenses):
+        """Return the cache key for a message, or None if it must not be cached."""
+        normalized = normalize_message(user_input)
+        if not normalized:
+            return None
+        if PERSONAL_DATA_PATTERN.search(user_input) or is_follow_up(normalized):
+            with self._lock:
+                self.skipped += 1
+            return None
+        return f"{normalized}|{financial_fingerprint(user_data, expenses)}"
+
+    def get(self, key):
+        if key is None:
+            return None
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] < now:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, reply, ttl_seconds=None):
+        if key is None or not reply:
+            return
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            self._entries[key] = (reply, self.clock() + ttl)
+            self._entries.move_to_end(key)
+            self.stores += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stores": self.stores,
+                "skipped": self.skipped,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,110 @@
+"""Production entry point for the SmartBudget AI web app.
+
+Runs app.py under gunicorn with threaded (gthread) workers. A request waiting
+on Gemini holds one thread, not the whole worker: the SDK releases the GIL
+while it waits on the network, so each worker serves WEB_THREADS requests at
+once.
+
+    python serve.py                          # 1 worker x 64 threads on :8000
+    python serve.py --workers 4 --threads 64
+
+Sessions live in each worker's memory. With more than one worker,
+SESSION_DB_PATH must point at a shared SQLite file. Every request then checks
+the stored session version and reloads sessions that another worker has
+updated. Writes become visible to other workers after SESSION_FLUSH_SECONDS,
+which defaults to 0.05 here. If two workers update the same session within
+that window, the write that lands second is rejected (see session_storage),
+so that worker reloads the session and that turn is not kept. Route each
+session to one worker (sticky sessions) to avoid losing turns this way.
+
+If gunicorn is not installed, this falls back to Werkzeug's threaded server
+(single process, no debugger or reloader).
+"""
+import argparse
+import importlib
+import os
+import sys
+
+
+def build_options(args):
+    return {
+        'bind': args.bind,
+        'workers': args.workers,
+        'threads': args.threads,
+        'worker_class': 'gthread',
+        'timeout': args.timeout,
+        'keepalive': 5,
+        'accesslog': '-' if args.access_log else None,
+        # Each worker imports the app itself so storage connections and
+        # background threads are never shared across a fork
+        'preload_app': False,
+        'post_worker_init': warm_up_worker,
+    }
+
+
+def warm_up_worker(worker):
+    from model_loader import llm_model
+    llm_model.warm_up()
+
+
+def run_gunicorn(app_uri, options):
+    from gunicorn.app.base import BaseApplication
+    from gunicorn.util import import_app
+
+    class SmartBudgetApplication(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                if value is not None:
+                    self.cfg.set(key, value)
+
+        def load(self):
+            return import_app(app_uri)
+
+    SmartBudgetApplication().run()
+
+
+def load_app(app_uri):
+    # Same "module:attribute" / "module:factory()" forms gunicorn accepts
+    module_name, _, attribute = app_uri.partition(':')
+    target = getattr(importlib.import_module(module_name), (attribute or 'app').rstrip('()'))
+    return target() if attribute.endswith('()') else target
+
+
+def run_werkzeug(app_uri, args):
+    from werkzeug.serving import run_simple
+    from model_loader import llm_model
+    host, _, port = args.bind.rpartition(':')
+    app = load_app(app_uri)
+    llm_model.warm_up()
+    run_simple(host or '0.0.0.0', int(port), app, threaded=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve SmartBudget AI in production mode")
+    parser.add_argument('--app', default='app:app', help='WSGI app as module:attribute')
+    parser.add_argument('--bind', default=os.getenv('BIND', '0.0.0.0:8000'))
+    parser.add_argument('--workers', type=int, default=int(os.getenv('WEB_WORKERS', '1')))
+    parser.add_argument('--threads', type=int, default=int(os.getenv('WEB_THREADS', '64')))
+    parser.add_argument('--timeout', type=int, default=int(os.getenv('WEB_TIMEOUT', '60')))
+    parser.add_argument('--access-log', action='store_true')
+    args = parser.parse_args(argv)
+
+    if args.workers > 1:
+        if not os.getenv('SESSION_DB_PATH'):
+            parser.error("--workers > 1 needs SESSION_DB_PATH so workers can share sessions")
+        os.environ['SESSION_REVALIDATE'] = '1'
+        os.environ.setdefault('SESSION_FLUSH_SECONDS', '0.05')
+
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        if args.workers > 1:
+            parser.error("gunicorn is required for --workers > 1 (pip install gunicorn)")
+        print("gunicorn is not installed; falling back to Werkzeug's threaded server")
+        run_werkzeug(args.app, args)
+        return
+    run_gunicorn(args.app, build_options(args))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
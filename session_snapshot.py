@@ -0,0 +1,76 @@
+"""Compact, self-contained snapshots of a chatbot session.
+
+``SmartBudgetAIChatbot.snapshot()`` returns plain JSON-able data: the
+profile, greeting time, Gemini history, prompt summary, recent turns and the
+ledger columns. These helpers turn it into bytes (compact JSON, zlib
+compressed) that any worker process can restore, so sessions do not need
+sticky routing. ``validate_snapshot`` checks the shape of one that came from
+outside before it is restored.
+"""
+import json
+import zlib
+
+SNAPSHOT_VERSION = 1
+
+HISTORY_ROLES = ('user', 'model')
+TURN_ROLES = ('user', 'assistant')
+LEDGER_COLUMNS = ('amounts', 'codes', 'timestamps', 'user_ids')
+
+
+def encode_snapshot(snapshot, level=6):
+    data = json.dumps(snapshot, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    return zlib.compress(data, level)
+
+
+def decode_snapshot(data):
+    return json.loads(zlib.decompress(data).decode('utf-8'))
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _check(condition, message):
+    if not condition:
+        raise ValueError(message)
+
+
+def _check_messages(messages, roles, name):
+    _check(isinstance(messages, list), f"{name} must be a list")
+    for message in messages:
+        _check(isinstance(message, list) and len(message) == 2 and message[0] in roles
+               and isinstance(message[1], str), f"{name} entries must be [role, text] with role in {roles}")
+
+
+def validate_snapshot(snapshot):
+    """Raise ValueError unless ``snapshot`` has the shape snapshot() produces."""
+    _check(isinstance(snapshot, dict), "Snapshot must be an object")
+    _check(snapshot.get("v") == SNAPSHOT_VERSION, f"Unsupported snapshot version: {snapshot.get('v')!r}")
+    profile = snapshot.get("profile")
+    _check(isinstance(profile, dict), "profile must be an object")
+    _check(profile.get("user_name") is None or isinstance(profile["user_name"], str), "user_name must be a string")
+    for field in ("user_data", "expenses"):
+        values = profile.get(field, {})
+        _check(isinstance(values, dict) and all(isinstance(key, str) and _is_number(value)
+                                                for key, value in values.items()),
+               f"{field} must map names to numbers")
+    greeted_at = snapshot.get("greeted_at")
+    _check(greeted_at is None or (_is_number(greeted_at) and 0 <= greeted_at < 1e11),
+           "greeted_at must be a Unix timestamp")
+    _check_messages(snapshot.get("history", []), HISTORY_ROLES, "history")
+    prompt = snapshot.get("prompt", {})
+    _check(isinstance(prompt, dict), "prompt must be an object")
+    summary = prompt.get("summary", [])
+    _check(isinstance(summary, list) and all(isinstance(line, str) for line in summary),
+           "prompt summary must be a list of strings")
+    _check(all(_is_number(prompt.get(key, 0)) for key in ("turns", "prompt_tokens")), "prompt counts must be numbers")
+    if "turns" in snapshot:
+        _check_messages(snapshot["turns"], TURN_ROLES, "turns")
+    if "ledger" in snapshot:
+        ledger = snapshot["ledger"]
+        _check(isinstance(ledger, dict), "ledger must be an object")
+        categories = ledger.get("categories")
+        _check(isinstance(categories, list) and all(isinstance(name, str) for name in categories),
+               "ledger categories must be a list of strings")
+        _check(all(isinstance(ledger.get(column), str) for column in LEDGER_COLUMNS),
+               "ledger columns must be base64 strings")
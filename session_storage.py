@@ -0,0 +1,247 @@
+"""Durable storage behind the in-memory SessionStore.
+
+A storage backend has three calls:
+
+* ``load(session_id)`` returns the saved record (``state`` dict, ``ledger``
+  rows, recent ``turns``) or None;
+* ``save(session_id, changes)`` takes what a session changed since its last
+  save: ``{'state': ..., 'version': n, 'ledger': [...], 'turns': [...]}``;
+* ``version(session_id)`` returns the latest saved version, so a worker can
+  tell that another process has updated a session it holds in memory.
+* ``conflicted(session_id)`` is True once a save lost a race with another
+  process (see below) and until the session is loaded again.
+
+SQLiteStorage keeps the request path off the disk: ``save`` only queues the
+changes, and a background writer flushes them in batched transactions.
+
+Each save builds on the version it was loaded at. The flush only writes it
+if the stored version is still that one (compare-and-set), so when two
+worker processes update the same session at once, the second write is
+dropped instead of silently replacing the first. The losing worker's
+session is then marked conflicted; it drops further saves until the
+session is reloaded from storage.
+"""
+import json
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ledger_entries (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    amount REAL NOT NULL,
+    category TEXT NOT NULL,
+    timestamp INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ledger_entries_session ON ledger_entries (session_id, id);
+CREATE TABLE IF NOT EXISTS turns (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS turns_session ON turns (session_id, id);
+"""
+
+
+class SQLiteStorage:
+    """SQLite (WAL mode) session storage with write-behind batching.
+
+    Saves are queued in memory; session state is coalesced per session so
+    only the latest version is written. The writer thread flushes every
+    ``flush_interval`` seconds, or sooner once ``batch_size`` rows are
+    waiting. Loading a session that still has queued writes flushes first.
+    """
+
+    def __init__(self, path, flush_interval=0.5, batch_size=500, max_turns=20):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_turns = max_turns
+        self._writer = self._connect()
+        self._writer.executescript(SCHEMA)
+        columns = [row[1] for row in self._writer.execute("PRAGMA table_info(sessions)")]
+        if 'version' not in columns:
+            self._writer.execute("ALTER TABLE sessions ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        self._writer.commit()
+        self._reader = self._connect()
+        self._write_lock = threading.Lock()
+        self._read_lock = threading.Lock()
+        self._pending_lock = threading.Condition()
+        self._pending_states = {}
+        self._pending_ledger = []
+        self._pending_turns = []
+        self._pending_ids = set()
+        self._conflicts = set()
+        self._closed = False
+        self.metrics = {'saves': 0, 'flushes': 0, 'rows_written': 0, 'loads': 0, 'load_misses': 0,
+                        'conflicts': 0, 'dropped_saves': 0}
+        self._thread = threading.Thread(target=self._run, name='session-writer', daemon=True)
+        self._thread.start()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        # WAL with synchronous=NORMAL only fsyncs at checkpoints
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def save(self, session_id, changes):
+        now = time.time()
+        with self._pending_lock:
+            self.metrics['saves'] += 1
+            if session_id in self._conflicts:
+                # Built on state another worker has replaced
+                self.metrics['dropped_saves'] += 1
+                return
+            if changes.get('state') is not None:
+                version = changes.get('version', 0)
+                queued = self._pending_states.get(session_id)
+                # Coalesced saves still build on the first one's stored version
+                base = queued[1] if queued is not None else version - 1
+                self._pending_states[session_id] = (json.dumps(changes['state']), base, version, now)
+            for amount, category, timestamp in changes.get('ledger', ()):
+                self._pending_ledger.append((session_id, amount, category, timestamp))
+            for role, content in changes.get('turns', ()):
+                self._pending_turns.append((session_id, role, content, now))
+            self._pending_ids.add(session_id)
+            if self._pending_size() >= self.batch_size:
+                self._pending_lock.notify()
+
+    def load(self, session_id):
+        with self._pending_lock:
+            pending = session_id in self._pending_ids
+            self._conflicts.discard(session_id)
+        if pending:
+            self.flush()
+        with self._read_lock:
+            self.metrics['loads'] += 1
+            row = self._reader.execute(
+                "SELECT state, version FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is None:
+                self.metrics['load_misses'] += 1
+                return None
+            ledger = self._reader.execute(
+                "SELECT amount, category, timestamp FROM ledger_entries WHERE session_id = ? ORDER BY id",
+                (session_id,)
+            ).fetchall()
+            turns = self._reader.execute(
+                "SELECT role, content FROM turns WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+                (session_id, self.max_turns)
+            ).fetchall()
+        turns.reverse()
+        return {'state': json.loads(row[0]), 'version': row[1], 'ledger': ledger, 'turns': turns}
+
+    def version(self, session_id):
+        """Return the newest version saved by anyone, or None if never saved."""
+        with self._pending_lock:
+            pending = self._pending_states.get(session_id)
+            if pending is not None:
+                return pending[2]
+        with self._read_lock:
+            row = self._reader.execute(
+                "SELECT version FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def conflicted(self, session_id):
+        with self._pending_lock:
+            return session_id in self._conflicts
+
+    def delete(self, session_id):
+        self.flush()
+        with self._write_lock:
+            with self._writer:
+                for table in ('sessions', 'ledger_entries', 'turns'):
+                    self._writer.execute(f"DELETE FROM {table} WHERE session_id = ?", (session_id,))
+
+    def flush(self):
+        """Write everything queued so far in one transaction."""
+        with self._pending_lock:
+            states, self._pending_states = self._pending_states, {}
+            ledger, self._pending_ledger = self._pending_ledger, []
+            turns, self._pending_turns = self._pending_turns, []
+            self._pending_ids = set()
+        if not (states or ledger or turns):
+            return 0
+        conflicts = set()
+        with self._write_lock:
+            with self._writer:
+                for session_id, (state, base, version, updated_at) in states.items():
+                    cursor = self._writer.execute(
+                        "UPDATE sessions SET state = ?, version = ?, updated_at = ? WHERE session_id = ? AND version = ?",
+                        (state, version, updated_at, session_id, base)
+                    )
+                    if cursor.rowcount == 0 and base <= 0:
+                        cursor = self._writer.execute(
+                            "INSERT OR IGNORE INTO sessions (session_id, state, version, updated_at) VALUES (?, ?, ?, ?)",
+                            (session_id, state, version, updated_at)
+                        )
+                    if cursor.rowcount == 0:
+                        conflicts.add(session_id)
+                if conflicts:
+                    ledger = [row for row in ledger if row[0] not in conflicts]
+                    turns = [row for row in turns if row[0] not in conflicts]
+                self._writer.executemany(
+                    "INSERT INTO ledger_entries (session_id, amount, category, timestamp) VALUES (?, ?, ?, ?)",
+                    ledger
+                )
+                self._writer.executemany(
+                    "INSERT INTO turns (session_id, role, content, created_at) VALUES (?, ?, ?, ?)",
+                    turns
+                )
+        written = len(states) - len(conflicts) + len(ledger) + len(turns)
+        with self._pending_lock:
+            self.metrics['flushes'] += 1
+            self.metrics['rows_written'] += written
+            if conflicts:
+                print(f"Dropped saves for {len(conflicts)} session(s) updated by another worker")
+                self.metrics['conflicts'] += len(conflicts)
+                self._conflicts |= conflicts
+                # Anything queued since builds on the same replaced state
+                for session_id in conflicts:
+                    self._pending_states.pop(session_id, None)
+                self._pending_ledger = [row for row in self._pending_ledger if row[0] not in conflicts]
+                self._pending_turns = [row for row in self._pending_turns if row[0] not in conflicts]
+        return written
+
+    def close(self):
+        with self._pending_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._pending_lock.notify()
+        self._thread.join()
+        self.flush()
+        self._writer.close()
+        self._reader.close()
+
+    def stats(self):
+        with self._pending_lock:
+            stats = dict(self.metrics)
+            stats['pending_rows'] = self._pending_size()
+        return stats
+
+    def _pending_size(self):
+        return len(self._pending_states) + len(self._pending_ledger) + len(self._pending_turns)
+
+    def _run(self):
+        while True:
+            with self._pending_lock:
+                if not self._closed and self._pending_size() < self.batch_size:
+                    self._pending_lock.wait(self.flush_interval)
+                if self._closed:
+                    return
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                print(f"Error flushing sessions: {str(e)}")
@@ -0,0 +1,144 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class SessionStore:
+    """Keeps one chatbot state per session id, bounded by count and idle time.
+
+    Sessions are created on demand by ``factory``. The least recently used
+    session is evicted once ``max_sessions`` is reached, and sessions that
+    have been idle for longer than ``ttl_seconds`` are dropped on access.
+
+    With a ``storage`` backend (see session_storage) evicted or restarted
+    sessions are rehydrated via ``state.restore(record)``, and ``save()``
+    hands ``state.checkpoint()`` to the backend. When several worker
+    processes share the storage, ``revalidate`` makes every hit compare the
+    in-memory ``state.version`` with the stored one and reload stale state,
+    or state whose save lost a race with another process.
+    """
+
+    def __init__(self, factory, max_sessions=10000, ttl_seconds=1800, clock=time.monotonic, storage=None,
+                 revalidate=False):
+        if max_sessions < 1:
+            raise ValueError("max_sessions must be at least 1")
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.storage = storage
+        self.revalidate = revalidate and storage is not None
+        # session_id -> [state, last_access]; ordered oldest access first
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.reloads = 0
+
+    def get(self, session_id):
+        """Return the state for ``session_id``, creating it if needed."""
+        now = self.clock()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None and not self._is_expired(entry, now):
+                entry[1] = now
+                self._sessions.move_to_end(session_id)
+                self.hits += 1
+                if not self.revalidate:
+                    return entry[0]
+                cached = entry[0]
+            else:
+                cached = None
+                if entry is not None:
+                    del self._sessions[session_id]
+                    self.expirations += 1
+                self.misses += 1
+
+        if cached is not None:
+            stored_version = self.storage.version(session_id)
+            if not self.storage.conflicted(session_id) and (stored_version is None
+                                                            or stored_version <= cached.version):
+                return cached
+            # Another worker saved a newer version, or won a race to save
+            # over this one; rebuild from storage
+            with self._lock:
+                self.reloads += 1
+                if self._sessions.get(session_id, [None])[0] is cached:
+                    del self._sessions[session_id]
+
+        # Build outside the lock so a slow factory does not stall other users
+        state = self.factory()
+        if self.storage is not None:
+            record = self.storage.load(session_id)
+            if record is not None:
+                state.restore(record)
+
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None:
+                # Another request created this session while we were building
+                entry[1] = now
+                self._sessions.move_to_end(session_id)
+                return entry[0]
+            self._sessions[session_id] = [state, now]
+            self._prune(now)
+            return state
+
+    def save(self, session_id, state):
+        """Queue ``state``'s changes with the storage backend, if there is one."""
+        if self.storage is not None:
+            self.storage.save(session_id, state.checkpoint())
+
+    def peek(self, session_id):
+        """Return the state for ``session_id`` without creating or touching it."""
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None or self._is_expired(entry, self.clock()):
+                return None
+            return entry[0]
+
+    def drop(self, session_id):
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "reloads": self.reloads,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def __contains__(self, session_id):
+        return self.peek(session_id) is not None
+
+    def _is_expired(self, entry, now):
+        return self.ttl_seconds is not None and now - entry[1] > self.ttl_seconds
+
+    def _prune(self, now):
+        # Oldest entries sit at the front, so expired ones can be swept from there
+        while self._sessions:
+            oldest_id, oldest = next(iter(self._sessions.items()))
+            if not self._is_expired(oldest, now):
+                break
+            del self._sessions[oldest_id]
+            self.expirations += 1
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evictions += 1
@@ -0,0 +1,95 @@
+import threading
+import time
+from admission import GLOBAL_RATE, QUEUE_FULL, QUEUE_TIMEOUT, SESSION_RATE, SHED, AdmissionController, TokenBucket
+from chatbot import SmartBudgetAIChatbot
+from fake_clock import FakeClock
+from fake_llm import FakeGenerativeModel
+
+def test_token_bucket_refills_at_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=3, clock=clock)
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+    clock.now = 0.5
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+    clock.now = 100
+    assert bucket.tokens == 0 and bucket.try_acquire() and bucket.tokens == 2
+
+def test_session_and_global_limits():
+    clock = FakeClock()
+    admission = AdmissionController(rate=1, burst=3, session_rate=1, session_burst=2, clock=clock)
+    alice, bob = admission.session_bucket(), admission.session_bucket()
+    outcomes = []
+    for bucket in (alice, alice, alice, bob, bob):
+        reason = admission.admit(bucket)
+        if reason is None:
+            admission.release()
+        outcomes.append(reason)
+    assert outcomes == [None, None, SESSION_RATE, None, GLOBAL_RATE]
+    # The global refusal did not use up bob's session token
+    clock.now = 1
+    assert admission.admit(bob) is None
+    assert admission.stats()["refused"][GLOBAL_RATE] == 1
+
+def test_queue_prefers_short_messages_and_sheds():
+    admission = AdmissionController(rate=0, session_rate=0, max_concurrent=1, max_queue=1, queue_timeout=5)
+    assert admission.admit() is None  # holds the only slot
+    results = {}
+
+    def wait(name, priority):
+        results[name] = admission.admit(priority=priority)
+
+    long_waiter = threading.Thread(target=wait, args=("long", 1))
+    long_waiter.start()
+    while admission.waiting == 0:
+        time.sleep(0.001)
+    # A full queue turns away an equal-priority caller...
+    assert admission.admit(priority=1) == QUEUE_FULL
+    # ...but a short message pushes out the long one
+    short_waiter = threading.Thread(target=wait, args=("short", 0))
+    short_waiter.start()
+    long_waiter.join(2)
+    assert results["long"] == SHED
+    admission.release()
+    short_waiter.join(2)
+    assert results["short"] is None
+    admission.release()
+    assert admission.stats()["active"] == 0
+
+def test_queue_timeout():
+    admission = AdmissionController(rate=0, session_rate=0, max_concurrent=1, max_queue=4)
+    assert admission.admit() is None
+    start = time.perf_counter()
+    assert admission.admit(timeout=0.05) == QUEUE_TIMEOUT
+    assert time.perf_counter() - start < 0.5
+    admission.release()
+
+def test_refused_calls_get_fast_local_answer():
+    model = FakeGenerativeModel(latency=0.01)
+    admission = AdmissionController(rate=0, session_rate=1, session_burst=2)
+    bot = SmartBudgetAIChatbot(model=model, admission=admission)
+    for i in range(4):
+        assert bot.get_ai_response(f"How do mutual funds work, part {i}?")
+    chunks = list(bot.stream_ai_response("And index funds?"))
+    assert len(chunks) == 1 and chunks[0]
+    assert model.calls == 2
+    stats = admission.stats()
+    assert stats["refused"][SESSION_RATE] == 3
+    assert stats["active"] == 0  # every admitted call gave its slot back
+
+def test_stream_releases_slot_when_client_stops():
+    admission = AdmissionController(rate=0, session_rate=0, max_concurrent=1)
+    bot = SmartBudgetAIChatbot(model=FakeGenerativeModel(chunk_words=1), admission=admission)
+    stream = bot.stream_ai_response("How do mutual funds work?")
+    next(stream)
+    assert admission.stats()["active"] == 1
+    stream.close()
+    assert admission.stats()["active"] == 0
+
+if __name__ == "__main__":
+    test_token_bucket_refills_at_rate()
+    test_session_and_global_limits()
+    test_queue_prefers_short_messages_and_sheds()
+    test_queue_timeout()
+    test_refused_calls_get_fast_local_answer()
+    test_stream_releases_slot_when_client_stops()
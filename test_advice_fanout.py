@@ -0,0 +1,47 @@
+import time
+import web_search
+from bank_policy_suggestions import BankPolicySuggestions
+from financial_analysis import FinancialAnalysis
+
+class SlowTaxBackend(web_search.StubSearchBackend):
+    # Tax queries take far longer than the deadline; everything else is quick
+    def __call__(self, query):
+        if "tax" in query:
+            time.sleep(1.0)
+        else:
+            time.sleep(0.2)
+        return super().__call__(query)
+
+def run_with_backend(backend, test):
+    # A lookup left running past its deadline fills this test's own cache,
+    # not the one later tests use
+    previous_backend, previous_cache = web_search.search_backend, web_search.advice_cache
+    web_search.set_search_backend(backend)
+    web_search.advice_cache = web_search.AdviceCache()
+    try:
+        test()
+    finally:
+        web_search.set_search_backend(previous_backend)
+        web_search.advice_cache = previous_cache
+
+def test_lookups_run_concurrently():
+    def check():
+        start = time.perf_counter()
+        response = FinancialAnalysis().suggest_savings(remaining_balance=5000, savings_goal=8000, deadline=2.0)
+        assert "short of your savings goal" in response
+        assert time.perf_counter() - start < 0.55  # one lookup's latency, not two
+    run_with_backend(web_search.StubSearchBackend(latency=0.3), check)
+
+def test_deadline_falls_back_per_section():
+    def check():
+        start = time.perf_counter()
+        response = BankPolicySuggestions().suggest_policies(20000, deadline=0.5)
+        assert time.perf_counter() - start < 0.8
+        banking, tax = response.split("💰 Tax Saving Options:\n")
+        assert "recurring deposit or SIP" in banking
+        assert tax == web_search.get_fallback_advice("best tax saving investment options india")
+    run_with_backend(SlowTaxBackend(), check)
+
+if __name__ == "__main__":
+    test_lookups_run_concurrently()
+    test_deadline_falls_back_per_section()
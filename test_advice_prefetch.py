@@ -0,0 +1,126 @@
+import threading
+import web_search
+from advice_prefetch import AdvicePrefetcher
+from chatbot import SmartBudgetAIChatbot
+from fake_llm import FakeGenerativeModel
+from metrics import PREFETCHES
+
+class GatedAdvice:
+    # Stands in for both advice sources; lookups block until the gate opens
+    def __init__(self):
+        self.gate = threading.Event()
+        self.savings_calls = []
+        self.policy_calls = []
+
+    def suggest_savings(self, remaining_balance, savings_goal, deadline=None):
+        self.savings_calls.append((remaining_balance, savings_goal))
+        self.gate.wait(2)
+        return f"Savings plan for {savings_goal:,.0f}"
+
+    def suggest_policies(self, savings_goal, deadline=None):
+        self.policy_calls.append(savings_goal)
+        self.gate.wait(2)
+        return f"Bank products for {savings_goal:,.0f}"
+
+class GatedSearchBackend(web_search.StubSearchBackend):
+    def __init__(self):
+        super().__init__()
+        self.gate = threading.Event()
+
+    def __call__(self, query):
+        self.gate.wait(2)
+        return super().__call__(query)
+
+def test_savings_question_answered_from_prefetch():
+    backend = GatedSearchBackend()
+    previous_backend, previous_cache = web_search.search_backend, web_search.advice_cache
+    web_search.set_search_backend(backend)
+    # An empty cache of its own, so every lookup reaches the gated backend
+    web_search.advice_cache = web_search.AdviceCache()
+    try:
+        model = FakeGenerativeModel()
+        bot = SmartBudgetAIChatbot(model=model, prefetcher=AdvicePrefetcher())
+        bot.process_input("My income is 50000")
+        bot.process_input("I spend 20000 on rent")
+        bot.process_input("I want to save 10000 every month")
+        # The lookups started with the goal, before any question
+        assert not bot.savings_advice.wait(0)
+        backend.gate.set()
+        assert bot.savings_advice.wait(2)
+        ready = PREFETCHES.value("ready")
+        reply = bot.process_input("What should I do with my savings?")
+        assert PREFETCHES.value("ready") == ready + 1
+        assert "surplus of ₹20,000.00" in reply and "Banking Recommendations" in reply
+        assert model.calls == 0
+    finally:
+        web_search.set_search_backend(previous_backend)
+        web_search.advice_cache = previous_cache
+
+def test_goal_change_cancels_stale_lookups():
+    advice = GatedAdvice()
+    bot = SmartBudgetAIChatbot(model=FakeGenerativeModel(),
+                               prefetcher=AdvicePrefetcher(max_workers=1, analysis=advice, policies=advice))
+    bot.process_input("My income is 50000")
+    bot.process_input("I want to save 5000 every month")
+    bot.process_input("Actually I want to save 8000 every month")
+    advice.gate.set()
+    reply = bot.get_savings_advice()
+    assert reply == "Savings plan for 8,000\n\nBank products for 8,000"
+    # The queued policy lookup for the old goal never ran
+    assert advice.policy_calls == [8000]
+
+def test_expenses_after_goal_do_not_start_lookups():
+    advice = GatedAdvice()
+    advice.gate.set()
+    bot = SmartBudgetAIChatbot(model=FakeGenerativeModel(),
+                               prefetcher=AdvicePrefetcher(analysis=advice, policies=advice))
+    bot.process_input("My income is 50000")
+    bot.process_input("I want to save 10000 every month")
+    for category in ("rent", "food", "travel", "shopping", "entertainment"):
+        bot.process_input(f"I spend 2000 on {category}")
+    assert bot.savings_advice.wait(2)
+    assert advice.savings_calls == [(50000, 10000)] and advice.policy_calls == [10000]
+    # The balance moved since the prefetch, so asking redoes that one lookup
+    assert bot.get_savings_advice() == "Savings plan for 10,000\n\nBank products for 10,000"
+    assert advice.savings_calls == [(50000, 10000), (40000, 10000)] and advice.policy_calls == [10000]
+
+def test_prefetches_skipped_when_pool_is_backed_up():
+    advice = GatedAdvice()
+    prefetcher = AdvicePrefetcher(max_workers=1, max_pending=1, analysis=advice, policies=advice)
+    bot = SmartBudgetAIChatbot(model=FakeGenerativeModel(), prefetcher=prefetcher)
+    bot.process_input("My income is 50000")
+    bot.process_input("I want to save 10000 every month")
+    assert prefetcher.pending == 1  # the second lookup was not queued
+    advice.gate.set()
+    assert bot.savings_advice.wait(2)
+    # Asking retries the lookup that was skipped
+    assert bot.get_savings_advice() == "Savings plan for 10,000\n\nBank products for 10,000"
+    assert prefetcher.pending == 0
+
+def test_without_goal_question_goes_to_model():
+    advice = GatedAdvice()
+    model = FakeGenerativeModel()
+    bot = SmartBudgetAIChatbot(model=model, prefetcher=AdvicePrefetcher(analysis=advice, policies=advice))
+    bot.process_input("My income is 50000")
+    bot.process_input("What should I do with my savings?")
+    assert model.calls == 1
+    assert advice.savings_calls == [] and advice.policy_calls == []
+
+def test_specific_savings_questions_go_to_model():
+    advice = GatedAdvice()
+    advice.gate.set()
+    model = FakeGenerativeModel()
+    bot = SmartBudgetAIChatbot(model=model, prefetcher=AdvicePrefetcher(analysis=advice, policies=advice))
+    bot.process_input("My income is 50000")
+    bot.process_input("I want to save 10000 every month")
+    bot.process_input("How should I save for my daughter's wedding in 10 years?")
+    bot.process_input("Is it better to invest my savings in gold or an FD given inflation?")
+    assert model.calls == 2
+
+if __name__ == "__main__":
+    test_savings_question_answered_from_prefetch()
+    test_goal_change_cancels_stale_lookups()
+    test_expenses_after_goal_do_not_start_lookups()
+    test_prefetches_skipped_when_pool_is_backed_up()
+    test_without_goal_question_goes_to_model()
+    test_specific_savings_questions_go_to_model()
@@ -0,0 +1,103 @@
+import json
+import threading
+import time
+import app
+from chatbot import SmartBudgetAIChatbot
+from fake_llm import FakeGenerativeModel
+from resilience import CircuitBreaker
+from session_store import SessionStore
+
+def echo_model(latency=0.0):
+    # Replies with the question so results can be matched to inputs
+    return FakeGenerativeModel(responder=lambda prompt: prompt.rsplit("User's message: ", 1)[-1], latency=latency)
+
+def make_bot(latency=0.0):
+    return SmartBudgetAIChatbot(model=echo_model(latency), breaker=CircuitBreaker())
+
+def test_sessions_run_concurrently_in_order():
+    bots = {}
+    def get_session(session_id):
+        return bots.setdefault(session_id, make_bot(latency=0.1))
+
+    items = [{"session": f"s{i % 4}", "input": f"Question {i} for session {i % 4}?"} for i in range(12)]
+    start = time.perf_counter()
+    results = list(SmartBudgetAIChatbot.process_batch(items, get_session=get_session, max_workers=4))
+    elapsed = time.perf_counter() - start
+    print(f"12 model calls over 4 sessions took {elapsed:.2f}s")
+    assert elapsed < 0.8  # sequential would take 1.2s
+    assert sorted(result["index"] for result in results) == list(range(12))
+    for session_id in ("s0", "s1", "s2", "s3"):
+        indexes = [result["index"] for result in results if result["session"] == session_id]
+        assert indexes == sorted(indexes)
+        # Each session's chatbot saw its own messages in order
+        user_turns = [entry["content"] for entry in bots[session_id].conversation_history if entry["role"] == "user"]
+        assert user_turns == [items[i]["input"] for i in indexes]
+    assert all(result["response"] == items[result["index"]]["input"] for result in results)
+
+def test_failures_are_reported_per_item():
+    def get_session(session_id):
+        if session_id == "broken":
+            raise RuntimeError("storage unavailable")
+        return make_bot()
+
+    items = [{"session": "ok", "input": "hi"}, {"session": "broken", "input": "hi"}]
+    results = sorted(SmartBudgetAIChatbot.process_batch(items, get_session=get_session), key=lambda r: r["index"])
+    assert "response" in results[0]
+    assert results[1]["error"] == "storage unavailable"
+
+def test_batch_waits_for_a_turn_on_a_busy_session():
+    bot = make_bot()
+    results = SmartBudgetAIChatbot.process_batch([{"session": "s", "input": "Is gold a good hedge?"}],
+                                                 get_session=lambda session_id: bot)
+    collected = []
+    consumer = threading.Thread(target=lambda: collected.extend(results))
+    # A /chat request is in the middle of a turn for this session
+    with bot.turn_lock:
+        consumer.start()
+        consumer.join(0.2)
+        assert consumer.is_alive() and bot.conversation_history == []
+    consumer.join(2)
+    assert collected[0]["response"] == "Is gold a good hedge?"
+
+def test_stopping_early_leaves_sessions_not_started():
+    started = []
+    def get_session(session_id):
+        started.append(session_id)
+        return make_bot(latency=0.1)
+
+    items = [{"session": f"s{i}", "input": f"Question {i}?"} for i in range(3)]
+    results = SmartBudgetAIChatbot.process_batch(items, get_session=get_session, max_workers=1)
+    assert next(results)["session"] == "s0"
+    results.close()
+    time.sleep(0.3)
+    # s1 may already have been taken when the consumer went away, s2 never is
+    assert "s2" not in started
+
+def test_batch_route_streams_ndjson():
+    previous = app.sessions
+    app.sessions = SessionStore(make_bot)
+    try:
+        client = app.app.test_client()
+        items = [
+            {"session": "batch-a", "input": "hi"},
+            {"session": "batch-b", "input": "I spend 2000 on food"},
+            {"session": "batch-a", "input": "How do index funds work?"},
+        ]
+        response = client.post("/chat/batch", json={"items": items, "concurrency": 2})
+        assert response.status_code == 200
+        assert response.mimetype == "application/x-ndjson"
+        lines = [json.loads(line) for line in response.data.decode().splitlines()]
+        assert sorted(line["index"] for line in lines) == [0, 1, 2]
+        assert app.sessions.get("batch-b").expenses["food"] == 2000
+
+        assert client.post("/chat/batch", json={"items": [{"input": "hi"}]}).status_code == 400
+        assert client.post("/chat/batch", json={"messages": []}).status_code == 400
+    finally:
+        app.sessions = previous
+
+if __name__ == "__main__":
+    test_sessions_run_concurrently_in_order()
+    test_failures_are_reported_per_item()
+    test_batch_waits_for_a_turn_on_a_busy_session()
+    test_stopping_early_leaves_sessions_not_started()
+    test_batch_route_streams_ndjson()
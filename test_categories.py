@@ -0,0 +1,71 @@
+import time
+from categories import CATEGORY_CODES, CATEGORY_NAMES, canonicalize, category_index
+from chatbot import SmartBudgetAIChatbot
+from fake_llm import FakeGenerativeModel
+
+def old_extract_category(text):
+    # The str.replace scrubbing that CategoryIndex replaces
+    import re
+    text = re.sub(r'\d+(?:,\d+)*(?:\.\d+)?', '', text).lower()
+    for word in ['spend', 'spent', 'spending', 'pay', 'paid', 'paying', 'cost', 'costs', 'costing',
+                 'rupees', 'rs', 'inr', '₹', 'on', 'for', 'in', 'my', 'i', 'around', 'about']:
+        text = text.replace(word, '')
+    parts = [part for part in text.strip().split() if len(part) > 1]
+    return ' '.join(parts) if parts else None
+
+def test_spellings_share_one_category():
+    for text in ["groceries", "grocery", "food items", "Food Items", "on my groceries"]:
+        assert canonicalize(text) == "groceries", text
+    assert canonicalize("dining") == "food"
+    assert canonicalize("loan EMIs") == "loan emi"
+    assert category_index.code("rent") == CATEGORY_CODES["rent"]
+    assert CATEGORY_NAMES[category_index.code("house rent")] == "rent"
+
+def test_only_whole_phrases_fold():
+    # Sub-items, extra words and merchant names keep the user's words
+    assert canonicalize("lunch") == "lunch" and canonicalize("dinner") == "dinner"
+    assert canonicalize("pet food") == "pet food"
+    assert canonicalize("water bottles") == "water bottles"
+    assert canonicalize("premium subscription") == "premium subscription"
+    assert canonicalize("my phone bill") == "phone bill"
+    assert canonicalize("groceries from dmart") == "groceries from dmart"
+    assert category_index.code("uber rides") is None
+
+def test_words_are_not_damaged():
+    # str.replace removed "in" from "dining" and "on" from "phone"
+    assert old_extract_category("spend 500 on dining") == "dg"
+    assert canonicalize("spend 500 on dining") == "food"
+    assert canonicalize("3000 for gaming") == "gaming"
+    assert canonicalize("monthly gym membership") == "gym membership"
+    assert canonicalize("rent and my income is 9000") == "rent"
+    assert canonicalize("on my") is None
+
+def test_chatbot_stores_canonical_categories():
+    bot = SmartBudgetAIChatbot(model=FakeGenerativeModel())
+    bot.process_input("I spend 5000 on groceries")
+    bot.process_input("I spend 6000 on grocery")
+    bot.process_input("I spend 3000 for gaming")
+    bot.process_input("I spend 2000 on lunch")
+    bot.process_input("I spend 3000 on dinner")
+    assert bot.expenses == {"groceries": 6000.0, "gaming": 3000.0, "lunch": 2000.0, "dinner": 3000.0}
+    assert bot.ledger.breakdown() == {"groceries": 11000.0, "gaming": 3000.0, "lunch": 2000.0, "dinner": 3000.0}
+
+def test_canonicalize_is_faster_than_scrubbing():
+    texts = ["spend 500 on dining out with friends", "food items", "my phone bill", "3000 for gaming"] * 2500
+    start = time.perf_counter()
+    for text in texts:
+        old_extract_category(text)
+    scrubbing = time.perf_counter() - start
+    start = time.perf_counter()
+    for text in texts:
+        canonicalize(text)
+    indexed = time.perf_counter() - start
+    print(f"{len(texts)} categories: scrubbing {scrubbing * 1000:.1f}ms, indexed {indexed * 1000:.1f}ms")
+    assert indexed < scrubbing * 1.5
+
+if __name__ == "__main__":
+    test_spellings_share_one_category()
+    test_only_whole_phrases_fold()
+    test_words_are_not_damaged()
+    test_chatbot_stores_canonical_categories()
+    test_canonicalize_is_faster_than_scrubbing()
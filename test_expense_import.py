@@ -0,0 +1,63 @@
+import io
+from expense_import import categorize, import_statement, parse_amount
+from financial_analysis import FinancialAnalysis
+
+STATEMENT = """Account Statement for XXXX1234
+Generated on 01/04/2024
+
+Date,Narration,Withdrawal Amt.,Deposit Amt.
+01/01/2024,NEFT SALARY ACME LTD,,"50,000.00"
+02/01/2024,UPI-LANDLORD RENT JAN,"15,000.00",
+05/01/2024,UPI-SWIGGY ORDER,450.50,
+not a date,garbage row,10,
+01/02/2024,NEFT SALARY ACME LTD,,"50,000.00"
+02/02/2024,UPI-LANDLORD RENT FEB,"15,000.00",
+14/02/2024,BIGBASKET GROCERY,"3,200.00",
+"""
+
+def test_parse_amount():
+    assert parse_amount("₹1,200.50") == 1200.5
+    assert parse_amount("(450)") == -450
+    assert parse_amount("300 Dr") == -300
+    assert parse_amount("  ") is None
+
+def test_categorize():
+    assert categorize("UPI-SWIGGY ORDER 123") == "food"
+    assert categorize("POS AMAZON PAY") == "shopping"
+    assert categorize("ATM CASH") == "other"
+    # Keywords only match whole words
+    assert categorize("EMIRATES TICKET") == "other"
+    assert categorize("OLAY COSMETICS") == "other"
+    assert categorize("HDFC LOAN EMIS") == "loan emi"
+    assert categorize("UPI-SWIGGY8231") == "food"
+    assert categorize("LIC PREMIUM") == "insurance"
+
+def test_import_statement_into_chatbot_state():
+    class Bot:
+        user_data = {}
+        expenses = {}
+
+    bot = Bot()
+    summary = import_statement(io.StringIO(STATEMENT), chatbot=bot, include_income=True)
+    print(summary.as_dict())
+    assert summary.transactions == 6
+    assert summary.skipped == 1
+    assert summary.totals == {"rent": 30000.0, "food": 450.5, "groceries": 3200.0}
+    # Two months of data -> monthly averages
+    assert bot.expenses["rent"] == 15000.0
+    assert bot.user_data["income"] == 50000.0
+
+    result = summary.analyze(FinancialAnalysis(), bot.user_data["income"])
+    assert round(result["breakdown"]["rent"]) == 30
+
+def test_import_signed_amount_column():
+    lines = ["date,description,amount", "2024-03-01,Netflix,-649", "2024-03-02,Refund,200"]
+    summary = import_statement(iter(lines))
+    assert summary.totals == {"entertainment": 649.0}
+    assert summary.credits == 200.0
+
+if __name__ == "__main__":
+    test_parse_amount()
+    test_categorize()
+    test_import_statement_into_chatbot_state()
+    test_import_signed_amount_column()
@@ -0,0 +1,59 @@
+import re
+from extraction import FinancialExtractor, extract_number
+
+MESSAGES = [
+    "My income is 50000",
+    "I earn ₹1,20,000 a month and spend 15,000 on rent",
+    "I spend 5000 on groceries",
+    "I paid rs. 1200 for internet and I want to save 8000",
+    "My name is priya and my salary is 40000",
+    "call me Ravi",
+    "Can you analyze my budget?",
+    "",
+]
+
+def extract_with_separate_regexes(text):
+    # The per-message regex sequence that FinancialExtractor replaces
+    result = {"income": None, "expenses": [], "savings_goal": None, "name": None}
+    income_match = re.search(r'(?i)(?:income|earn|salary|make|making)(?:\s+is|\s+of)?\s+(?:rs\.?|₹)?\s*(\d+(?:,\d+)*(?:\.\d+)?)', text)
+    if income_match:
+        result["income"] = float(income_match.group(1).replace(",", ""))
+    for match in re.finditer(r'(?i)(?:spend|spent|spending|pay|paying|paid|expense|expenses|cost|costs)\s+(?:rs\.?|₹)?\s*(\d+(?:,\d+)*(?:\.\d+)?)\s+(?:on|for|in)\s+([a-zA-Z\s]+)', text):
+        result["expenses"].append((match.group(2).strip().lower(), float(match.group(1).replace(",", ""))))
+    savings_match = re.search(r'(?i)(?:save|saving|savings|goal)\s+(?:rs\.?|₹)?\s*(\d+(?:,\d+)*(?:\.\d+)?)', text)
+    if savings_match:
+        result["savings_goal"] = float(savings_match.group(1).replace(",", ""))
+    for pattern in [r'(?i)(?:my name is|I am|I\'m) ([A-Za-z]+)', r'(?i)(?:call me) ([A-Za-z]+)']:
+        name_match = re.search(pattern, text)
+        if name_match:
+            result["name"] = name_match.group(1).capitalize()
+            break
+    return result
+
+def test_single_pass_matches_separate_regexes():
+    extractor = FinancialExtractor()
+    for message in MESSAGES:
+        found = extractor.extract(message).as_dict()
+        print(f"{message!r} -> {found}")
+        assert found == extract_with_separate_regexes(message)
+
+def test_overlapping_fields_are_all_found():
+    found = FinancialExtractor().extract("I spend 500 on rent and my income is 9000")
+    assert found.income == 9000
+    assert found.expenses[0][1] == 500
+
+def test_extract_many():
+    results = list(FinancialExtractor().extract_many(iter(MESSAGES * 3)))
+    assert len(results) == len(MESSAGES) * 3
+    assert results[0].income == 50000
+    assert not results[-1]
+
+def test_extract_number():
+    assert extract_number("about 1,500.50 rupees") == 1500.5
+    assert extract_number("nothing") is None
+
+if __name__ == "__main__":
+    test_single_pass_matches_separate_regexes()
+    test_overlapping_fields_are_all_found()
+    test_extract_many()
+    test_extract_number()
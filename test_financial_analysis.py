@@ -0,0 +1,29 @@
+import numpy as np
+from financial_analysis import FinancialAnalysis
+
+def test_analyze_batch_matches_per_user_methods():
+    analysis = FinancialAnalysis()
+    categories = ["rent", "food"]
+    incomes = [50000, 30000, 0]
+    expenses = [[15000, 8000], [20000, 9000], [0, 500]]
+    goals = [10000, 5000, 1000]
+
+    batch = analysis.analyze_batch(incomes, expenses, goals, categories)
+    print(batch)
+    for i, income in enumerate(incomes):
+        user_expenses = dict(zip(categories, expenses[i]))
+        total = analysis.calculate_total_expenses(user_expenses)
+        remaining = analysis.calculate_remaining_balance(income, total)
+        assert batch["total_expenses"][i] == total
+        assert batch["remaining_balance"][i] == remaining
+        assert batch["goal_deficit"][i] == max(goals[i] - remaining, 0)
+        assert batch["needs"][i] == analysis.get_50_30_20_analysis(income, total, goals[i])["needs"]
+        if income:
+            breakdown = analysis.get_expense_breakdown(user_expenses, income)
+            assert np.allclose(batch["breakdown_percentages"][i], [breakdown[c] for c in categories])
+
+    # No income -> zero percentages rather than NaN/inf
+    assert batch["breakdown_percentages"][2].tolist() == [0.0, 0.0]
+
+if __name__ == "__main__":
+    test_analyze_batch_matches_per_user_methods()
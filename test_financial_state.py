@@ -0,0 +1,98 @@
+import random
+import time
+from chatbot import SmartBudgetAIChatbot
+from fake_llm import FakeGenerativeModel
+from financial_analysis import FinancialAnalysis
+from financial_state import FinancialState
+
+def reference_context(user_data, expenses):
+    # The formatting the chatbot used before FinancialState cached it
+    if not user_data and not expenses:
+        return "No financial data available yet."
+    context = []
+    if user_data:
+        context.append("User Financial Profile:")
+        for key, value in user_data.items():
+            if key == 'income':
+                context.append(f"- Monthly Income: ₹{value:,.2f}")
+            elif key == 'savings_goal':
+                context.append(f"- Savings Goal: ₹{value:,.2f}")
+            else:
+                context.append(f"- {key.title()}: {value}")
+    if expenses:
+        context.append("\nExpense Categories:")
+        for category, amount in expenses.items():
+            context.append(f"- {category}: ₹{amount:,.2f}")
+    return "\n".join(context)
+
+def test_context_matches_full_rebuild_after_random_updates():
+    state = FinancialState()
+    rng = random.Random(7)
+    categories = ["rent", "food", "travel", "gaming", "fuel"]
+    for _ in range(500):
+        action = rng.random()
+        category = rng.choice(categories)
+        if action < 0.6:
+            state.expenses[category] = rng.choice([500, 1200.5, 3000, 15000])
+        elif action < 0.75:
+            state.expenses.pop(category, None)
+        elif action < 0.8:
+            state.user_data[rng.choice(["income", "savings_goal"])] = rng.choice([40000, 50000.75])
+        elif action < 0.9:
+            state.user_data["city"] = rng.choice(["pune", "delhi"])
+        else:
+            state.user_data.pop("city", None)
+        assert state.context() == reference_context(state.user_data, state.expenses)
+        assert state.total_expenses == sum(state.expenses.values())
+        if state.expenses:
+            assert state.largest_expense() == max(state.expenses.items(), key=lambda x: x[1])
+        else:
+            assert state.largest_expense() is None
+
+def test_largest_breaks_ties_like_max():
+    state = FinancialState()
+    state.expenses.update({"rent": 5000, "food": 5000, "fuel": 1000})
+    assert state.largest_expense() == ("rent", 5000)
+    del state.expenses["rent"]
+    state.expenses["rent"] = 5000  # now after food in dict order
+    assert state.largest_expense() == ("food", 5000)
+
+def test_chatbot_uses_running_totals():
+    bot = SmartBudgetAIChatbot(model=FakeGenerativeModel())
+    bot.process_input("My income is 50000")
+    bot.process_input("I spend 15000 on rent")
+    bot.process_input("I spend 8000 on food")
+    assert bot.finances.total_expenses == 23000
+    assert FinancialAnalysis().calculate_total_expenses(bot.expenses) == 23000
+    assert bot.format_financial_context() == reference_context(bot.user_data, bot.expenses)
+
+    # Assigning a plain dict (as a snapshot restore does) keeps tracking it
+    bot.expenses = {"food": 2000}
+    bot.expenses["fuel"] = 500
+    assert bot.finances.total_expenses == 2500
+    bot.user_data = bot.user_data
+    assert bot.user_data["income"] == 50000
+
+def test_context_is_not_rebuilt_when_nothing_changed():
+    state = FinancialState()
+    state.user_data["income"] = 50000
+    for i in range(200):
+        state.expenses[f"category {i}"] = 100 + i
+    first = state.context()
+    start = time.perf_counter()
+    for _ in range(1000):
+        state.context()
+    cached = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(1000):
+        reference_context(state.user_data, state.expenses)
+    rebuilt = time.perf_counter() - start
+    print(f"1000 contexts: cached {cached * 1000:.2f}ms, rebuilt {rebuilt * 1000:.2f}ms")
+    assert state.context() is first
+    assert cached < rebuilt
+
+if __name__ == "__main__":
+    test_context_matches_full_rebuild_after_random_updates()
+    test_largest_breaks_ties_like_max()
+    test_chatbot_uses_running_totals()
+    test_context_is_not_rebuilt_when_nothing_changed()
@@ -0,0 +1,75 @@
+from chatbot import SmartBudgetAIChatbot
+from fake_llm import FakeGenerativeModel
+from intent_router import IntentRouter
+from model_loader import LazyModel
+from prompt_builder import message_text
+
+def test_router_matches_intents():
+    router = IntentRouter()
+    cases = {
+        "hi": "greeting",
+        "Hey there!": "greeting",
+        "What can you do?": "capabilities",
+        "I spend ₹5,000 on rent": "expense",
+        "I want to save 20000 per month": "savings",
+        "My monthly income is 50000": "income",
+        "How am I doing?": "analysis",
+        "How do mutual funds work in India": None,
+        "Can you analyze my budget": "analysis",
+        "How should I budget for a wedding?": None,
+        "can you help me reduce food costs": None,
+        "hey what's a SIP?": None,
+        "Please review the premium on my policy": None,
+        "this is nothing": None,
+    }
+    for text, intent in cases.items():
+        route = router.match(text)
+        print(f"{text!r} -> {route and route.intent}")
+        assert (route and route.intent) == intent
+
+def test_local_answers_skip_the_model():
+    model = FakeGenerativeModel()
+    bot = SmartBudgetAIChatbot(model=model)
+
+    assert "what can you do" in bot.process_input("hello")
+    assert "50,000" in bot.process_input("My income is 50000")
+    assert "rent" in bot.process_input("I spend 15000 on rent")
+    assert "Income" in bot.process_input("Can you analyze my budget")
+    assert model.calls == 0
+    assert bot.expenses == {"rent": 15000.0}
+    # Locally answered turns are still part of the model's history
+    assert len(bot.chat.history) == 8
+
+    bot.process_input("Should I invest in gold or mutual funds?")
+    assert model.calls == 1
+
+def test_analysis_with_zero_income():
+    bot = SmartBudgetAIChatbot(model=FakeGenerativeModel())
+    bot.process_input("My income is 0")
+    bot.process_input("I spend 500 on rent")
+    reply = bot.process_input("How am I doing?")
+    assert "Consider tracking your expenses by category" in reply
+
+def test_local_turns_reach_a_lazy_chat():
+    bot = SmartBudgetAIChatbot(model_source=LazyModel(FakeGenerativeModel))
+    bot.process_input("My income is 50000")
+    bot.process_input("I spend 15000 on rent")
+    assert bot.chat is None
+    bot.ensure_chat()
+    assert [message_text(m) for m in bot.chat.history][::2] == ["My income is 50000", "I spend 15000 on rent"]
+
+def test_router_counts_routes():
+    router = IntentRouter()
+    router.record("greeting")
+    router.record(None)
+    stats = router.stats()
+    assert stats["local"] == 1
+    assert stats["llm"] == 1
+    assert stats["by_intent"]["greeting"] == 1
+
+if __name__ == "__main__":
+    test_router_matches_intents()
+    test_local_answers_skip_the_model()
+    test_analysis_with_zero_income()
+    test_local_turns_reach_a_lazy_chat()
+    test_router_counts_routes()
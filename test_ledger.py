@@ -0,0 +1,55 @@
+from datetime import datetime
+import numpy as np
+from financial_analysis import FinancialAnalysis
+from ledger import ExpenseLedger
+
+def make_ledger():
+    ledger = ExpenseLedger(capacity=2)
+    ledger.append(15000, "rent", datetime(2024, 1, 2), user_id=1)
+    ledger.append(450, "food", datetime(2024, 1, 5), user_id=1)
+    ledger.append(15000, "rent", datetime(2024, 2, 2), user_id=1)
+    ledger.extend([3200, 550], ["groceries", "food"], [datetime(2024, 2, 14), datetime(2024, 2, 20)], user_ids=2)
+    return ledger
+
+def test_totals_and_breakdown():
+    ledger = make_ledger()
+    assert len(ledger) == 5
+    assert ledger.total() == 34200
+    assert ledger.total(user_id=2) == 3750
+    assert ledger.breakdown() == {"rent": 30000, "food": 1000, "groceries": 3200}
+    assert ledger.total(start=datetime(2024, 2, 1)) == 18750
+    assert ledger.latest_by_category(user_id=1) == {"rent": 15000, "food": 450}
+
+def test_by_period():
+    ledger = make_ledger()
+    periods, totals = ledger.by_period("month")
+    assert [str(p) for p in periods] == ["2024-01", "2024-02"]
+    assert totals.tolist() == [15450, 18750]
+    periods, matrix = ledger.by_period("month", by_category=True)
+    assert matrix.shape == (2, 3)
+    assert matrix[1, ledger.category_codes["food"]] == 550
+
+def test_financial_analysis_runs_on_ledger():
+    ledger = make_ledger()
+    analysis = FinancialAnalysis()
+    # Two months of history -> monthly averages
+    assert analysis.calculate_total_expenses(ledger) == 17100
+    breakdown = analysis.get_expense_breakdown(ledger, 50000)
+    assert round(breakdown["rent"]) == 30
+    assert analysis.get_expense_breakdown({"rent": 15000}, 50000) == {"rent": 30.0}
+
+def test_large_ledger():
+    ledger = ExpenseLedger()
+    count = 300000
+    rng = np.random.default_rng(0)
+    ledger.extend(rng.uniform(10, 5000, count), [f"cat{i % 12}" for i in range(count)],
+                  1_600_000_000 + rng.integers(0, 86400 * 365, count))
+    periods, totals = ledger.by_period("month")
+    assert abs(totals.sum() - ledger.total()) < 1e-3 * ledger.total()
+    assert len(ledger.breakdown()) == 12
+
+if __name__ == "__main__":
+    test_totals_and_breakdown()
+    test_by_period()
+    test_financial_analysis_runs_on_ledger()
+    test_large_ledger()
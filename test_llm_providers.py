@@ -0,0 +1,127 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from chatbot import SmartBudgetAIChatbot
+from fake_llm import FakeGenerativeModel
+from llm_providers import HedgedModel, OpenAICompatibleModel
+from prompt_builder import message_text
+
+class CompletionsHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so the client can keep the connection open
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; don't let Nagle hold the body
+    disable_nagle_algorithm = True
+    connections = set()
+    requests = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        CompletionsHandler.connections.add(self.client_address)
+        CompletionsHandler.requests.append(body)
+        reply = f"Reply to: {body['messages'][-1]['content'][-20:]}"
+        if body.get("stream"):
+            events = [{"choices": [{"delta": {"content": word + " "}}]} for word in reply.split()]
+            payload = "".join(f"data: {json.dumps(event)}\n\n" for event in events) + "data: [DONE]\n\n"
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+        else:
+            payload = json.dumps({"choices": [{"message": {"content": reply}}],
+                                  "usage": {"prompt_tokens": 42, "completion_tokens": 7}})
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+        data = payload.encode("utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+def start_server():
+    CompletionsHandler.connections = set()
+    CompletionsHandler.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CompletionsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def test_openai_provider_reuses_connections():
+    server = start_server()
+    try:
+        model = OpenAICompatibleModel("test-model", base_url=f"http://127.0.0.1:{server.server_port}/v1", api_key="k")
+        bot = SmartBudgetAIChatbot(model=model)
+        for turn in range(5):
+            reply = bot.get_ai_response(f"How should I invest, question {turn}?")
+            assert reply.startswith("Reply to:")
+        assert bot.prompt_builder.last_usage["reported_prompt_tokens"] == 42
+        chunks = list(bot.stream_ai_response("And what about gold?"))
+        assert len(chunks) > 1 and "".join(chunks).startswith("Reply to:")
+    finally:
+        server.shutdown()
+    requests = CompletionsHandler.requests
+    assert len(requests) == 6
+    assert requests[0]["messages"][0]["role"] == "system"
+    # The history sent back holds earlier turns as user/assistant pairs
+    assert [m["role"] for m in requests[1]["messages"][1:]] == ["user", "assistant", "user"]
+    print(f"6 turns used {len(CompletionsHandler.connections)} connection(s)")
+    assert len(CompletionsHandler.connections) == 1
+
+def test_hedge_answers_from_secondary_when_primary_is_slow():
+    slow = FakeGenerativeModel(responder=lambda prompt: "slow answer", latency=1.0)
+    fast = FakeGenerativeModel(responder=lambda prompt: "fast answer")
+    model = HedgedModel(slow, fast, hedge_after=0.05)
+    chat = model.start_chat()
+    start = time.perf_counter()
+    assert chat.send_message("hi").text == "fast answer"
+    assert time.perf_counter() - start < 0.5
+    assert [message_text(m) for m in chat.history] == ["hi", "fast answer"]
+    stream = chat.send_message("again", stream=True)
+    assert "".join(chunk.text for chunk in stream) == "fast answer"
+    assert len(chat.history) == 4
+    assert model.stats() == {"turns": 2, "hedged": 2, "secondary_wins": 2}
+
+def test_hedge_fails_over_and_skips_when_primary_is_quick():
+    broken = FakeGenerativeModel(error_rate=1.0)
+    fast = FakeGenerativeModel(responder=lambda prompt: "backup")
+    chat = HedgedModel(broken, fast, hedge_after=5).start_chat()
+    start = time.perf_counter()
+    assert chat.send_message("hi").text == "backup"
+    assert time.perf_counter() - start < 1.0  # did not wait for hedge_after
+
+    quick = HedgedModel(FakeGenerativeModel(responder=lambda prompt: "primary"), fast, hedge_after=1)
+    assert quick.start_chat().send_message("hi").text == "primary"
+    assert quick.stats()["hedged"] == 0
+
+def test_stub_provider_runs_offline():
+    code = (
+        "import model_loader; model = model_loader.load_model(); "
+        "print(type(model).__name__, model.start_chat().send_message('hi').text != '')"
+    )
+    env = dict(os.environ, LLM_PROVIDER="stub", LLM_HEDGE_PROVIDER="")
+    output = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+    assert "FakeGenerativeModel True" in output
+
+def test_provider_can_be_set_in_dotenv():
+    directory = tempfile.mkdtemp()
+    with open(os.path.join(directory, ".env"), "w") as f:
+        f.write("LLM_PROVIDER=stub\n")
+    code = (
+        "import sys; sys.path.insert(0, sys.argv[1]); import model_loader; "
+        "print(type(model_loader.load_model()).__name__)"
+    )
+    env = {key: value for key, value in os.environ.items() if not key.startswith("LLM_")}
+    output = subprocess.run([sys.executable, "-c", code, os.path.dirname(os.path.abspath(__file__))],
+                            env=env, capture_output=True, text=True, cwd=directory).stdout
+    assert "FakeGenerativeModel" in output
+
+if __name__ == "__main__":
+    test_openai_provider_reuses_connections()
+    test_hedge_answers_from_secondary_when_primary_is_slow()
+    test_hedge_fails_over_and_skips_when_primary_is_quick()
+    test_stub_provider_runs_offline()
+    test_provider_can_be_set_in_dotenv()
@@ -0,0 +1,65 @@
+import time
+import app
+from chatbot import SmartBudgetAIChatbot
+from fake_llm import FakeGenerativeModel
+from metrics import FALLBACKS, MetricsRegistry
+from resilience import CircuitBreaker
+from session_store import SessionStore
+
+def test_histogram_and_counter_render():
+    registry = MetricsRegistry()
+    latency = registry.histogram("demo_seconds", "Demo latency", ["stage"], buckets=(0.1, 1.0))
+    errors = registry.counter("demo_errors_total", "Demo errors", ["component"])
+    latency.observe(0.05, "llm")
+    latency.observe(0.5, "llm")
+    latency.observe(5, "llm")
+    errors.inc("search")
+    errors.inc("search", amount=2)
+    text = registry.render()
+    print(text)
+    assert '# TYPE demo_seconds histogram' in text
+    assert 'demo_seconds_bucket{stage="llm",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{stage="llm",le="1.0"} 2' in text
+    assert 'demo_seconds_bucket{stage="llm",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{stage="llm"} 3' in text
+    assert 'demo_errors_total{component="search"} 3' in text
+
+def test_timer_overhead_is_small():
+    registry = MetricsRegistry()
+    stage = registry.histogram("overhead_seconds", "Overhead", ["stage"])
+    count = 20000
+    start = time.perf_counter()
+    for _ in range(count):
+        with stage.time("noop"):
+            pass
+    per_call = (time.perf_counter() - start) / count
+    print(f"Timer overhead: {per_call * 1e6:.2f}µs")
+    assert stage.count("noop") == count
+    assert per_call < 20e-6
+
+def test_metrics_route_counts_fallbacks():
+    breaker = CircuitBreaker(failure_threshold=1)
+    breaker.record_failure()
+    previous = app.sessions
+    app.sessions = SessionStore(lambda: SmartBudgetAIChatbot(model=FakeGenerativeModel(), breaker=breaker))
+    try:
+        client = app.app.test_client()
+        before = FALLBACKS.value("breaker_open")
+        client.post("/chat", json={"input": "How do mutual funds work?"}, headers={"X-Session-ID": "metrics-test"})
+        assert FALLBACKS.value("breaker_open") == before + 1
+
+        response = client.get("/metrics")
+        text = response.data.decode()
+        assert response.status_code == 200
+        assert response.mimetype == "text/plain"
+        assert 'smartbudget_fallbacks_total{reason="breaker_open"}' in text
+        assert 'smartbudget_http_requests_total{endpoint="chat",status="200"}' in text
+        assert 'smartbudget_stage_seconds_count{stage="route"}' in text
+        assert "smartbudget_sessions " in text
+    finally:
+        app.sessions = previous
+
+if __name__ == "__main__":
+    test_histogram_and_counter_render()
+    test_timer_overhead_is_small()
+    test_metrics_route_counts_fallbacks()
@@ -0,0 +1,66 @@
+import subprocess
+import sys
+import time
+from chatbot import SmartBudgetAIChatbot
+from fake_llm import FakeGenerativeModel
+from model_loader import LazyModel
+from resilience import CircuitBreaker
+
+class SlowLoader:
+    def __init__(self, delay, model=None, error=None):
+        self.delay = delay
+        self.model = model
+        self.error = error
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.model
+
+def test_importing_app_does_not_load_the_sdk():
+    # Fresh interpreter: other test modules may have imported the SDK already
+    probe = "import sys, app; print('google.generativeai' in sys.modules)"
+    output = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True)
+    assert output.stdout.strip().splitlines()[-1] == "False"
+
+def test_warm_up_loads_once_in_background():
+    loader = SlowLoader(0.3, model=FakeGenerativeModel())
+    lazy = LazyModel(loader)
+    start = time.perf_counter()
+    lazy.warm_up()
+    lazy.warm_up()
+    assert time.perf_counter() - start < 0.1  # did not block
+    assert lazy.get(timeout=2) is loader.model
+    assert loader.calls == 1
+    assert lazy.stats()["loaded"]
+
+def test_failed_load_is_remembered():
+    loader = SlowLoader(0, error=ValueError("Google API key not found"))
+    lazy = LazyModel(loader)
+    assert lazy.get() is None
+    assert lazy.get() is None
+    assert loader.calls == 1
+    assert "API key" in lazy.stats()["error"]
+
+def test_local_intents_answer_while_model_warms_up():
+    loader = SlowLoader(0.5, model=FakeGenerativeModel())
+    bot = SmartBudgetAIChatbot(model_source=LazyModel(loader), breaker=CircuitBreaker())
+    start = time.perf_counter()
+    reply = bot.process_input("I spend 15000 on rent")
+    elapsed = time.perf_counter() - start
+    print(f"Local reply during warm-up took {elapsed * 1000:.1f}ms")
+    assert elapsed < 0.2
+    assert "rent" in reply.lower()
+
+    reply = bot.process_input("How do mutual funds work?")
+    assert "money tip" in reply
+    assert bot.chat is not None
+
+if __name__ == "__main__":
+    test_importing_app_does_not_load_the_sdk()
+    test_warm_up_loads_once_in_background()
+    test_failed_load_is_remembered()
+    test_local_intents_answer_while_model_warms_up()
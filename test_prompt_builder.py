@@ -0,0 +1,42 @@
+from chatbot import SmartBudgetAIChatbot
+from fake_llm import FakeGenerativeModel
+from prompt_builder import PromptBuilder, message_text
+
+def test_prompt_builder_keeps_turn_cost_flat():
+    model = FakeGenerativeModel(responder=lambda prompt: "Cool, keep tracking it! 👍 " * 5)
+    bot = SmartBudgetAIChatbot(model=model)
+    bot.prompt_builder = PromptBuilder(max_tokens=600, window_turns=3)
+    bot.user_data["income"] = 50000
+
+    usages = []
+    for turn in range(15):
+        bot.get_ai_response(f"Question number {turn} about my food spending this month")
+        usages.append(bot.prompt_builder.last_usage["prompt_tokens"])
+
+    print("Prompt tokens per turn:", usages)
+    print("Summary:", bot.prompt_builder.summary)
+    # The chat session only keeps the window, as raw user text
+    assert len(bot.chat.history) == 6
+    assert message_text(bot.chat.history[-2]) == "Question number 14 about my food spending this month"
+    assert "Question number 11" in bot.prompt_builder.summary
+    # Once the window is full, per-turn cost stops growing
+    assert max(usages[5:]) <= 600
+    assert max(usages[8:]) - min(usages[8:]) < 40
+
+def test_financial_context_sent_every_turn():
+    prompts = []
+    bot = SmartBudgetAIChatbot(model=FakeGenerativeModel(responder=lambda prompt: prompts.append(prompt) or "Sure!"))
+    bot.user_data["income"] = 50000
+    bot.expenses["rent"] = 15000
+    for question in ("Can I afford a new phone?", "What about a bike?", "And a holiday?"):
+        bot.get_ai_response(question)
+    # Turns after the first still carry the figures, not just the user's text
+    assert len(prompts) == 3
+    for prompt in prompts[1:]:
+        assert "Monthly Income: ₹50,000.00" in prompt and "rent: ₹15,000.00" in prompt
+    assert message_text(bot.chat.history[0]) == "Can I afford a new phone?"
+    assert bot.prompt_builder.stats()["turns"] == 3
+
+if __name__ == "__main__":
+    test_prompt_builder_keeps_turn_cost_flat()
+    test_financial_context_sent_every_turn()
@@ -0,0 +1,82 @@
+import time
+from chatbot import SmartBudgetAIChatbot
+from fake_clock import FakeClock
+from fake_llm import FakeGenerativeModel
+from resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, LatencyBudget
+
+def test_breaker_opens_and_serves_fallback_fast():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    model = FakeGenerativeModel(error_rate=1.0)
+    bot = SmartBudgetAIChatbot(model=model, breaker=breaker)
+    for _ in range(3):
+        bot.get_ai_response("How do mutual funds work?")
+    assert breaker.state == OPEN
+    assert model.calls == 3
+
+    start = time.perf_counter()
+    reply = bot.get_ai_response("How do mutual funds work?")
+    elapsed = time.perf_counter() - start
+    print(f"Fallback while open took {elapsed * 1000:.2f}ms")
+    assert reply
+    assert model.calls == 3  # the model was not called again
+    assert breaker.stats()["rejected"] == 1
+
+def test_half_open_probe_recovers():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow_request()
+
+    clock.now = 10
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()  # only one probe at a time
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.stats()["times_opened"] == 2
+
+    clock.now = 20
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow_request()
+
+def test_closed_probe_stream_frees_the_breaker():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    clock.now = 10
+    bot = SmartBudgetAIChatbot(model=FakeGenerativeModel(chunk_words=1), breaker=breaker)
+    stream = bot.stream_ai_response("How do mutual funds work?")
+    next(stream)  # this stream is the half-open probe
+    stream.close()
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()  # a new probe may go
+
+def test_slow_model_times_out_to_fallback():
+    breaker = CircuitBreaker(failure_threshold=5)
+    model = FakeGenerativeModel(latency=5.0)
+    bot = SmartBudgetAIChatbot(model=model, breaker=breaker, latency_budget=LatencyBudget(timeout=0.2, budget=0.3))
+    start = time.perf_counter()
+    chunks = list(bot.stream_ai_response("How do mutual funds work?"))
+    elapsed = time.perf_counter() - start
+    print(f"Timed out after {elapsed:.2f}s")
+    assert len(chunks) == 1
+    assert elapsed < 1.0
+    assert breaker.stats()["failures"] == 1
+
+def test_latency_budget_shrinks_with_elapsed_time():
+    budget = LatencyBudget(timeout=10, budget=2)
+    started_at = time.monotonic() - 1.5
+    assert budget.request_options(started_at)["timeout"] <= 0.5
+    assert not budget.exceeded(started_at)
+    assert budget.exceeded(started_at - 1)
+
+if __name__ == "__main__":
+    test_breaker_opens_and_serves_fallback_fast()
+    test_half_open_probe_recovers()
+    test_closed_probe_stream_frees_the_breaker()
+    test_slow_model_times_out_to_fallback()
+    test_latency_budget_shrinks_with_elapsed_time()
@@ -0,0 +1,83 @@
+from chatbot import SmartBudgetAIChatbot
+from fake_clock import FakeClock
+from fake_llm import FakeGenerativeModel
+from response_cache import ResponseCache, normalize_message
+
+def test_normalize_message():
+    assert normalize_message("  How am I doing?? ") == "how am i doing"
+    assert normalize_message("Tips to save!") == normalize_message("tips to SAVE")
+
+def test_cache_shared_across_matching_profiles():
+    model = FakeGenerativeModel()
+    cache = ResponseCache(max_entries=10)
+    alice = SmartBudgetAIChatbot(model=model, response_cache=cache)
+    bob = SmartBudgetAIChatbot(model=model, response_cache=cache)
+    for bot in (alice, bob):
+        bot.user_data["income"] = 50000
+        bot.expenses["rent"] = 15000
+
+    first = alice.get_ai_response("How am I doing?")
+    second = bob.get_ai_response("how am i doing")
+    assert first == second
+    assert model.calls == 1
+
+    # A different profile is a different key
+    bob.expenses["food"] = 8000
+    bob.get_ai_response("how am i doing")
+    assert model.calls == 2
+
+    stats = cache.stats()
+    print("Cache stats:", stats)
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+
+def test_personal_data_is_not_cached():
+    model = FakeGenerativeModel()
+    cache = ResponseCache()
+    bot = SmartBudgetAIChatbot(model=model, response_cache=cache)
+    bot.get_ai_response("I spend 5000 on rent")
+    bot.get_ai_response("I spend 5000 on rent")
+    assert model.calls == 2
+    assert cache.stats()["skipped"] == 2
+
+    bot.cache_opt_out = True
+    bot.get_ai_response("what can you do")
+    bot.get_ai_response("what can you do")
+    assert model.calls == 4
+    assert len(cache) == 0
+
+def test_follow_ups_are_not_shared():
+    model = FakeGenerativeModel()
+    cache = ResponseCache()
+    alice = SmartBudgetAIChatbot(model=model, response_cache=cache)
+    bob = SmartBudgetAIChatbot(model=model, response_cache=cache)
+    alice.get_ai_response("How do mutual funds work?")
+    bob.get_ai_response("Should I close my credit card?")
+    # Each follow-up refers to that user's own last turn
+    for message in ("Why?", "tell me more", "yes", "Can you explain that again?"):
+        alice.get_ai_response(message)
+        bob.get_ai_response(message)
+    assert model.calls == 10
+    assert cache.stats()["hits"] == 0 and len(cache) == 2
+
+def test_lru_and_ttl():
+    clock = FakeClock()
+    cache = ResponseCache(max_entries=2, ttl_seconds=10, clock=clock)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    cache.get("a")
+    cache.put("c", "C")
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+    clock.now = 11
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["expirations"] == 1
+
+if __name__ == "__main__":
+    test_normalize_message()
+    test_cache_shared_across_matching_profiles()
+    test_personal_data_is_not_cached()
+    test_follow_ups_are_not_shared()
+    test_lru_and_ttl()
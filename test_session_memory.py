@@ -0,0 +1,64 @@
+import tracemalloc
+from chatbot import HISTORY_LIMIT, RESPONSE_TEMPLATES, SmartBudgetAIChatbot
+from fake_llm import FakeGenerativeModel
+from ledger import ExpenseLedger
+
+def test_sessions_share_templates_and_have_no_dict():
+    model = FakeGenerativeModel()
+    first = SmartBudgetAIChatbot(model=model)
+    second = SmartBudgetAIChatbot(model=model)
+    assert first.response_templates is second.response_templates is RESPONSE_TEMPLATES
+    assert not hasattr(first, "__dict__")
+    assert not hasattr(first.finances, "__dict__")
+    assert not hasattr(first.expenses, "__dict__")
+    assert first.latency_budget is second.latency_budget
+
+def test_template_replies_unchanged():
+    bot = SmartBudgetAIChatbot(model=FakeGenerativeModel())
+    bot.user_name = "Asha"
+    assert "Asha" in bot.get_income_question()
+    assert "₹1,234.50 for rent" in bot.get_expense_acknowledgment("rent", 1234.5)
+    reply = bot.handle_capabilities("what can you do?")
+    assert reply.startswith("I'm your personal finance assistant!")
+    assert "• Help with debt management 📉\n\nReady to get started?" in reply
+    assert bot.handle_greeting("hello") != bot.handle_greeting("hello")  # second one is the short reply
+
+def test_empty_ledgers_share_arrays_until_first_append():
+    first = ExpenseLedger(capacity=0)
+    second = ExpenseLedger(capacity=0)
+    assert first.amounts.base is second.amounts.base or first._amounts is second._amounts
+    first.append(500, "food", 1_700_000_000)
+    assert len(second) == 0 and len(second.amounts) == 0
+    assert first.breakdown() == {"food": 500.0}
+    assert second.total() == 0
+
+def test_new_session_stays_small():
+    model = FakeGenerativeModel()
+    sessions = []
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for _ in range(2000):
+        sessions.append(SmartBudgetAIChatbot(model=model))
+    per_session = (tracemalloc.get_traced_memory()[0] - before) / len(sessions)
+    tracemalloc.stop()
+    print(f"{per_session:,.0f} bytes per new session")
+    assert per_session < 3000
+
+def test_unsaved_turns_bounded_without_storage():
+    bot = SmartBudgetAIChatbot(model=FakeGenerativeModel())
+    for turn in range(50):
+        bot.process_input(f"Tell me about index funds, part {turn}")
+    assert len(bot.conversation_history) == HISTORY_LIMIT
+    assert len(bot._unsaved_turns) == HISTORY_LIMIT
+    # Once checkpointed (storage is attached), every turn waits for the next one
+    bot.checkpoint()
+    for turn in range(15):
+        bot.process_input(f"And bonds, part {turn}")
+    assert len(bot.checkpoint()["turns"]) == 30
+
+if __name__ == "__main__":
+    test_sessions_share_templates_and_have_no_dict()
+    test_template_replies_unchanged()
+    test_empty_ledgers_share_arrays_until_first_append()
+    test_new_session_stays_small()
+    test_unsaved_turns_bounded_without_storage()
@@ -0,0 +1,150 @@
+import os
+import tempfile
+import time
+from chatbot import SmartBudgetAIChatbot
+from fake_llm import FakeGenerativeModel
+from session_storage import SQLiteStorage
+from session_store import SessionStore
+
+def new_storage(**kwargs):
+    directory = tempfile.mkdtemp()
+    return SQLiteStorage(os.path.join(directory, "sessions.db"), **kwargs)
+
+def new_bot():
+    return SmartBudgetAIChatbot(model=FakeGenerativeModel())
+
+def test_session_round_trip():
+    storage = new_storage()
+    bot = new_bot()
+    bot.process_input("Hi, I'm Priya")
+    bot.process_input("I spend 15000 on rent")
+    bot.process_input("My monthly income is 60000")
+    storage.save("abc", bot.checkpoint())
+    storage.flush()
+
+    restored = new_bot()
+    restored.restore(storage.load("abc"))
+    assert restored.user_name == bot.user_name
+    assert restored.expenses == bot.expenses
+    assert restored.user_data == bot.user_data
+    assert restored.ledger.rows() == bot.ledger.rows()
+    assert restored.conversation_history == bot.conversation_history
+    assert storage.load("missing") is None
+    storage.close()
+
+def test_checkpoint_only_hands_over_new_rows():
+    bot = new_bot()
+    bot.process_input("I spend 15000 on rent")
+    first = bot.checkpoint()
+    assert len(first["ledger"]) == 1 and len(first["turns"]) == 2
+    bot.process_input("I spend 4000 on food")
+    second = bot.checkpoint()
+    assert [row[1] for row in second["ledger"]] == ["food"]
+    assert len(second["turns"]) == 2
+
+def test_saves_are_written_behind():
+    storage = new_storage(flush_interval=0.1)
+    bot = new_bot()
+    bot.process_input("I spend 15000 on rent")
+    start = time.perf_counter()
+    storage.save("abc", bot.checkpoint())
+    assert time.perf_counter() - start < 0.01
+    assert storage.stats()["pending_rows"] == 4  # state, one ledger row, two turns
+    time.sleep(0.3)
+    assert storage.stats()["pending_rows"] == 0
+    assert storage.stats()["flushes"] >= 1
+    storage.close()
+
+def test_store_rehydrates_dropped_sessions_quickly():
+    storage = new_storage()
+    sessions = SessionStore(new_bot, storage=storage)
+    bot = sessions.get("abc")
+    for amount in range(100):
+        bot.process_input(f"I spend {1000 + amount} on food")
+        sessions.save("abc", bot)
+    storage.flush()
+
+    timings = []
+    for _ in range(50):
+        start = time.perf_counter()
+        record = storage.load("abc")
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    print(f"Median rehydrate: {timings[len(timings) // 2] * 1e6:.0f}µs")
+    assert timings[len(timings) // 2] < 0.001
+    assert len(record["ledger"]) == 100
+
+    sessions.drop("abc")
+    restored = sessions.get("abc")
+    assert restored is not bot
+    assert restored.expenses["food"] == 1099
+    assert len(restored.ledger) == 100
+    storage.close()
+
+def test_workers_sharing_storage_see_each_others_updates():
+    path = os.path.join(tempfile.mkdtemp(), "sessions.db")
+    first = SessionStore(new_bot, storage=SQLiteStorage(path), revalidate=True)
+    second = SessionStore(new_bot, storage=SQLiteStorage(path), revalidate=True)
+
+    bot = first.get("abc")
+    bot.process_input("My monthly income is 40000")
+    first.save("abc", bot)
+    first.storage.flush()
+    other = second.get("abc")
+    assert other.user_data["income"] == 40000
+
+    # The second worker updates the session; the first reloads it on its next hit
+    other.process_input("My monthly income is 55000")
+    second.save("abc", other)
+    second.storage.flush()
+    reloaded = first.get("abc")
+    assert reloaded is not bot
+    assert reloaded.user_data["income"] == 55000
+    assert first.stats()["reloads"] == 1
+    # Its own saves do not look newer than what it holds
+    reloaded.process_input("I spend 3000 on food")
+    first.save("abc", reloaded)
+    assert first.get("abc") is reloaded
+    first.storage.close()
+    second.storage.close()
+
+def test_concurrent_saves_do_not_overwrite_each_other():
+    path = os.path.join(tempfile.mkdtemp(), "sessions.db")
+    first = SessionStore(new_bot, storage=SQLiteStorage(path), revalidate=True)
+    second = SessionStore(new_bot, storage=SQLiteStorage(path), revalidate=True)
+    bot = first.get("abc")
+    bot.process_input("My monthly income is 40000")
+    first.save("abc", bot)
+    first.storage.flush()
+
+    # Both workers update version 1 before either sees the other's write
+    other = second.get("abc")
+    bot.process_input("I spend 3000 on food")
+    other.process_input("I spend 9000 on rent")
+    first.save("abc", bot)
+    second.save("abc", other)
+    first.storage.flush()
+    second.storage.flush()
+    assert second.storage.stats()["conflicts"] == 1
+    assert second.storage.conflicted("abc")
+
+    # The losing worker reloads the winner's state; its rows were not written
+    reloaded = second.get("abc")
+    assert reloaded is not other
+    assert reloaded.expenses == {"food": 3000}
+    assert [row[1] for row in second.storage.load("abc")["ledger"]] == ["food"]
+    assert not second.storage.conflicted("abc")
+    reloaded.process_input("I spend 9000 on rent")
+    second.save("abc", reloaded)
+    second.storage.flush()
+    assert first.get("abc").expenses == {"food": 3000, "rent": 9000}
+    first.storage.close()
+    second.storage.close()
+
+if __name__ == "__main__":
+    test_session_round_trip()
+    test_checkpoint_only_hands_over_new_rows()
+    test_saves_are_written_behind()
+    test_store_rehydrates_dropped_sessions_quickly()
+    test_workers_sharing_storage_see_each_others_updates()
+    test_concurrent_saves_do_not_overwrite_each_other()
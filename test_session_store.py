@@ -0,0 +1,33 @@
+from fake_clock import FakeClock
+from session_store import SessionStore
+
+def test_session_store():
+    clock = FakeClock()
+    store = SessionStore(dict, max_sessions=2, ttl_seconds=60, clock=clock)
+
+    # Each session gets its own state, and repeat lookups reuse it
+    alice = store.get("alice")
+    alice["income"] = 50000
+    assert store.get("alice") is alice
+    assert store.get("bob") is not alice
+
+    # Touching alice makes bob the least recently used, so carol evicts bob
+    store.get("alice")
+    store.get("carol")
+    assert "bob" not in store
+    assert "alice" in store
+
+    # Idle sessions expire after the TTL
+    clock.now = 61
+    assert store.get("alice") == {}
+
+    stats = store.stats()
+    print("Session stats:", stats)
+    assert stats["hits"] == 2
+    assert stats["misses"] == 4
+    assert stats["evictions"] == 1
+    assert stats["expirations"] >= 1
+    assert stats["sessions"] <= 2
+
+if __name__ == "__main__":
+    test_session_store()
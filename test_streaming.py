@@ -0,0 +1,42 @@
+from chatbot import SmartBudgetAIChatbot
+from fake_llm import FakeGenerativeModel
+
+class BrokenModel(FakeGenerativeModel):
+    def reply(self, content, timeout=None):
+        raise RuntimeError("Gemini unavailable")
+
+def test_stream_ai_response():
+    bot = SmartBudgetAIChatbot(model=FakeGenerativeModel(chunk_words=2))
+    chunks = list(bot.stream_ai_response("How can I save more?"))
+    print("Chunks:", chunks)
+    assert len(chunks) > 1
+    assert "".join(chunks) == FakeGenerativeModel().responder("")
+
+def test_stream_falls_back_to_one_chunk():
+    bot = SmartBudgetAIChatbot(model=BrokenModel())
+    chunks = list(bot.stream_ai_response("I want to save 5000"))
+    print("Fallback chunks:", chunks)
+    assert len(chunks) == 1
+    assert "5,000" in chunks[0]
+
+def test_chat_stream_route():
+    import app
+    from session_store import SessionStore
+    previous = app.sessions
+    app.sessions = SessionStore(lambda: SmartBudgetAIChatbot(model=FakeGenerativeModel()))
+    try:
+        client = app.app.test_client()
+        response = client.post('/chat/stream', json={'input': 'How do mutual funds work?'}, headers={'X-Session-ID': 'stream-test'})
+        body = response.get_data(as_text=True)
+        print(body)
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+        assert body.count('data: {"text"') > 1
+        assert body.endswith('event: done\ndata: {}\n\n')
+    finally:
+        app.sessions = previous
+
+if __name__ == "__main__":
+    test_stream_ai_response()
+    test_stream_falls_back_to_one_chunk()
+    test_chat_stream_route()
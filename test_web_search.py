@@ -0,0 +1,114 @@
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+import web_search
+from web_search import AdviceCache, StubSearchBackend, normalize_query, search_advice
+
+@contextmanager
+def search_backend(backend):
+    # Later tests must not inherit the stub backend
+    previous = web_search.search_backend
+    web_search.set_search_backend(backend)
+    try:
+        yield backend
+    finally:
+        web_search.set_search_backend(previous)
+
+def test_normalize_query():
+    assert normalize_query("Best tax-saving investment options, India!") == "best tax saving investment options india"
+    assert normalize_query("goal of 12,340 rupees") == normalize_query("goal of 12000 rupees")
+
+def test_cache_hits_and_failures():
+    with search_backend(StubSearchBackend()) as backend:
+        cache = AdviceCache()
+        first = cache.get_or_fetch("best savings accounts india", search_advice)
+        second = cache.get_or_fetch("Best savings accounts, India", search_advice)
+        assert first == second
+        assert first.startswith("• ")
+        assert backend.calls == 1
+
+    # Failed searches fall back and are retried once the short TTL passes
+    with search_backend(StubSearchBackend(results=[])):
+        now = [0.0]
+        cache = AdviceCache(failure_ttl_seconds=60, clock=lambda: now[0])
+        advice = cache.get_or_fetch("investment options", search_advice)
+        assert advice == web_search.get_fallback_advice("investment options")
+        now[0] = 61
+        cache.get_or_fetch("investment options", search_advice)
+        stats = cache.stats()
+        print("Advice cache stats:", stats)
+        assert stats["backend_calls"] == 2
+        assert stats["failures"] == 2
+
+def test_single_flight():
+    with search_backend(StubSearchBackend(latency=0.2)) as backend:
+        cache = AdviceCache()
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_or_fetch("tips to save", search_advice)))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert backend.calls == 1
+        assert len(set(results)) == 1
+        assert cache.stats()["coalesced"] == 7
+
+def test_single_flight_failure_reaches_every_caller():
+    calls = []
+
+    def failing_fetch(query):
+        calls.append(query)
+        time.sleep(0.2)
+        raise RuntimeError("search quota exceeded")
+
+    cache = AdviceCache()
+    errors = []
+
+    def lookup():
+        try:
+            cache.get_or_fetch("tips to save", failing_fetch)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=lookup) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # The callers waiting on the failed search raise its error rather than returning None
+    assert len(calls) == 1
+    assert errors == ["search quota exceeded"] * 4
+
+def test_disk_persistence():
+    with tempfile.TemporaryDirectory() as directory, search_backend(StubSearchBackend()):
+        path = os.path.join(directory, "advice.sqlite3")
+        advice = AdviceCache(path=path).get_or_fetch("emergency fund", search_advice)
+
+        # A fresh cache (e.g. after a restart) reads it back without searching
+        with search_backend(StubSearchBackend()) as backend:
+            restarted = AdviceCache(path=path)
+            assert restarted.get_or_fetch("emergency fund", search_advice) == advice
+            assert backend.calls == 0
+            assert restarted.stats()["disk_hits"] == 1
+
+            # Memory hits do not wait for disk IO
+            with restarted._db_lock:
+                assert restarted.get_or_fetch("emergency fund", search_advice) == advice
+
+            # clear() only drops memory unless the disk is asked for too
+            restarted.clear()
+            assert restarted.get_or_fetch("emergency fund", search_advice) == advice
+            assert backend.calls == 0
+            restarted.clear(disk=True)
+            restarted.get_or_fetch("emergency fund", search_advice)
+            assert backend.calls == 1
+
+if __name__ == "__main__":
+    test_normalize_query()
+    test_cache_hits_and_failures()
+    test_single_flight()
+    test_single_flight_failure_reaches_every_caller()
+    test_disk_persistence()
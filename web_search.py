@@ -1,3 +1,12 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from metrics import ERRORS, FALLBACKS, SEARCH_SECONDS, STAGE_SECONDS
+
 def clean_and_format_advice(search_results):
     # Extract relevant information and format it as bullet points
     advice_points = []
@@ -16,22 +25,257 @@ def clean_and_format_advice(search_results):
     unique_points = list(dict.fromkeys(advice_points))
     return '\n'.join(unique_points[:5])  # Return top 5 unique points
 
-def get_financial_advice(query):
+def cursor_search(query):
+    # Use web_search tool to get financial advice
+    from cursor_tools import web_search
+    return web_search(
+        search_term=query,
+        explanation="Searching for financial advice and recommendations"
+    )
+
+class StubSearchBackend:
+    """Offline search backend that returns canned results and counts calls."""
+
+    def __init__(self, results=None, latency=0.0):
+        self.results = results if results is not None else [
+            {'snippet': 'Set up an automatic monthly transfer into a recurring deposit or SIP.'},
+            {'snippet': 'Keep three to six months of expenses in a liquid emergency fund first.'},
+        ]
+        self.latency = latency
+        self.calls = 0
+        self.queries = []
+        self._lock = threading.Lock()
+
+    def __call__(self, query):
+        with self._lock:
+            self.calls += 1
+            self.queries.append(query)
+        if self.latency:
+            time.sleep(self.latency)
+        return self.results
+
+search_backend = cursor_search
+
+def set_search_backend(backend):
+    """Swap the search backend (e.g. a StubSearchBackend for offline tests)."""
+    global search_backend
+    search_backend = backend
+
+NUMBER_PATTERN = re.compile(r'\d+(?:,\d+)*(?:\.\d+)?')
+NON_WORD_PATTERN = re.compile(r'[^\w\s]+')
+
+def _bracket_number(match):
+    # Advice for a ₹12,340 goal is the advice for a ₹12,000 goal, so amounts
+    # are keyed on two significant figures
+    value = float(match.group(0).replace(',', ''))
+    if value < 100:
+        return str(int(value))
+    digits = len(str(int(value)))
+    step = 10 ** (digits - 2)
+    return str(int(round(value / step) * step))
+
+def normalize_query(query):
+    query = NUMBER_PATTERN.sub(_bracket_number, query.lower())
+    query = NON_WORD_PATTERN.sub(' ', query)
+    return ' '.join(query.split())
+
+class _Flight:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+class AdviceCache:
+    """TTL cache for advice lookups with optional SQLite persistence.
+
+    Concurrent lookups of the same normalized query are coalesced: one
+    caller runs the search while the others wait for its result (or get
+    the exception it raised).
+    """
+
+    def __init__(self, path=None, ttl_seconds=86400, failure_ttl_seconds=60, max_entries=2000, clock=time.time):
+        self.ttl_seconds = ttl_seconds
+        self.failure_ttl_seconds = failure_ttl_seconds
+        self.max_entries = max_entries
+        self.clock = clock
+        self._memory = OrderedDict()  # key -> (advice, expires_at)
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        # Disk IO has its own lock so memory hits never wait behind SQLite
+        self._db_lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS advice (key TEXT PRIMARY KEY, advice TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.commit()
+        self.metrics = {
+            'hits': 0, 'disk_hits': 0, 'misses': 0, 'coalesced': 0,
+            'backend_calls': 0, 'failures': 0, 'expirations': 0, 'evictions': 0
+        }
+
+    def get_or_fetch(self, query, fetch):
+        """Return cached advice for ``query`` or call ``fetch(query)``.
+
+        ``fetch`` returns ``(advice, ok)``; failed lookups (fallback advice)
+        are kept only for ``failure_ttl_seconds`` so the search is retried.
+        """
+        key = normalize_query(query)
+        now = self.clock()
+        with self._lock:
+            advice = self._memory_get(key, now)
+            if advice is not None:
+                self.metrics['hits'] += 1
+                return advice
+            flight = self._in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._in_flight[key] = _Flight()
+
+        if not leader:
+            flight.event.wait()
+            with self._lock:
+                self.metrics['coalesced'] += 1
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            stored = self._disk_get(key, now)
+            if stored is not None:
+                advice, expires_at = stored
+                with self._lock:
+                    self.metrics['disk_hits'] += 1
+                    self._memory_put(key, advice, expires_at)
+            else:
+                with self._lock:
+                    self.metrics['misses'] += 1
+                    self.metrics['backend_calls'] += 1
+                advice, ok = fetch(query)
+                ttl = self.ttl_seconds if ok else self.failure_ttl_seconds
+                expires_at = self.clock() + ttl
+                with self._lock:
+                    if not ok:
+                        self.metrics['failures'] += 1
+                    self._memory_put(key, advice, expires_at)
+                if ok:
+                    self._disk_put(key, advice, expires_at)
+            flight.result = advice
+            return advice
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            flight.event.set()
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def clear(self, disk=False):
+        """Drop the in-memory entries; ``disk`` also empties the persistent table."""
+        with self._lock:
+            self._memory.clear()
+        if disk and self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM advice")
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.metrics)
+            stats['entries'] = len(self._memory)
+        lookups = stats['hits'] + stats['disk_hits'] + stats['misses'] + stats['coalesced']
+        stats['hit_rate'] = (lookups - stats['misses']) / lookups if lookups else 0.0
+        return stats
+
+    def _memory_get(self, key, now):
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        if entry[1] < now:
+            del self._memory[key]
+            self.metrics['expirations'] += 1
+            return None
+        self._memory.move_to_end(key)
+        return entry[0]
+
+    def _memory_put(self, key, advice, expires_at):
+        self._memory[key] = (advice, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.metrics['evictions'] += 1
+
+    def _disk_get(self, key, now):
+        if self._db is None:
+            return None
+        with self._db_lock:
+            row = self._db.execute("SELECT advice, expires_at FROM advice WHERE key = ?", (key,)).fetchone()
+        if row is None or row[1] < now:
+            return None
+        return row
+
+    def _disk_put(self, key, advice, expires_at):
+        if self._db is None:
+            return
+        with self._db_lock:
+            self._db.execute("INSERT OR REPLACE INTO advice VALUES (?, ?, ?)", (key, advice, expires_at))
+            self._db.commit()
+
+advice_cache = AdviceCache(
+    path=os.getenv('ADVICE_CACHE_PATH'),
+    ttl_seconds=float(os.getenv('ADVICE_CACHE_TTL_SECONDS', '86400'))
+)
+
+def search_advice(query):
+    # Returns (advice, True) from a live search, or (fallback advice, False)
+    start = time.perf_counter()
     try:
-        # Use web_search tool to get financial advice
-        from cursor_tools import web_search
-        results = web_search(
-            search_term=query,
-            explanation="Searching for financial advice and recommendations"
-        )
+        results = search_backend(query)
         
         if results and isinstance(results, list):
-            return clean_and_format_advice(results)
+            SEARCH_SECONDS.observe(time.perf_counter() - start, 'ok')
+            return clean_and_format_advice(results), True
         else:
             # Fallback advice if web search fails
-            return get_fallback_advice(query)
+            SEARCH_SECONDS.observe(time.perf_counter() - start, 'empty')
+            FALLBACKS.inc('search_empty')
+            return get_fallback_advice(query), False
     except Exception as e:
-        return get_fallback_advice(query)
+        SEARCH_SECONDS.observe(time.perf_counter() - start, 'error')
+        ERRORS.inc('search')
+        FALLBACKS.inc('search_error')
+        return get_fallback_advice(query), False
+
+def get_financial_advice(query):
+    return advice_cache.get_or_fetch(query, search_advice)
+
+# Shared by every request so concurrent users cannot spawn unbounded threads
+advice_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('ADVICE_WORKERS', '16')),
+    thread_name_prefix='advice'
+)
+ADVICE_DEADLINE_SECONDS = float(os.getenv('ADVICE_DEADLINE_SECONDS', '2.0'))
+
+def get_financial_advice_many(queries, deadline=None):
+    """Look up several queries concurrently under one overall deadline.
+
+    Returns advice in the same order as ``queries``. A lookup that has not
+    finished by the deadline gets ``get_fallback_advice`` for its query; it
+    keeps running in the background and still fills the cache for next time.
+    """
+    deadline = ADVICE_DEADLINE_SECONDS if deadline is None else deadline
+    with STAGE_SECONDS.time('advice'):
+        futures = [advice_executor.submit(get_financial_advice, query) for query in queries]
+        done, _ = wait(futures, timeout=deadline)
+    results = []
+    for query, future in zip(queries, futures):
+        if future in done and future.exception() is None:
+            results.append(future.result())
+        else:
+            FALLBACKS.inc('advice_deadline')
+            results.append(get_fallback_advice(query))
+    return results
 
 def get_fallback_advice(query):
     # Provide relevant fallback advice based on the query type
@@ -58,4 +302,4 @@ def get_fallback_advice(query):
 • Set realistic financial goals
 • Build an emergency fund
 • Avoid unnecessary debt
-• Invest in your financial education""" 
\ No newline at end of file
+• Invest in your financial education"""
\ No newline at end of file